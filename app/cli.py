@@ -3,8 +3,9 @@ from __future__ import annotations
 import argparse
 import json
 
-from jira_migrator.migrator import Migrator
-from jira_migrator.models import MigrationRequest
+from jira_migrator.migrator import Migrator, run_shard_worker
+from jira_migrator.models import MigrationRequest, ValidationRequest
+from jira_migrator.validation import MigrationValidator
 
 
 def parse_args() -> argparse.Namespace:
@@ -20,6 +21,39 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--target-project-name-prefix", default="Migrated")
     parser.add_argument("--max-issues-per-project", type=int, default=500)
     parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="Issues created in parallel per project")
+    parser.add_argument("--parallel-projects", type=int, default=2, help="Projects migrated at the same time")
+    parser.add_argument("--max-concurrent-requests", type=int, default=16)
+    parser.add_argument("--prefetch-pages", type=int, default=2, help="Search pages fetched ahead; 0 disables")
+    parser.add_argument("--bulk-create", action="store_true", help="Create issues via the DC bulk endpoint")
+    parser.add_argument("--bulk-batch-size", type=int, default=50)
+    parser.add_argument("--delta-sync", action="store_true", help="Sync issues changed since the last watermark")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore saved checkpoints and rescan from the start")
+    parser.add_argument("--snapshot-dir", default=None, help="Cache Cloud extraction as per-project snapshots")
+    parser.add_argument("--snapshot-offline", action="store_true", help="Use snapshots only; no Cloud issue reads")
+    parser.add_argument("--no-links", action="store_true", help="Skip subtask parents and issue links")
+    parser.add_argument("--epic-link-field", default=None, help="DC field id that holds a non-subtask's parent")
+    parser.add_argument(
+        "--no-stamp", action="store_true", help="Do not label DC issues with their Cloud key (disables crash recovery)"
+    )
+    parser.add_argument("--no-validate", action="store_true", help="Send payloads without checking DC create metadata")
+    parser.add_argument("--default-issue-type", default="Task", help="Used when an issue type is missing on DC")
+    parser.add_argument("--default-priority", default=None, help="Used when a priority is missing on DC")
+    parser.add_argument("--no-users", action="store_true", help="Leave assignee and reporter unset on DC")
+    parser.add_argument("--user-map-file", default=None, help="CSV: Cloud accountId or email, DC username")
+    parser.add_argument("--migrate-attachments", action="store_true", help="Stream attachments from Cloud to DC")
+    parser.add_argument("--attachment-concurrency", type=int, default=2)
+    parser.add_argument("--attachment-max-mbps", type=float, default=None, help="Attachment bandwidth cap, MB/s")
+    parser.add_argument("--attachment-spool-dir", default=None)
+    parser.add_argument("--workers", type=int, default=1, help="Split projects into shards run by N processes")
+    parser.add_argument("--shard-issues", type=int, default=5000, help="Target issues per shard")
+    parser.add_argument("--shard-lease-s", type=float, default=120.0)
+    parser.add_argument("--join-run", default=None, help="Work on the shards of an existing sharded run id")
+    parser.add_argument("--validate", action="store_true", help="Compare migrated projects with Cloud; no writes")
+    parser.add_argument("--sample-size", type=int, default=None, help="Validate this many random mapped issues")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per request on 429/5xx")
+    parser.add_argument("--max-requests-per-second", type=float, default=50.0)
+    parser.add_argument("--log-retention-days", type=float, default=30.0, help="0 keeps every run log")
     parser.add_argument("--db-path", default="./.migrator/mappings.sqlite3")
     parser.add_argument("--include-done", action="store_true")
     parser.add_argument("--migrate-comments", action="store_true")
@@ -45,8 +79,44 @@ def main() -> None:
         migrate_comments=args.migrate_comments,
         include_done=args.include_done,
         issue_batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        parallel_projects=args.parallel_projects,
+        max_concurrent_requests=args.max_concurrent_requests,
+        prefetch_pages=args.prefetch_pages,
+        bulk_create=args.bulk_create,
+        bulk_batch_size=args.bulk_batch_size,
+        delta_sync=args.delta_sync,
+        resume_from_checkpoint=not args.no_resume,
+        snapshot_dir=args.snapshot_dir,
+        snapshot_offline=args.snapshot_offline,
+        migrate_links=not args.no_links,
+        epic_link_field=args.epic_link_field,
+        validate_payloads=not args.no_validate,
+        stamp_cloud_keys=not args.no_stamp,
+        default_issue_type=args.default_issue_type or None,
+        default_priority=args.default_priority,
+        migrate_users=not args.no_users,
+        user_map_file=args.user_map_file,
+        migrate_attachments=args.migrate_attachments,
+        attachment_concurrency=args.attachment_concurrency,
+        attachment_max_bytes_per_second=args.attachment_max_mbps * 1_000_000 if args.attachment_max_mbps else None,
+        attachment_spool_dir=args.attachment_spool_dir,
+        workers=args.workers,
+        shard_issues=args.shard_issues,
+        shard_lease_s=args.shard_lease_s,
+        max_retries=args.max_retries,
+        max_requests_per_second=args.max_requests_per_second,
+        log_retention_days=args.log_retention_days,
         db_path=args.db_path,
     )
+    if args.validate:
+        validation = ValidationRequest(**request.model_dump(), sample_size=args.sample_size)
+        print(json.dumps(MigrationValidator(validation).run().model_dump(), indent=2))
+        return
+    if args.join_run:
+        completed = run_shard_worker(request, args.join_run)
+        print(json.dumps({"run_id": args.join_run, "shards_completed": completed}))
+        return
     result = Migrator(request).run()
     print(json.dumps(result.model_dump(), indent=2))
 
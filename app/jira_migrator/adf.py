@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Characters that open wiki markup when they appear in plain text.
+_ESCAPES = str.maketrans({c: "\\" + c for c in "*_{}[]|!^~+"})
+_SPECIAL = re.compile(r"[*_{}\[\]|!^~+]")
+
+_CHUNK_PIECES = 4096
+
+_PANEL_MACROS = {
+    "info": "info",
+    "note": "note",
+    "warning": "warning",
+    "error": "warning",
+    "success": "tip",
+    "tip": "tip",
+}
+
+_LISTS = ("bulletList", "orderedList", "taskList", "decisionList")
+
+_MARKS = {
+    "strong": ("*", "*"),
+    "em": ("_", "_"),
+    "strike": ("-", "-"),
+    "underline": ("+", "+"),
+    "code": ("{{", "}}"),
+}
+
+# A blank line between blocks, except where a newline would end the list item or table cell.
+_BLOCK_SEPARATOR = "\n\n"
+_CELL_BREAK = " \\\\ "
+
+
+class _Context(NamedTuple):
+    list_prefix: str = ""
+    raw: bool = False
+    inline_only: bool = False
+
+
+MentionResolver = Callable[[Dict[str, Any]], Optional[str]]
+_Frame = Union[str, Tuple[Dict[str, Any], _Context]]
+
+
+def _escape(text: str) -> str:
+    # Most text has nothing to escape; the search is much cheaper than a translate.
+    return text.translate(_ESCAPES) if _SPECIAL.search(text) else text
+
+
+def _text(node: Dict[str, Any], ctx: _Context) -> str:
+    text = node.get("text") or ""
+    if ctx.raw:
+        return text
+    marks = node.get("marks") or []
+    if any(mark.get("type") == "code" for mark in marks):
+        body = text.replace("}}", "} }")
+    else:
+        body = _escape(text)
+    if ctx.inline_only:
+        body = body.replace("\n", _CELL_BREAK)
+    opening: List[str] = []
+    closing: List[str] = []
+    href: Optional[str] = None
+    for mark in marks:
+        kind = mark.get("type")
+        attrs = mark.get("attrs") or {}
+        if kind in _MARKS:
+            start, end = _MARKS[kind]
+        elif kind == "link":
+            href = attrs.get("href")
+            continue
+        elif kind == "textColor" and attrs.get("color"):
+            start, end = f"{{color:{attrs['color']}}}", "{color}"
+        elif kind == "subsup":
+            start = end = "~" if attrs.get("type") == "sub" else "^"
+        else:
+            continue
+        opening.append(start)
+        closing.append(end)
+    formatted = "".join(opening) + body + "".join(reversed(closing))
+    return f"[{formatted}|{href}]" if href else formatted
+
+
+def _push_children(
+    stack: List[_Frame], node: Dict[str, Any], ctx: _Context, separator: Union[str, Callable[[Any], str]] = ""
+) -> None:
+    # Pushed in reverse so they pop in document order; separators sit between siblings only.
+    children = node.get("content") or []
+    for index in range(len(children) - 1, -1, -1):
+        stack.append((children[index], ctx))
+        if index:
+            stack.append(separator(children[index]) if callable(separator) else separator)
+
+
+def _date(attrs: Dict[str, Any]) -> str:
+    try:
+        return datetime.fromtimestamp(int(attrs.get("timestamp", 0)) / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    except (TypeError, ValueError, OverflowError):
+        return str(attrs.get("timestamp", ""))
+
+
+def iter_wiki(document: Any, mention: Optional[MentionResolver] = None) -> Iterator[str]:
+    # One pass over the ADF tree with an explicit stack: no recursion, so nesting depth is not
+    # limited by the interpreter. Work is linear in the number of nodes and text characters, and
+    # output leaves in chunks of about _CHUNK_PIECES pieces, so a caller that writes them out never
+    # holds more than one chunk of small strings.
+    stack: List[_Frame] = [(document, _Context())]
+    out: List[str] = []
+    emit = out.append
+    while stack:
+        if len(out) >= _CHUNK_PIECES:
+            yield "".join(out)
+            out.clear()
+        frame = stack.pop()
+        if isinstance(frame, str):
+            emit(frame)
+            continue
+        node, ctx = frame
+        if not isinstance(node, dict):
+            continue
+        kind = node.get("type")
+        attrs = node.get("attrs") or {}
+        block_separator = _CELL_BREAK if ctx.inline_only else _BLOCK_SEPARATOR
+
+        if kind == "text":
+            emit(_text(node, ctx))
+        elif kind in ("doc", "mediaSingle"):
+            _push_children(stack, node, ctx, block_separator)
+        elif kind == "paragraph":
+            _push_children(stack, node, ctx)
+        elif kind == "hardBreak":
+            emit(_CELL_BREAK if (ctx.inline_only or ctx.list_prefix) and not ctx.raw else "\n")
+        elif kind == "heading":
+            level = min(max(int(attrs.get("level") or 1), 1), 6)
+            if not ctx.inline_only:
+                emit(f"h{level}. ")
+            _push_children(stack, node, ctx)
+        elif kind in _LISTS:
+            symbol = "#" if kind == "orderedList" else "*"
+            _push_children(stack, node, ctx._replace(list_prefix=ctx.list_prefix + symbol), "\n")
+        elif kind in ("listItem", "taskItem", "decisionItem"):
+            emit(f"{ctx.list_prefix} ")
+            if kind == "taskItem":
+                emit("(/) " if attrs.get("state") == "DONE" else "(x) ")
+            # A nested list starts on its own line; other blocks stay on the item's line.
+            item_ctx = ctx._replace(inline_only=False)
+            _push_children(stack, node, item_ctx, lambda child: "\n" if child.get("type") in _LISTS else _CELL_BREAK)
+        elif kind == "codeBlock":
+            language = attrs.get("language")
+            emit(f"{{code:{language}}}\n" if language else "{code}\n")
+            stack.append("\n{code}")
+            _push_children(stack, node, ctx._replace(raw=True))
+        elif kind == "blockquote":
+            emit("{quote}\n")
+            stack.append("\n{quote}")
+            _push_children(stack, node, ctx._replace(list_prefix="", inline_only=False), _BLOCK_SEPARATOR)
+        elif kind == "panel":
+            macro = _PANEL_MACROS.get(attrs.get("panelType") or "info", "info")
+            emit(f"{{{macro}}}\n")
+            stack.append(f"\n{{{macro}}}")
+            _push_children(stack, node, ctx._replace(list_prefix="", inline_only=False), _BLOCK_SEPARATOR)
+        elif kind in ("expand", "nestedExpand"):
+            title = (attrs.get("title") or "").replace("|", " ").replace("}", ")")
+            emit(f"{{panel:title={title}}}\n" if title else "{panel}\n")
+            stack.append("\n{panel}")
+            _push_children(stack, node, ctx._replace(list_prefix="", inline_only=False), _BLOCK_SEPARATOR)
+        elif kind == "rule":
+            emit("----")
+        elif kind == "table":
+            _push_children(stack, node, ctx, "\n")
+        elif kind == "tableRow":
+            cells = node.get("content") or []
+            if cells:
+                stack.append(" ||" if cells[-1].get("type") == "tableHeader" else " |")
+            _push_children(stack, node, ctx._replace(list_prefix="", inline_only=True), " ")
+        elif kind in ("tableHeader", "tableCell"):
+            emit("|| " if kind == "tableHeader" else "| ")
+            if not node.get("content"):
+                emit(" ")
+            _push_children(stack, node, ctx, _CELL_BREAK)
+        elif kind == "mention":
+            username = mention(attrs) if mention is not None else None
+            emit(f"[~{username}]" if username else _escape(attrs.get("text") or "@unknown"))
+        elif kind == "emoji":
+            emit(attrs.get("text") or attrs.get("shortName") or "")
+        elif kind in ("inlineCard", "blockCard", "embedCard"):
+            url = attrs.get("url")
+            emit(f"[{url}]" if url else "")
+        elif kind in ("media", "mediaInline"):
+            name = attrs.get("alt") or attrs.get("id")
+            emit(f"!{name}!" if name else "")
+        elif kind == "mediaGroup":
+            _push_children(stack, node, ctx, " ")
+        elif kind == "status":
+            emit(f"*[{_escape((attrs.get('text') or '').upper())}]*")
+        elif kind == "date":
+            emit(_date(attrs))
+        elif node.get("content"):
+            _push_children(stack, node, ctx, block_separator if kind != "inlineExtension" else "")
+        elif attrs.get("text"):
+            emit(_escape(str(attrs["text"])))
+    if out:
+        yield "".join(out)
+
+
+def adf_to_wiki(document: Any, mention: Optional[MentionResolver] = None) -> str:
+    if document is None:
+        return ""
+    if isinstance(document, str):
+        return document
+    return "".join(iter_wiki(document, mention))
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from .jira_client import RETRY_STATUSES, JiraClient
+from .mapping_store import MappingStore
+from .rate_limit import ByteRateLimiter, parse_retry_after
+
+CHUNK_SIZE = 1 << 20
+
+
+class AttachmentOutcome(NamedTuple):
+    copied: int = 0
+    deduplicated: int = 0
+    failed: int = 0
+    bytes: int = 0
+
+
+class UploadRejected(Exception):
+    # DC answered an upload with a retryable status; the body is spent, so the copier retries
+    # from a fresh download instead of the client retrying the request.
+    def __init__(self, response: requests.Response) -> None:
+        super().__init__(f"DC upload answered {response.status_code}")
+        self.response = response
+
+
+class AttachmentCopier:
+    # Copies attachments on its own bounded pool so multi-GB files never hold up issue creation.
+    # Bytes stream from the Cloud download straight into the DC upload, hashed on the way; only
+    # when the target issue already has a file of the same size is the download spooled to disk
+    # first, so a duplicate is recognised by sha256 before it is uploaded again.
+    def __init__(
+        self,
+        cloud: JiraClient,
+        dc: JiraClient,
+        store: MappingStore,
+        workers: int = 2,
+        max_bytes_per_second: Optional[float] = None,
+        spool_dir: Optional[str] = None,
+        dry_run: bool = False,
+        log: Optional[Callable[..., None]] = None,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        self.cloud = cloud
+        self.dc = dc
+        self.store = store
+        self.spool_dir = spool_dir
+        self.dry_run = dry_run
+        self.bandwidth = ByteRateLimiter(max_bytes_per_second) if max_bytes_per_second else None
+        self._log = log or (lambda level, message, **fields: None)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="attachments")
+        # Issue tasks queued or running. submit() blocks once this many are pending, so a project
+        # with many attachments holds back issue workers instead of growing the queue.
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+
+    def submit(
+        self, cloud_issue_key: str, dc_issue_key: str, attachments: Iterable[Dict[str, Any]]
+    ) -> Optional["Future[AttachmentOutcome]"]:
+        attachments = [a for a in attachments if a.get("id") is not None]
+        if not attachments:
+            return None
+        copied = self.store.get_attachment_ids(cloud_issue_key)
+        pending = [a for a in attachments if str(a["id"]) not in copied]
+        if not pending:
+            return None
+        # One task per issue: its files go one after another, so two identical files on the
+        # same issue can never both be mid-upload before either is recorded.
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._copy_issue, cloud_issue_key, dc_issue_key, pending)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _copy_issue(
+        self, cloud_issue_key: str, dc_issue_key: str, attachments: List[Dict[str, Any]]
+    ) -> AttachmentOutcome:
+        copied = deduplicated = failed = transferred = 0
+        for attachment in attachments:
+            try:
+                result, size = self._copy_with_retries(cloud_issue_key, dc_issue_key, attachment)
+            except Exception as exc:
+                failed += 1
+                name = attachment.get("filename", attachment["id"])
+                message = f"attachment {name} on {cloud_issue_key} failed: {type(exc).__name__}: {exc}"
+                self._log("error", message, issue_key=cloud_issue_key, phase="attachments", error=exc)
+                continue
+            if result == "deduplicated":
+                deduplicated += 1
+            else:
+                copied += 1
+                transferred += size
+        return AttachmentOutcome(copied=copied, deduplicated=deduplicated, failed=failed, bytes=transferred)
+
+    def _copy_with_retries(
+        self, cloud_issue_key: str, dc_issue_key: str, attachment: Dict[str, Any]
+    ) -> Tuple[str, int]:
+        # Retries a throttled or unavailable DC upload with the client's backoff, downloading the
+        # file again for each attempt.
+        policy = self.dc.retry_policy
+        attempt = 0
+        while True:
+            try:
+                return self._copy_one(cloud_issue_key, dc_issue_key, attachment)
+            except UploadRejected as exc:
+                if attempt >= policy.max_retries:
+                    raise
+                self.dc.rate_limiter.on_retry()
+                self.dc.rate_limiter.sleep(policy.delay(attempt, parse_retry_after(exc.response.headers)))
+                attempt += 1
+
+    def _upload(
+        self, dc_issue_key: str, filename: str, chunks: Iterator[bytes], size: Optional[int], mime_type: str
+    ) -> List[Dict[str, Any]]:
+        try:
+            return self.dc.upload_attachment_dc(dc_issue_key, filename, chunks, size, mime_type)
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code in RETRY_STATUSES:
+                raise UploadRejected(exc.response) from exc
+            raise
+
+    def _metered(self, chunks: Iterable[bytes], digest: Any, counted: List[int]) -> Iterator[bytes]:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if self.bandwidth is not None:
+                self.bandwidth.consume(len(chunk))
+            if digest is not None:
+                digest.update(chunk)
+            counted[0] += len(chunk)
+            yield chunk
+
+    def _copy_one(
+        self, cloud_issue_key: str, dc_issue_key: str, attachment: Dict[str, Any]
+    ) -> Tuple[str, int]:
+        attachment_id = str(attachment["id"])
+        filename = attachment.get("filename") or f"attachment-{attachment_id}"
+        mime_type = attachment.get("mimeType") or "application/octet-stream"
+        size: Optional[int] = attachment.get("size")
+        if self.dry_run:
+            return "copied", size or 0
+
+        digest = hashlib.sha256()
+        counted = [0]
+        with closing(self.cloud.open_attachment_cloud(attachment_id)) as response:
+            downloaded = self._metered(response.iter_content(CHUNK_SIZE), digest, counted)
+            if size is None or not self.store.has_attachment_size(dc_issue_key, size):
+                uploaded = self._upload(dc_issue_key, filename, downloaded, size, mime_type)
+            else:
+                with tempfile.TemporaryFile(dir=self.spool_dir) as spool:
+                    for chunk in downloaded:
+                        spool.write(chunk)
+                    existing = self.store.find_attachment(dc_issue_key, digest.hexdigest(), counted[0])
+                    if existing is not None:
+                        self.store.set_attachment_map(
+                            attachment_id, cloud_issue_key, dc_issue_key, existing, digest.hexdigest(), counted[0]
+                        )
+                        return "deduplicated", 0
+                    spool.seek(0)
+                    from_disk = self._metered(iter(lambda: spool.read(CHUNK_SIZE), b""), None, [0])
+                    uploaded = self._upload(dc_issue_key, filename, from_disk, counted[0], mime_type)
+
+        dc_attachment_id = str((uploaded[0] if uploaded else {}).get("id", ""))
+        self.store.set_attachment_map(
+            attachment_id, cloud_issue_key, dc_issue_key, dc_attachment_id, digest.hexdigest(), counted[0]
+        )
+        return "copied", counted[0]
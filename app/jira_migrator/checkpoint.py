@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple
+
+# JQL date literals have minute precision and are read in the searching user's time zone, so a
+# resumed search starts a day early and the overlap is dropped client-side by position.
+RESUME_MARGIN = timedelta(days=1)
+
+
+class IssuePosition(NamedTuple):
+    # Same order as the scan's ORDER BY created ASC, key ASC; within one project, key order is
+    # the number after the dash. Issues imported in bulk often share a created timestamp.
+    created: datetime
+    key_number: int
+    created_raw: str
+    issue_key: str
+
+
+def parse_jira_datetime(value: str) -> datetime:
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def make_position(created_raw: str, issue_key: Any) -> Optional[IssuePosition]:
+    # Checkpoints saved before keys were stored hold a numeric issue id instead; that sorts before
+    # every key at its timestamp, so the issues sharing it are scanned again (and skipped if mapped).
+    key = str(issue_key)
+    try:
+        number = int(key.rsplit("-", 1)[1]) if "-" in key else -1
+        return IssuePosition(parse_jira_datetime(created_raw), number, created_raw, key)
+    except (TypeError, ValueError):
+        return None
+
+
+def issue_position(issue: Dict[str, Any]) -> Optional[IssuePosition]:
+    created = (issue.get("fields") or {}).get("created")
+    if not created:
+        return None
+    return make_position(created, issue.get("key"))
+
+
+def resume_jql_clause(position: IssuePosition) -> str:
+    since = position.created.astimezone(timezone.utc) - RESUME_MARGIN
+    return f' AND created >= "{since.strftime("%Y/%m/%d %H:%M")}"'
+
+
+class CheckpointTracker:
+    # Low watermark over scan order: the position only moves past an issue once it and every
+    # issue scanned before it has finished successfully, so a resume never skips unfinished work.
+    def __init__(self) -> None:
+        self._order: Deque[Tuple[int, Optional[IssuePosition]]] = deque()
+        self._finished: Dict[int, bool] = {}
+        self._blocked = False
+        self.position: Optional[IssuePosition] = None
+        self.advanced = 0
+
+    def scanned(self, ordinal: int, position: Optional[IssuePosition]) -> None:
+        self._order.append((ordinal, position))
+
+    def finished(self, ordinal: int, ok: bool = True) -> None:
+        self._finished[ordinal] = ok
+        while self._order and self._order[0][0] in self._finished:
+            head, position = self._order.popleft()
+            if not self._finished.pop(head):
+                self._blocked = True
+            if self._blocked or position is None:
+                continue
+            self.position = position
+            self.advanced += 1
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .jira_client import JiraClient
+from .models import ProjectSummary
+
+
+class DiscoveredProjects(NamedTuple):
+    projects: List[ProjectSummary]
+    fetched_at: float
+    cached: bool
+
+
+def project_summary(raw: Dict[str, Any]) -> ProjectSummary:
+    count = (raw.get("insight") or {}).get("totalIssueCount")
+    return ProjectSummary(
+        key=raw.get("key", ""),
+        name=raw.get("name", ""),
+        project_type_key=raw.get("projectTypeKey", "unknown"),
+        style=raw.get("style", "unknown"),
+        issue_count=int(count) if count is not None else None,
+    )
+
+
+def fetch_projects(client: JiraClient, include_issue_counts: bool = False) -> List[ProjectSummary]:
+    projects = [
+        project_summary(raw)
+        for raw in client.list_projects_cloud(include_issue_counts=include_issue_counts)
+        if raw.get("key")
+    ]
+    projects.sort(key=lambda p: p.key)
+    return projects
+
+
+def filter_projects(projects: List[ProjectSummary], query: Optional[str]) -> List[ProjectSummary]:
+    # Case-insensitive substring match on key or name.
+    needle = (query or "").strip().lower()
+    if not needle:
+        return projects
+    return [p for p in projects if needle in p.key.lower() or needle in p.name.lower()]
+
+
+def credentials_key(base_url: str, user: str, token: str) -> Tuple[str, str]:
+    # Projects visible to one account are not visible to another, so the cache is per site and
+    # per credentials; only a hash of them is kept.
+    digest = hashlib.sha256(f"{user}\0{token}".encode("utf-8")).hexdigest()
+    return base_url.rstrip("/").lower(), digest
+
+
+class ProjectDiscoveryCache:
+    # Discovered project lists per site and credentials, kept for `ttl_s`. Concurrent requests
+    # for the same key wait for one fetch instead of each paging the whole site.
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 64, clock: Callable[[], float] = time.time) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, bool], Tuple[float, List[ProjectSummary]]]" = OrderedDict()
+        # Fetch lock per key with the number of requests holding or waiting for it; the entry goes
+        # away with the last of them, so keys do not pile up for every credentials ever seen.
+        self._fetching: Dict[Tuple[str, str, bool], Tuple[threading.Lock, int]] = {}
+
+    def _fresh(self, key: Tuple[str, str, bool]) -> Optional[Tuple[float, List[ProjectSummary]]]:
+        # Called with self._lock held.
+        entry = self._entries.get(key)
+        if entry is None or self._clock() - entry[0] >= self.ttl_s:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(
+        self,
+        base_url: str,
+        user: str,
+        token: str,
+        fetch: Callable[[bool], List[ProjectSummary]],
+        include_issue_counts: bool = False,
+        refresh: bool = False,
+    ) -> DiscoveredProjects:
+        site, digest = credentials_key(base_url, user, token)
+        key = (site, digest, include_issue_counts)
+        # A list with counts is preferred: it has everything a request without them needs.
+        candidates = [(site, digest, True)] + ([] if include_issue_counts else [key])
+        if not refresh:
+            with self._lock:
+                for candidate in candidates:
+                    entry = self._fresh(candidate)
+                    if entry is not None:
+                        return DiscoveredProjects(entry[1], entry[0], True)
+        with self._lock:
+            fetching, users = self._fetching.get(key, (threading.Lock(), 0))
+            self._fetching[key] = (fetching, users + 1)
+        try:
+            with fetching:
+                if not refresh:
+                    # Another request may have fetched the list while this one waited.
+                    with self._lock:
+                        entry = self._fresh(key)
+                    if entry is not None:
+                        return DiscoveredProjects(entry[1], entry[0], True)
+                projects = fetch(include_issue_counts)
+                fetched_at = self._clock()
+                with self._lock:
+                    if refresh:
+                        # The other variant is older than this list now.
+                        self._entries.pop((site, digest, not include_issue_counts), None)
+                    self._entries[key] = (fetched_at, projects)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                fetching, users = self._fetching.pop(key)
+                if users > 1:
+                    self._fetching[key] = (fetching, users - 1)
+        return DiscoveredProjects(projects, fetched_at, False)
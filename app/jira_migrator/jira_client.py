@@ -1,10 +1,74 @@
 from __future__ import annotations
 
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import REQUEST_RETRIES, REQUEST_THROTTLED, observe_request
+from .rate_limit import AdaptiveRateLimiter, RetryPolicy, limiter_for_host, parse_retry_after
+
+RETRY_STATUSES = (429, 502, 503, 504)
+SEARCH_FIELDS = (
+    "summary",
+    "description",
+    "issuetype",
+    "priority",
+    "labels",
+    "project",
+    "created",
+    "updated",
+    "parent",
+    "issuelinks",
+    "assignee",
+    "reporter",
+)
+
+
+class MultipartFileBody:
+    # A multipart/form-data body with a single file part, produced from `chunks` as requests sends
+    # it. With a known size the body has a length, so it goes out with Content-Length instead of
+    # chunked encoding (which some proxies in front of Jira DC reject).
+    def __init__(self, filename: str, chunks: Iterable[bytes], size: Optional[int], mime_type: str) -> None:
+        self.boundary = uuid.uuid4().hex
+        quoted = filename.replace("\\", "\\\\").replace('"', '\\"')
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{quoted}"\r\n'
+            f"Content-Type: {mime_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+        self._chunks = chunks
+        self._size = size
+        if size is not None:
+            self.len = len(self._head) + size + len(self._tail)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        sent = 0
+        for chunk in self._chunks:
+            sent += len(chunk)
+            yield chunk
+        if self._size is not None and sent != self._size:
+            raise ValueError(f"attachment body was {sent} bytes, expected {self._size}")
+        yield self._tail
+
+
+def _body_size(body: Any) -> int:
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    return int(getattr(body, "len", 0) or 0)
 
 
 @dataclass
@@ -14,31 +78,120 @@ class JiraAuth:
 
 
 class JiraClient:
-    def __init__(self, base_url: str, auth: JiraAuth, timeout_s: int = 30) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        auth: JiraAuth,
+        timeout_s: int = 30,
+        pool_maxsize: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        max_requests_per_second: float = 100.0,
+        request_slots: Optional[threading.Semaphore] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
+        self.host = urlparse(self.base_url).netloc or self.base_url
         self.timeout_s = timeout_s
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.request_slots = request_slots
+        self.rate_limiter = rate_limiter or limiter_for_host(self.host, max_rate=max_requests_per_second)
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.auth = (auth.username, auth.token)
         self.session.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
 
-    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+    def _request(
+        self, method: str, path: str, raw: bool = False, max_retries: Optional[int] = None, **kwargs: Any
+    ) -> Any:
+        # raw=True returns the open Response (for streamed bodies; the caller closes it).
+        # Requests with a one-shot streamed body must pass max_retries=0.
         url = f"{self.base_url}{path}"
-        retries = 3
-        for attempt in range(retries):
-            response = self.session.request(method, url, timeout=self.timeout_s, **kwargs)
-            if response.status_code in (429, 502, 503, 504) and attempt < retries - 1:
-                time.sleep(2**attempt)
-                continue
+        retries = self.retry_policy.max_retries if max_retries is None else max_retries
+        for attempt in range(retries + 1):
+            self.rate_limiter.acquire()
+            issued_at = self.rate_limiter.now()
+            with self.request_slots or nullcontext():
+                started = time.perf_counter()
+                try:
+                    response = self.session.request(method, url, timeout=self.timeout_s, **kwargs)
+                except requests.RequestException:
+                    observe_request(self.host, method, path, None, time.perf_counter() - started, 0, 0)
+                    raise
+                body = response.request.body if response.request is not None else None
+                observe_request(
+                    self.host,
+                    method,
+                    path,
+                    response.status_code,
+                    time.perf_counter() - started,
+                    _body_size(body),
+                    0 if raw else len(response.content),
+                )
+            if response.status_code in RETRY_STATUSES:
+                retry_after = parse_retry_after(response.headers)
+                if response.status_code == 429:
+                    REQUEST_THROTTLED.inc(host=self.host)
+                    self.rate_limiter.on_throttle(retry_after, issued_at)
+                if attempt < retries:
+                    REQUEST_RETRIES.inc(host=self.host)
+                    response.close()
+                    self.rate_limiter.on_retry()
+                    self.rate_limiter.sleep(self.retry_policy.delay(attempt, retry_after))
+                    continue
+            else:
+                self.rate_limiter.on_success(response.headers, issued_at)
+            if raw:
+                if response.status_code >= 400:
+                    response.close()
+                response.raise_for_status()
+                return response
             response.raise_for_status()
             if response.text:
                 return response.json()
             return None
         raise RuntimeError(f"request failed after retries: {method} {path}")
 
+    def _paged_values(self, path: str, page_size: int = 50) -> List[Dict[str, Any]]:
+        values: List[Dict[str, Any]] = []
+        separator = "&" if "?" in path else "?"
+        while True:
+            data = self._request("GET", f"{path}{separator}startAt={len(values)}&maxResults={page_size}") or {}
+            page = data.get("values", [])
+            values.extend(page)
+            if not page or data.get("isLast", True):
+                return values
+
     # Cloud endpoints
-    def list_projects_cloud(self) -> List[Dict[str, Any]]:
-        # returns all visible projects to provided principal
-        return self._request("GET", "/rest/api/3/project/search?maxResults=1000").get("values", [])
+    def list_projects_cloud(
+        self, page_size: int = 100, workers: int = 4, include_issue_counts: bool = False
+    ) -> List[Dict[str, Any]]:
+        # All projects visible to the principal. The first page reports `total`, so the other
+        # offsets are fetched in parallel; `expand=insight` adds insight.totalIssueCount at no
+        # extra request.
+        path = "/rest/api/3/project/search?orderBy=key" + ("&expand=insight" if include_issue_counts else "")
+
+        def page(start_at: int) -> Dict[str, Any]:
+            return self._request("GET", f"{path}&startAt={start_at}&maxResults={page_size}") or {}
+
+        first = page(0)
+        values: List[Dict[str, Any]] = list(first.get("values", []))
+        last = first
+        # Cloud caps maxResults on its own, so the step is the page size it actually returned.
+        step = len(values)
+        total = int(first.get("total") or 0)
+        if step and not first.get("isLast", True) and total > step:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="project-pages") as pool:
+                pages = list(pool.map(page, range(step, total, step)))
+            for data in pages:
+                values.extend(data.get("values", []))
+            last = pages[-1]
+        # Projects created while paging show up past `total`, and shift later pages by one.
+        while last.get("values") and not last.get("isLast", True):
+            last = page(len(values))
+            values.extend(last.get("values", []))
+        return list({project.get("id") or project.get("key"): project for project in values}.values())
 
     def get_project(self, project_key: str) -> Dict[str, Any]:
         return self._request("GET", f"/rest/api/3/project/{project_key}")
@@ -48,31 +201,131 @@ class JiraClient:
             "jql": jql,
             "startAt": start_at,
             "maxResults": max_results,
-            "fields": [
-                "summary",
-                "description",
-                "issuetype",
-                "priority",
-                "labels",
-                "project",
-            ],
+            "fields": list(SEARCH_FIELDS),
         }
         return self._request("POST", "/rest/api/3/search", json=payload)
 
-    def list_comments_cloud(self, issue_key: str) -> List[Dict[str, Any]]:
-        data = self._request("GET", f"/rest/api/3/issue/{issue_key}/comment")
-        return data.get("comments", [])
+    def search_issues_jql(
+        self,
+        jql: str,
+        next_page_token: Optional[str] = None,
+        max_results: int = 100,
+        include_comments: bool = False,
+        include_attachments: bool = False,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        # `fields` replaces the migration field list, e.g. for validation reads.
+        if fields is None:
+            fields = list(SEARCH_FIELDS) + (["comment"] if include_comments else [])
+            fields += ["attachment"] if include_attachments else []
+        payload: Dict[str, Any] = {"jql": jql, "maxResults": max_results, "fields": fields}
+        if next_page_token:
+            payload["nextPageToken"] = next_page_token
+        return self._request("POST", "/rest/api/3/search/jql", json=payload)
+
+    def count_issues_cloud(self, jql: str) -> int:
+        data = self._request("POST", "/rest/api/3/search/approximate-count", json={"jql": jql})
+        return int((data or {}).get("count", 0))
+
+    def list_comments_cloud(self, issue_key: str, page_size: int = 100) -> List[Dict[str, Any]]:
+        comments: List[Dict[str, Any]] = []
+        while True:
+            data = self._request(
+                "GET",
+                f"/rest/api/3/issue/{issue_key}/comment?startAt={len(comments)}&maxResults={page_size}",
+            )
+            page = data.get("comments", [])
+            comments.extend(page)
+            if not page or len(comments) >= data.get("total", 0):
+                return comments
+
+    def get_users_cloud(self, account_ids: List[str]) -> List[Dict[str, Any]]:
+        query = "&".join(f"accountId={quote(account_id)}" for account_id in account_ids)
+        return self._paged_values(f"/rest/api/3/user/bulk?{query}", page_size=max(1, len(account_ids)))
+
+    def open_attachment_cloud(self, attachment_id: str) -> requests.Response:
+        # Streamed: the caller reads iter_content() and must close the response.
+        return self._request("GET", f"/rest/api/3/attachment/content/{attachment_id}", raw=True, stream=True)
 
     # DC endpoints (compatible with v2)
     def get_project_dc(self, project_key: str) -> Dict[str, Any]:
         return self._request("GET", f"/rest/api/2/project/{project_key}")
 
+    def get_createmeta_issue_types_dc(self, project_key: str) -> List[Dict[str, Any]]:
+        return self._paged_values(f"/rest/api/2/issue/createmeta/{project_key}/issuetypes")
+
+    def get_createmeta_fields_dc(self, project_key: str, issue_type_id: str) -> List[Dict[str, Any]]:
+        return self._paged_values(f"/rest/api/2/issue/createmeta/{project_key}/issuetypes/{issue_type_id}")
+
+    def list_priorities_dc(self) -> List[Dict[str, Any]]:
+        return self._request("GET", "/rest/api/2/priority") or []
+
+    def list_resolutions_dc(self) -> List[Dict[str, Any]]:
+        return self._request("GET", "/rest/api/2/resolution") or []
+
+    def list_fields_dc(self) -> List[Dict[str, Any]]:
+        return self._request("GET", "/rest/api/2/field") or []
+
+    def find_users_dc(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+        # DC matches the username parameter against username, display name and email.
+        return self._request(
+            "GET", f"/rest/api/2/user/search?username={quote(query)}&maxResults={max_results}"
+        ) or []
+
+    def search_issues_dc(
+        self, jql: str, fields: List[str], start_at: int = 0, max_results: int = 100
+    ) -> Dict[str, Any]:
+        payload = {"jql": jql, "startAt": start_at, "maxResults": max_results, "fields": fields}
+        return self._request("POST", "/rest/api/2/search", json=payload) or {}
+
     def create_project_dc(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         return self._request("POST", "/rest/api/2/project", json=payload)
 
     def create_issue_dc(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         return self._request("POST", "/rest/api/2/issue", json=payload)
 
+    def create_issues_bulk_dc(self, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return self._request("POST", "/rest/api/2/issue/bulk", json={"issueUpdates": payloads}) or {}
+        except requests.HTTPError as exc:
+            # DC answers 400 when every element fails; the body still carries per-element errors.
+            response = exc.response
+            if response is not None and response.status_code == 400:
+                try:
+                    body = response.json()
+                except ValueError:
+                    raise exc
+                if isinstance(body, dict) and "errors" in body:
+                    return body
+            raise
+
+    def update_issue_dc(self, issue_key: str, payload: Dict[str, Any]) -> None:
+        self._request("PUT", f"/rest/api/2/issue/{issue_key}", json=payload)
+
+    def upload_attachment_dc(
+        self,
+        issue_key: str,
+        filename: str,
+        chunks: Iterable[bytes],
+        size: Optional[int] = None,
+        mime_type: str = "application/octet-stream",
+    ) -> List[Dict[str, Any]]:
+        body = MultipartFileBody(filename, chunks, size, mime_type)
+        headers = {"Content-Type": body.content_type, "X-Atlassian-Token": "no-check"}
+        # The body is consumed as it is sent, so a failed upload is retried by the caller
+        # (AttachmentCopier downloads the file again).
+        return self._request(
+            "POST", f"/rest/api/2/issue/{issue_key}/attachments", max_retries=0, data=body, headers=headers
+        ) or []
+
+    def create_issue_link_dc(self, link_type: str, inward_issue_key: str, outward_issue_key: str) -> None:
+        payload = {
+            "type": {"name": link_type},
+            "inwardIssue": {"key": inward_issue_key},
+            "outwardIssue": {"key": outward_issue_key},
+        }
+        self._request("POST", "/rest/api/2/issueLink", json=payload)
+
     def create_comment_dc(self, issue_key: str, body: str) -> Dict[str, Any]:
         return self._request("POST", f"/rest/api/2/issue/{issue_key}/comment", json={"body": body})
 
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from .migrator import Migrator
+from .models import JobStatus, MigrationRequest, MigrationResult
+from .progress import MigrationProgress
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class MigrationJob:
+    def __init__(self, request: MigrationRequest) -> None:
+        self.job_id = str(uuid.uuid4())
+        self.request = request
+        self.progress = MigrationProgress()
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.run_id: Optional[str] = None
+        self.result: Optional[MigrationResult] = None
+        self.error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_status(self, include_result: bool = True) -> JobStatus:
+        return JobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            run_id=self.run_id,
+            dry_run=self.request.dry_run,
+            source_project_keys=self.request.source_project_keys,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            progress=self.progress.snapshot(),
+            result=self.result if include_result else None,
+            error=self.error,
+        )
+
+
+class JobManager:
+    # Runs migrations on a private executor so request handlers (and /health) never wait on
+    # them. Jobs live in memory; their mappings and logs are in the MappingStore as usual.
+    def __init__(self, max_workers: int = 2, keep_finished: int = 100) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="migration-job")
+        self._jobs: Dict[str, MigrationJob] = {}
+        self._lock = threading.Lock()
+        self.keep_finished = keep_finished
+
+    def submit(self, request: MigrationRequest) -> MigrationJob:
+        job = MigrationJob(request)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda j: j.created_at)[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.job_id]
+
+    def _run(self, job: MigrationJob) -> None:
+        status = "cancelled"
+        try:
+            if not job.progress.cancelled:
+                job.status = "running"
+                job.started_at = time.time()
+                migrator = Migrator(job.request, progress=job.progress)
+                job.run_id = migrator.run_id
+                job.result = migrator.run()
+                status = "cancelled" if job.progress.cancelled else "succeeded"
+        except Exception as exc:
+            job.error = f"{type(exc).__name__}: {exc}"
+            status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.status = status
+            job.progress.finish()
+
+    def get(self, job_id: str) -> Optional[MigrationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[MigrationJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[MigrationJob]:
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.progress.cancel()
+        return job
+
+    async def stream(self, job: MigrationJob, heartbeat_s: float = 15.0) -> AsyncIterator[Optional[JobStatus]]:
+        # Yields a status on every progress change and None as a keep-alive when nothing changed
+        # for `heartbeat_s`; ends after the final status of a finished job. Waiting is awaited on
+        # the event loop, so an idle stream holds no worker thread.
+        version = -1
+        while True:
+            finished = job.finished
+            current = job.progress.version
+            if current != version or finished:
+                version = current
+                yield job.to_status(include_result=finished)
+                if finished:
+                    return
+            else:
+                yield None
+            await job.progress.wait_for_change_async(version, timeout=heartbeat_s)
+
+    def shutdown(self) -> None:
+        for job in self.list():
+            if not job.finished:
+                job.progress.cancel()
+        self._executor.shutdown(wait=False)
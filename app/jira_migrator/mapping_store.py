@@ -1,24 +1,79 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .metrics import STORE_ROWS, STORE_SECONDS
+
+# SQLite's default limit on bound parameters is 999 on older builds.
+_IN_CHUNK = 500
+_RUN_LOG_COLUMNS = {
+    "project_key": "TEXT",
+    "issue_key": "TEXT",
+    "phase": "TEXT",
+    "duration_s": "REAL",
+    "error_class": "TEXT",
+}
+_COMPACT_CHUNK = 10_000
+
+
+def _log_time(epoch_s: float) -> str:
+    # The CURRENT_TIMESTAMP format, with milliseconds.
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch_s)) + f".{int(epoch_s % 1 * 1000):03d}"
 
 
 class MappingStore:
-    def __init__(self, db_path: str) -> None:
+    # One long-lived WAL connection shared by all threads behind a lock. Writes join an open
+    # transaction that is committed every `flush_every` writes or `flush_interval_s` seconds,
+    # and always on flush()/close(); a mapping counts as durable once flush() has returned.
+    def __init__(
+        self,
+        db_path: str,
+        flush_every: int = 200,
+        flush_interval_s: float = 1.0,
+        synchronous: str = "NORMAL",
+        on_timing: Optional[Callable[[str, float], None]] = None,
+        log_batch_size: int = 500,
+    ) -> None:
         self.db_path = db_path
+        self.log_batch_size = log_batch_size
+        # Called with ("write" | "commit", seconds) after each statement batch or commit.
+        self.on_timing = on_timing
+        self.flush_every = flush_every
+        self.flush_interval_s = flush_interval_s
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._first_pending_at = 0.0
+        # One daemon thread per store commits an idle open transaction (or buffered log events)
+        # once its deadline passes, even if no further write arrives.
+        self._flush_cond = threading.Condition()
+        self._flush_deadline: Optional[float] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        # Run log events wait here, under their own lock, until the next flush writes them.
+        self._log_lock = threading.Lock()
+        self._log_buffer: List[Tuple[Any, ...]] = []
+        self._conn = self._connect(synchronous)
         self._init_db()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self, synchronous: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
         conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA busy_timeout=30000")
         return conn
 
     def _init_db(self) -> None:
-        with self._connect() as conn:
-            conn.executescript(
+        with self._lock:
+            self._conn.executescript(
                 """
                 CREATE TABLE IF NOT EXISTS project_map (
                     cloud_project_key TEXT PRIMARY KEY,
@@ -30,11 +85,81 @@ class MappingStore:
                     dc_issue_key TEXT NOT NULL
                 );
 
+                CREATE INDEX IF NOT EXISTS idx_issue_map_dc ON issue_map(dc_issue_key);
+
+                -- Creates sent to DC whose mapping is not written yet. dc_issue_key is set once a
+                -- recovery pass found the issue in DC, until its comments and attachments follow.
+                CREATE TABLE IF NOT EXISTS inflight_issue (
+                    cloud_issue_key TEXT PRIMARY KEY,
+                    project_key TEXT NOT NULL,
+                    dc_project_key TEXT NOT NULL,
+                    dc_issue_key TEXT,
+                    started_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_inflight_issue_project ON inflight_issue(project_key);
+
                 CREATE TABLE IF NOT EXISTS field_map (
                     cloud_field_id TEXT PRIMARY KEY,
                     dc_field_id TEXT NOT NULL
                 );
 
+                CREATE TABLE IF NOT EXISTS checkpoint (
+                    project_key TEXT NOT NULL,
+                    run_id TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    created TEXT NOT NULL,
+                    issue_id TEXT NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (project_key, run_id, scope)
+                );
+
+                CREATE TABLE IF NOT EXISTS sync_watermark (
+                    project_key TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    watermark TEXT,
+                    pending TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (project_key, scope)
+                );
+
+                CREATE TABLE IF NOT EXISTS comment_map (
+                    cloud_comment_id TEXT PRIMARY KEY,
+                    cloud_issue_key TEXT NOT NULL,
+                    dc_comment_id TEXT NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_comment_map_issue ON comment_map(cloud_issue_key);
+
+                CREATE TABLE IF NOT EXISTS attachment_map (
+                    cloud_attachment_id TEXT PRIMARY KEY,
+                    cloud_issue_key TEXT NOT NULL,
+                    dc_issue_key TEXT NOT NULL,
+                    dc_attachment_id TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_attachment_map_issue ON attachment_map(cloud_issue_key);
+                CREATE INDEX IF NOT EXISTS idx_attachment_map_content ON attachment_map(dc_issue_key, size, sha256);
+
+                CREATE TABLE IF NOT EXISTS link_map (
+                    cloud_link_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    source_cloud_key TEXT NOT NULL,
+                    target_cloud_key TEXT NOT NULL,
+                    link_type TEXT,
+                    done INTEGER NOT NULL DEFAULT 0
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_link_map_pending ON link_map(done, cloud_link_id);
+
+                CREATE TABLE IF NOT EXISTS user_map (
+                    cloud_account_id TEXT PRIMARY KEY,
+                    dc_username TEXT,
+                    resolved_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+
                 CREATE TABLE IF NOT EXISTS run_log (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     run_id TEXT NOT NULL,
@@ -44,55 +169,536 @@ class MappingStore:
                 );
                 """
             )
+            self._upgrade_run_log()
 
-    def set_project_map(self, cloud_project_key: str, dc_project_key: str) -> None:
-        with self._connect() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO project_map(cloud_project_key, dc_project_key) VALUES(?, ?)",
-                (cloud_project_key, dc_project_key),
+    def _upgrade_run_log(self) -> None:
+        # Databases from before structured events get the new columns, and their runs are
+        # summarized into run_index once.
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(run_log)")}
+        for name, kind in _RUN_LOG_COLUMNS.items():
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE run_log ADD COLUMN {name} {kind}")
+        has_index = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'run_index'"
+        ).fetchone()
+        self._conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_run_log_run ON run_log(run_id, id);
+            CREATE INDEX IF NOT EXISTS idx_run_log_run_project ON run_log(run_id, project_key, id);
+
+            CREATE TABLE IF NOT EXISTS run_index (
+                run_id TEXT PRIMARY KEY,
+                started_at TEXT NOT NULL,
+                last_event_at TEXT NOT NULL,
+                events INTEGER NOT NULL,
+                errors INTEGER NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_run_index_last_event ON run_index(last_event_at);
+            """
+        )
+        if not has_index:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO run_index "
+                "SELECT run_id, MIN(created_at), MAX(created_at), COUNT(*), SUM(level = 'error') "
+                "FROM run_log GROUP BY run_id"
             )
 
+    def _timed(self, op: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        STORE_SECONDS.observe(elapsed, op=op)
+        if self.on_timing is not None:
+            self.on_timing(op, elapsed)
+
+    def _write(self, sql: str, params: Sequence[Any] = ()) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self._begin()
+            self._conn.execute(sql, params)
+            self._timed("write", started)
+            self._wrote(1)
+        STORE_ROWS.inc()
+
+    def _write_many(self, sql: str, rows: List[Sequence[Any]]) -> None:
+        if not rows:
+            return
+        started = time.perf_counter()
+        with self._lock:
+            self._begin()
+            self._conn.executemany(sql, rows)
+            self._timed("write", started)
+            self._wrote(len(rows))
+        STORE_ROWS.inc(len(rows))
+
+    def _read_one(self, sql: str, params: Sequence[Any]) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _begin(self) -> None:
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+            self._first_pending_at = time.monotonic()
+            # An idle open transaction would block writers in other processes.
+            self._arm_flush()
+
+    def _arm_flush(self) -> None:
+        with self._flush_cond:
+            if self._flush_deadline is None:
+                self._flush_deadline = time.monotonic() + self.flush_interval_s
+                self._flush_cond.notify()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="mapping-store-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._flush_cond:
+                while not self._closed:
+                    if self._flush_deadline is None:
+                        self._flush_cond.wait()
+                        continue
+                    remaining = self._flush_deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._flush_cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _wrote(self, count: int) -> None:
+        self._pending += count
+        if self._pending >= self.flush_every or time.monotonic() - self._first_pending_at >= self.flush_interval_s:
+            self.flush()
+
+    def _write_log_buffer(self) -> None:
+        # Called with self._lock held; the events join the open transaction.
+        with self._log_lock:
+            rows, self._log_buffer = self._log_buffer, []
+        if not rows:
+            return
+        started = time.perf_counter()
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT INTO run_log(run_id, level, message, project_key, issue_key, phase, duration_s, error_class, "
+            "created_at) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        runs: Dict[str, List[Any]] = {}
+        for row in rows:
+            summary = runs.setdefault(row[0], [row[8], row[8], 0, 0])
+            summary[1] = row[8]
+            summary[2] += 1
+            summary[3] += row[1] == "error"
+        self._conn.executemany(
+            "INSERT INTO run_index(run_id, started_at, last_event_at, events, errors) VALUES(?, ?, ?, ?, ?) "
+            "ON CONFLICT(run_id) DO UPDATE SET last_event_at = excluded.last_event_at, "
+            "events = events + excluded.events, errors = errors + excluded.errors",
+            [(run_id, *summary) for run_id, summary in runs.items()],
+        )
+        self._timed("write", started)
+        STORE_ROWS.inc(len(rows))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            with self._flush_cond:
+                self._flush_deadline = None
+            self._write_log_buffer()
+            if self._conn.in_transaction:
+                started = time.perf_counter()
+                self._conn.execute("COMMIT")
+                self._timed("commit", started)
+            self._pending = 0
+
+    @contextmanager
+    def batch(self) -> Iterator["MappingStore"]:
+        try:
+            yield self
+        finally:
+            self.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            with self._flush_cond:
+                self._closed = True
+                self._flush_cond.notify()
+            self._conn.close()
+
+    def __enter__(self) -> "MappingStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def set_project_map(self, cloud_project_key: str, dc_project_key: str) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO project_map(cloud_project_key, dc_project_key) VALUES(?, ?)",
+            (cloud_project_key, dc_project_key),
+        )
+
     def get_project_map(self, cloud_project_key: str) -> Optional[str]:
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT dc_project_key FROM project_map WHERE cloud_project_key = ?",
-                (cloud_project_key,),
-            ).fetchone()
-            return row["dc_project_key"] if row else None
+        row = self._read_one(
+            "SELECT dc_project_key FROM project_map WHERE cloud_project_key = ?",
+            (cloud_project_key,),
+        )
+        return row["dc_project_key"] if row else None
 
     def set_issue_map(self, cloud_issue_key: str, dc_issue_key: str) -> None:
-        with self._connect() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO issue_map(cloud_issue_key, dc_issue_key) VALUES(?, ?)",
-                (cloud_issue_key, dc_issue_key),
+        self.set_issue_maps([(cloud_issue_key, dc_issue_key)])
+
+    def set_issue_maps(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        # The mapping and the end of the in-flight entry share one transaction.
+        rows = list(pairs)
+        with self._lock:
+            self._write_many("INSERT OR REPLACE INTO issue_map(cloud_issue_key, dc_issue_key) VALUES(?, ?)", rows)
+            self.end_inflight(cloud_issue_key for cloud_issue_key, _ in rows)
+
+    def begin_inflight(self, project_key: str, dc_project_key: str, cloud_issue_keys: Iterable[str]) -> None:
+        # Committed before the create is sent: a crash after DC has the issue but before its
+        # mapping is written leaves the entry behind for recover_inflight to check.
+        self._write_many(
+            "INSERT OR REPLACE INTO inflight_issue(cloud_issue_key, project_key, dc_project_key) VALUES(?, ?, ?)",
+            [(cloud_issue_key, project_key, dc_project_key) for cloud_issue_key in cloud_issue_keys],
+        )
+        self.flush()
+
+    def end_inflight(self, cloud_issue_keys: Iterable[str]) -> None:
+        self._write_many(
+            "DELETE FROM inflight_issue WHERE cloud_issue_key = ?", [(key,) for key in cloud_issue_keys]
+        )
+
+    def get_inflight(self, project_key: str) -> List[Tuple[str, str, Optional[str]]]:
+        # -> (cloud key, DC project key, DC issue key once recovered)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cloud_issue_key, dc_project_key, dc_issue_key FROM inflight_issue WHERE project_key = ?",
+                (project_key,),
+            ).fetchall()
+        return [(row["cloud_issue_key"], row["dc_project_key"], row["dc_issue_key"]) for row in rows]
+
+    def resolve_inflight(self, found: Dict[str, str], missing: Iterable[str]) -> None:
+        # Issues found in DC get their mapping and stay journaled until their follow-up work is
+        # done; issues DC never created are dropped and get created by the scan as usual.
+        with self._lock:
+            self._write_many(
+                "INSERT OR REPLACE INTO issue_map(cloud_issue_key, dc_issue_key) VALUES(?, ?)", list(found.items())
             )
+            self._write_many(
+                "UPDATE inflight_issue SET dc_issue_key = ? WHERE cloud_issue_key = ?",
+                [(dc_issue_key, cloud_issue_key) for cloud_issue_key, dc_issue_key in found.items()],
+            )
+            self.end_inflight(missing)
+            self.flush()
 
     def get_issue_map(self, cloud_issue_key: str) -> Optional[str]:
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT dc_issue_key FROM issue_map WHERE cloud_issue_key = ?",
-                (cloud_issue_key,),
-            ).fetchone()
-            return row["dc_issue_key"] if row else None
+        row = self._read_one(
+            "SELECT dc_issue_key FROM issue_map WHERE cloud_issue_key = ?",
+            (cloud_issue_key,),
+        )
+        return row["dc_issue_key"] if row else None
+
+    def get_issue_maps(self, cloud_issue_keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(dict.fromkeys(cloud_issue_keys))
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(keys), _IN_CHUNK):
+                chunk = keys[start : start + _IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT cloud_issue_key, dc_issue_key FROM issue_map WHERE cloud_issue_key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update((row["cloud_issue_key"], row["dc_issue_key"]) for row in rows)
+        return found
+
+    def get_cloud_keys(self, dc_issue_keys: Iterable[str]) -> Dict[str, str]:
+        # Reverse of get_issue_maps: DC key -> Cloud key.
+        keys = list(dict.fromkeys(dc_issue_keys))
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(keys), _IN_CHUNK):
+                chunk = keys[start : start + _IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT cloud_issue_key, dc_issue_key FROM issue_map WHERE dc_issue_key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update((row["dc_issue_key"], row["cloud_issue_key"]) for row in rows)
+        return found
+
+    def iter_issue_keys(self, cloud_project_key: str, page_size: int = 10_000) -> Iterator[str]:
+        # Range scan on the primary key ("." sorts right after "-"), a page at a time by keyset, so
+        # a large project is never held in memory and no cursor stays open across other writes.
+        after, end = f"{cloud_project_key}-", f"{cloud_project_key}."
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT cloud_issue_key FROM issue_map WHERE cloud_issue_key > ? AND cloud_issue_key < ? "
+                    "ORDER BY cloud_issue_key LIMIT ?",
+                    (after, end, page_size),
+                ).fetchall()
+            for row in rows:
+                yield row["cloud_issue_key"]
+            if len(rows) < page_size:
+                return
+            after = rows[-1]["cloud_issue_key"]
+
+    def set_checkpoint(self, project_key: str, run_id: str, scope: str, created: str, issue_key: str) -> None:
+        # The issue_id column holds the issue key; rows from older versions hold the numeric id.
+        self._write(
+            "INSERT OR REPLACE INTO checkpoint(project_key, run_id, scope, created, issue_id, updated_at) "
+            "VALUES(?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            (project_key, run_id, scope, created, issue_key),
+        )
+
+    def get_checkpoint(self, project_key: str, scope: str) -> Optional[Tuple[str, str]]:
+        row = self._read_one(
+            "SELECT created, issue_id FROM checkpoint WHERE project_key = ? AND scope = ? "
+            "ORDER BY updated_at DESC, rowid DESC LIMIT 1",
+            (project_key, scope),
+        )
+        return (row["created"], row["issue_id"]) if row else None
+
+    def get_sync_watermark(self, project_key: str, scope: str) -> Optional[str]:
+        row = self._read_one(
+            "SELECT watermark FROM sync_watermark WHERE project_key = ? AND scope = ?",
+            (project_key, scope),
+        )
+        return row["watermark"] if row else None
+
+    def start_sync_pass(self, project_key: str, scope: str, started_at: str, fresh: bool) -> None:
+        # A fresh full pass records when it started; a resumed pass keeps the start of the pass it
+        # continues, because issues it does not rescan were read back then.
+        self._write(
+            "INSERT INTO sync_watermark(project_key, scope, pending) VALUES(?, ?, ?) "
+            "ON CONFLICT(project_key, scope) DO UPDATE SET "
+            "pending = CASE WHEN ? OR pending IS NULL THEN excluded.pending ELSE pending END, "
+            "updated_at = CURRENT_TIMESTAMP",
+            (project_key, scope, started_at, int(fresh)),
+        )
+
+    def complete_sync_pass(self, project_key: str, scope: str, watermark: Optional[str] = None) -> None:
+        self._write(
+            "UPDATE sync_watermark SET watermark = COALESCE(?, pending, watermark), pending = NULL, "
+            "updated_at = CURRENT_TIMESTAMP WHERE project_key = ? AND scope = ?",
+            (watermark, project_key, scope),
+        )
+
+    def get_comment_ids(self, cloud_issue_key: str) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cloud_comment_id FROM comment_map WHERE cloud_issue_key = ?", (cloud_issue_key,)
+            ).fetchall()
+        return {row["cloud_comment_id"] for row in rows}
+
+    def set_comment_maps(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        self._write_many(
+            "INSERT OR REPLACE INTO comment_map(cloud_comment_id, cloud_issue_key, dc_comment_id) VALUES(?, ?, ?)",
+            list(rows),
+        )
+
+    def get_attachment_ids(self, cloud_issue_key: str) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cloud_attachment_id FROM attachment_map WHERE cloud_issue_key = ?", (cloud_issue_key,)
+            ).fetchall()
+        return {row["cloud_attachment_id"] for row in rows}
+
+    def has_attachment_size(self, dc_issue_key: str, size: int) -> bool:
+        row = self._read_one(
+            "SELECT 1 FROM attachment_map WHERE dc_issue_key = ? AND size = ? LIMIT 1",
+            (dc_issue_key, size),
+        )
+        return row is not None
+
+    def find_attachment(self, dc_issue_key: str, sha256: str, size: int) -> Optional[str]:
+        row = self._read_one(
+            "SELECT dc_attachment_id FROM attachment_map WHERE dc_issue_key = ? AND size = ? AND sha256 = ? LIMIT 1",
+            (dc_issue_key, size, sha256),
+        )
+        return row["dc_attachment_id"] if row else None
+
+    def set_attachment_map(
+        self,
+        cloud_attachment_id: str,
+        cloud_issue_key: str,
+        dc_issue_key: str,
+        dc_attachment_id: str,
+        sha256: str,
+        size: int,
+    ) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO attachment_map"
+            "(cloud_attachment_id, cloud_issue_key, dc_issue_key, dc_attachment_id, sha256, size) "
+            "VALUES(?, ?, ?, ?, ?, ?)",
+            (cloud_attachment_id, cloud_issue_key, dc_issue_key, dc_attachment_id, sha256, size),
+        )
+
+    def add_pending_links(self, rows: Iterable[Tuple[str, str, str, str, Optional[str]]]) -> None:
+        # (cloud_link_id, kind, source_cloud_key, target_cloud_key, link_type); links already
+        # recorded, applied or not, are left as they are.
+        self._write_many(
+            "INSERT OR IGNORE INTO link_map(cloud_link_id, kind, source_cloud_key, target_cloud_key, link_type) "
+            "VALUES(?, ?, ?, ?, ?)",
+            list(rows),
+        )
+
+    def iter_resolvable_links(self, page_size: int = 1000) -> Iterator[List[sqlite3.Row]]:
+        # Pending links whose two ends are both in issue_map, resolved with one join per page.
+        after = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT l.cloud_link_id, l.kind, l.link_type, l.source_cloud_key, "
+                    "s.dc_issue_key AS dc_source_key, t.dc_issue_key AS dc_target_key "
+                    "FROM link_map l "
+                    "JOIN issue_map s ON s.cloud_issue_key = l.source_cloud_key "
+                    "JOIN issue_map t ON t.cloud_issue_key = l.target_cloud_key "
+                    "WHERE l.done = 0 AND l.cloud_link_id > ? ORDER BY l.cloud_link_id LIMIT ?",
+                    (after, page_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            after = rows[-1]["cloud_link_id"]
+
+    def mark_links_done(self, cloud_link_ids: Iterable[str]) -> None:
+        self._write_many("UPDATE link_map SET done = 1 WHERE cloud_link_id = ?", [(i,) for i in cloud_link_ids])
+
+    def count_pending_links(self) -> int:
+        row = self._read_one("SELECT COUNT(*) AS pending FROM link_map WHERE done = 0", ())
+        return int(row["pending"]) if row else 0
+
+    def get_user_maps(self, account_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        # A NULL username is a cached negative: the account could not be mapped to a DC user.
+        ids = list(dict.fromkeys(account_ids))
+        found: Dict[str, Optional[str]] = {}
+        with self._lock:
+            for start in range(0, len(ids), _IN_CHUNK):
+                chunk = ids[start : start + _IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT cloud_account_id, dc_username FROM user_map WHERE cloud_account_id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update((row["cloud_account_id"], row["dc_username"]) for row in rows)
+        return found
+
+    def set_user_maps(self, rows: Iterable[Tuple[str, Optional[str]]]) -> None:
+        self._write_many(
+            "INSERT OR REPLACE INTO user_map(cloud_account_id, dc_username, resolved_at) "
+            "VALUES(?, ?, CURRENT_TIMESTAMP)",
+            list(rows),
+        )
 
     def set_field_map(self, cloud_field_id: str, dc_field_id: str) -> None:
-        with self._connect() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO field_map(cloud_field_id, dc_field_id) VALUES(?, ?)",
-                (cloud_field_id, dc_field_id),
-            )
+        self._write(
+            "INSERT OR REPLACE INTO field_map(cloud_field_id, dc_field_id) VALUES(?, ?)",
+            (cloud_field_id, dc_field_id),
+        )
 
     def get_field_map(self, cloud_field_id: str) -> Optional[str]:
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT dc_field_id FROM field_map WHERE cloud_field_id = ?",
-                (cloud_field_id,),
-            ).fetchone()
-            return row["dc_field_id"] if row else None
-
-    def log(self, run_id: str, level: str, message: str) -> None:
-        with self._connect() as conn:
-            conn.execute(
-                "INSERT INTO run_log(run_id, level, message) VALUES(?, ?, ?)",
-                (run_id, level, message),
-            )
+        row = self._read_one(
+            "SELECT dc_field_id FROM field_map WHERE cloud_field_id = ?",
+            (cloud_field_id,),
+        )
+        return row["dc_field_id"] if row else None
+
+    def get_field_maps(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT cloud_field_id, dc_field_id FROM field_map").fetchall()
+        return {row["cloud_field_id"]: row["dc_field_id"] for row in rows}
+
+    def log(
+        self,
+        run_id: str,
+        level: str,
+        message: str,
+        project_key: Optional[str] = None,
+        issue_key: Optional[str] = None,
+        phase: Optional[str] = None,
+        duration_s: Optional[float] = None,
+        error_class: Optional[str] = None,
+    ) -> None:
+        # Only a list append on the caller's thread; the events are written in one batch with
+        # the next flush, which a full buffer or the flush thread brings forward.
+        row = (run_id, level, message, project_key, issue_key, phase, duration_s, error_class, _log_time(time.time()))
+        with self._log_lock:
+            self._log_buffer.append(row)
+            pending = len(self._log_buffer)
+        if pending >= self.log_batch_size:
+            self.flush()
+        elif pending == 1:
+            self._arm_flush()
+
+    def compact_run_log(self, max_age_days: float) -> int:
+        # Drops the events of runs idle for longer than max_age_days, in chunks so writers from
+        # a running migration get the lock in between. Returns the number of events deleted.
+        self.flush()
+        cutoff = _log_time(time.time() - max_age_days * 86400)
+        with self._lock:
+            runs = [
+                row["run_id"]
+                for row in self._conn.execute("SELECT run_id FROM run_index WHERE last_event_at < ?", (cutoff,))
+            ]
+        deleted = 0
+        for run_id in runs:
+            while True:
+                with self._lock:
+                    self.flush()
+                    self._conn.execute("BEGIN")
+                    count = self._conn.execute(
+                        "DELETE FROM run_log WHERE id IN (SELECT id FROM run_log WHERE run_id = ? LIMIT ?)",
+                        (run_id, _COMPACT_CHUNK),
+                    ).rowcount
+                    if count < _COMPACT_CHUNK:
+                        self._conn.execute("DELETE FROM run_index WHERE run_id = ?", (run_id,))
+                    self._conn.execute("COMMIT")
+                deleted += count
+                if count < _COMPACT_CHUNK:
+                    break
+        return deleted
+
+
+class RunLogReader:
+    # Read-only connection for browsing run logs. In WAL mode readers never block the writer, so
+    # a migration keeps writing while its log is read.
+    def __init__(self, db_path: str) -> None:
+        self._conn = sqlite3.connect(f"file:{Path(db_path).resolve()}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA query_only=ON")
+
+    def run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM run_index WHERE run_id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def events(
+        self,
+        run_id: str,
+        after_id: int = 0,
+        limit: int = 100,
+        level: Optional[str] = None,
+        project_key: Optional[str] = None,
+        issue_key: Optional[str] = None,
+        phase: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        # Keyset pagination on id: each page is an index range scan, however deep it is.
+        clauses = ["run_id = ?", "id > ?"]
+        params: List[Any] = [run_id, after_id]
+        filters = (("level", level), ("project_key", project_key), ("issue_key", issue_key), ("phase", phase))
+        for column, value in filters:
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        rows = self._conn.execute(
+            "SELECT id, level, message, project_key, issue_key, phase, duration_s, error_class, created_at "
+            f"FROM run_log WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+            [*params, limit],
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        self._conn.close()
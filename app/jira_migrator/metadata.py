@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .jira_client import JiraClient
+from .mapping_store import MappingStore
+
+# Fields the migrator always sends or DC fills in itself; they never need to be on a screen check.
+# Labels carry the migrated-from-KEY stamp that recovery searches for, so they are never dropped:
+# a screen without them fails the create at DC instead of losing the stamp.
+_ALWAYS_ALLOWED = {"project", "issuetype", "summary", "parent", "labels"}
+
+_UNAVAILABLE = object()
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+class DCMetadataCache:
+    # Loads DC create metadata once per project (and issue type), and priorities, resolutions and
+    # fields once per run, and validates payloads locally, so an issue with an unknown type or a
+    # missing required field fails without a round-trip. Entries expire after `ttl_s`;
+    # invalidate() drops them early, e.g. after DC rejected a payload the cache thought was valid.
+    # If metadata cannot be loaded (old DC, project not created yet in a dry run) payloads pass
+    # through unchanged and DC stays the judge; a transient failure is retried on the next lookup.
+    def __init__(
+        self,
+        dc: JiraClient,
+        store: MappingStore,
+        ttl_s: float = 600.0,
+        default_issue_type: Optional[str] = "Task",
+        default_priority: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.dc = dc
+        self.store = store
+        self.ttl_s = ttl_s
+        self.default_issue_type = default_issue_type
+        self.default_priority = default_priority
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, ...], Tuple[float, Any]] = {}
+        self._loading: Dict[Tuple[str, ...], threading.Event] = {}
+        # The field_map table, read once; its lookups are not DC metadata and not counted.
+        self._field_map: Optional[Dict[str, str]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Tuple[str, ...], load: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._clock() - entry[0] < self.ttl_s:
+                    self.hits += 1
+                    return entry[1]
+                pending = self._loading.get(key)
+                if pending is None:
+                    # This thread loads; concurrent callers wait for it instead of all missing.
+                    self.misses += 1
+                    pending = self._loading[key] = threading.Event()
+                    break
+            pending.wait()
+        cached = True
+        try:
+            value = load()
+        except Exception as exc:
+            # A 404 is an answer (old DC without the endpoint, or no such project) and is cached
+            # like one; any other failure is retried by the next lookup.
+            value = _UNAVAILABLE
+            cached = getattr(getattr(exc, "response", None), "status_code", None) == 404
+        with self._lock:
+            if cached:
+                self._entries[key] = (self._clock(), value)
+            del self._loading[key]
+        pending.set()
+        return value
+
+    def invalidate(self, project_key: Optional[str] = None) -> None:
+        with self._lock:
+            if project_key is None:
+                self._entries.clear()
+                self._field_map = None
+            else:
+                for key in [key for key in self._entries if len(key) > 1 and key[1] == project_key]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def issue_types(self, project_key: str) -> Any:
+        def load() -> Dict[str, Dict[str, Any]]:
+            return {t["name"].lower(): t for t in self.dc.get_createmeta_issue_types_dc(project_key) if t.get("name")}
+
+        return self._get(("issuetypes", project_key), load)
+
+    def create_fields(self, project_key: str, issue_type_id: str) -> Any:
+        def load() -> Dict[str, Dict[str, Any]]:
+            fields = self.dc.get_createmeta_fields_dc(project_key, issue_type_id)
+            return {f.get("fieldId") or f.get("key"): f for f in fields}
+
+        return self._get(("fields", project_key, issue_type_id), load)
+
+    def priorities(self) -> Any:
+        return self._get(("priorities",), lambda: {p["name"].lower(): p for p in self.dc.list_priorities_dc()})
+
+    def resolutions(self) -> Any:
+        return self._get(("resolutions",), lambda: {r["name"].lower(): r for r in self.dc.list_resolutions_dc()})
+
+    def fields(self) -> Any:
+        return self._get(("dc_fields",), lambda: {f["id"]: f for f in self.dc.list_fields_dc() if f.get("id")})
+
+    def custom_field_id(self, name: str) -> Optional[str]:
+        fields = self.fields()
+        if fields is _UNAVAILABLE:
+            return None
+        for field_id, field in fields.items():
+            if field.get("custom") and field.get("name", "").lower() == name.lower():
+                return field_id
+        return None
+
+    def dc_field_id(self, cloud_field_id: str) -> Optional[str]:
+        # field_map entries such as ("customfield_10010", "customfield_20020") move a custom field
+        # between instances; None if the field does not exist in DC.
+        field_id = self._field_mapping().get(cloud_field_id, cloud_field_id)
+        fields = self.fields()
+        return field_id if fields is _UNAVAILABLE or field_id in fields else None
+
+    def _field_mapping(self) -> Dict[str, str]:
+        with self._lock:
+            if self._field_map is None:
+                self._field_map = self.store.get_field_maps()
+            return self._field_map
+
+    def _mapped_name(self, kind: str, name: str) -> str:
+        # field_map entries such as ("issuetype:Story", "Task") rename values between instances.
+        return self._field_mapping().get(f"{kind}:{name}", name)
+
+    def _issue_type(self, project_key: str, name: str, subtask: bool) -> Optional[Dict[str, Any]]:
+        types = self.issue_types(project_key)
+        if types is _UNAVAILABLE:
+            return {"name": name}
+        for candidate in (self._mapped_name("issuetype", name), name):
+            issue_type = types.get(candidate.lower())
+            if issue_type is not None and bool(issue_type.get("subtask")) == subtask:
+                return issue_type
+        if subtask:
+            return next((t for t in types.values() if t.get("subtask")), None)
+        if self.default_issue_type:
+            fallback = types.get(self.default_issue_type.lower())
+            if fallback is not None and not fallback.get("subtask"):
+                return fallback
+        return None
+
+    def translate(
+        self, project_key: str, payload: Dict[str, Any], dropped: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        # Every field removed from the payload is appended to `dropped`, with the reason.
+        dropped = [] if dropped is None else dropped
+        fields = dict(payload["fields"])
+        requested = (fields.get("issuetype") or {}).get("name", "")
+        issue_type = self._issue_type(project_key, requested, subtask="parent" in fields)
+        if issue_type is None:
+            raise InvalidPayload(f"issue type {requested!r} does not exist in {project_key} and has no default")
+        fields["issuetype"] = {"id": issue_type["id"]} if issue_type.get("id") else {"name": issue_type["name"]}
+
+        for kind, default in (("priority", self.default_priority), ("resolution", None)):
+            if kind in fields:
+                name = (fields[kind] or {}).get("name", "")
+                value = self._named_value(kind, name, default)
+                if value is None:
+                    del fields[kind]
+                    dropped.append(f"{kind} {name!r} (not in DC)")
+                else:
+                    fields[kind] = value
+
+        for cloud_field_id in [name for name in fields if name.startswith("customfield_")]:
+            value = fields.pop(cloud_field_id)
+            field_id = self.dc_field_id(cloud_field_id)
+            if field_id is None:
+                dropped.append(f"{cloud_field_id} (no such DC field)")
+            else:
+                fields[field_id] = value
+
+        screen = self.create_fields(project_key, issue_type["id"]) if issue_type.get("id") else _UNAVAILABLE
+        if screen is not _UNAVAILABLE:
+            # DC rejects a create that sets a field missing from the create screen.
+            for name in [name for name in fields if name not in screen and name not in _ALWAYS_ALLOWED]:
+                del fields[name]
+                dropped.append(f"{name} (not on the create screen)")
+            missing = [
+                field.get("name") or field_id
+                for field_id, field in screen.items()
+                if field.get("required") and not field.get("hasDefaultValue") and field_id not in fields
+            ]
+            if missing:
+                raise InvalidPayload(f"required field(s) missing for {issue_type.get('name')}: {', '.join(missing)}")
+        return {**payload, "fields": fields}
+
+    def _named_value(self, kind: str, name: str, default: Optional[str]) -> Optional[Dict[str, str]]:
+        values = self.priorities() if kind == "priority" else self.resolutions()
+        if values is _UNAVAILABLE:
+            return {"name": name}
+        for candidate in (self._mapped_name(kind, name), name, default):
+            if candidate and candidate.lower() in values:
+                return {"name": values[candidate.lower()]["name"]}
+        return None
+
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Path segments after these are ids or keys; everything else is part of the endpoint name.
+_KEYED_SEGMENTS = {"issue", "project", "comment", "attachment", "content", "user", "field", "createmeta", "issuetypes"}
+_LITERAL_SEGMENTS = {"bulk", "search", "createmeta", "properties", "content"}
+
+
+def endpoint_template(path: str) -> str:
+    # "/rest/api/3/issue/SRC-12/comment?startAt=0" -> "/rest/api/3/issue/{key}/comment", so label
+    # cardinality stays bounded by the number of endpoints rather than issues.
+    segments = path.split("?", 1)[0].split("/")
+    for index in range(1, len(segments)):
+        if segments[index - 1] in _KEYED_SEGMENTS and segments[index] not in _LITERAL_SEGMENTS and segments[index]:
+            segments[index] = "{key}"
+    return "/".join(segments)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(key)} {value:g}" for key, value in values)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # per label set: [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            series[0][index] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return int(series[1][1]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), list(totals))) for key, (counts, totals) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, (total, count)) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {int(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            metric = self._metrics.setdefault(name, Counter(name, help_text))
+        assert isinstance(metric, Counter)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            metric = self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram("jira_request_seconds", "Jira HTTP request latency by endpoint")
+REQUESTS_TOTAL = REGISTRY.counter("jira_requests_total", "Jira HTTP responses by endpoint and status")
+REQUEST_RETRIES = REGISTRY.counter("jira_request_retries_total", "Jira requests retried after 429/5xx")
+REQUEST_THROTTLED = REGISTRY.counter("jira_request_throttled_total", "Jira 429 responses")
+BYTES_SENT = REGISTRY.counter("jira_request_bytes_sent_total", "Request body bytes sent to Jira")
+BYTES_RECEIVED = REGISTRY.counter("jira_request_bytes_received_total", "Response body bytes received from Jira")
+STORE_SECONDS = REGISTRY.histogram(
+    "mapping_store_operation_seconds",
+    "SQLite mapping store write and commit latency",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+STORE_ROWS = REGISTRY.counter("mapping_store_rows_written_total", "Rows written to the mapping store")
+PHASE_SECONDS = REGISTRY.counter("migration_phase_seconds_total", "Time spent per migration phase")
+
+
+class PhaseTimer:
+    # Accumulates wall time per phase for one project. Phases overlap across worker threads, so
+    # the totals are thread-seconds and can add up to more than the project's elapsed time.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self._totals[phase] = self._totals.get(phase, 0.0) + seconds
+        PHASE_SECONDS.inc(seconds, phase=phase)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        iterator = iter(items)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.add(name, time.perf_counter() - started)
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {f"{phase}_s": round(seconds, 3) for phase, seconds in sorted(self._totals.items())}
+
+
+def observe_request(
+    host: str, method: str, path: str, status: Optional[int], seconds: float, sent: int, received: int
+) -> None:
+    endpoint = endpoint_template(path)
+    REQUEST_SECONDS.observe(seconds, host=host, method=method, endpoint=endpoint)
+    REQUESTS_TOTAL.inc(host=host, method=method, endpoint=endpoint, status=str(status or "error"))
+    if sent:
+        BYTES_SENT.inc(sent, host=host)
+    if received:
+        BYTES_RECEIVED.inc(received, host=host)
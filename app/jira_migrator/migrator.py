@@ -1,30 +1,168 @@
 from __future__ import annotations
 
+import multiprocessing
 import re
+import threading
+import time
 import uuid
-from typing import Any, Dict, List
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta, timezone
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 
+from .adf import adf_to_wiki
+from .attachments import AttachmentCopier, AttachmentOutcome
+from .checkpoint import (
+    RESUME_MARGIN,
+    CheckpointTracker,
+    IssuePosition,
+    issue_position,
+    make_position,
+    parse_jira_datetime,
+    resume_jql_clause,
+)
+from .discovery import fetch_projects
 from .jira_client import JiraAuth, JiraClient, safe_get
 from .mapping_store import MappingStore
+from .metadata import DCMetadataCache, InvalidPayload
+from .metrics import PhaseTimer
 from .models import (
     DiscoverProjectsResponse,
     MigrationRequest,
     MigrationResult,
     ProjectMigrationResult,
-    ProjectSummary,
 )
+from .pipeline import Prefetcher, StageStats
+from .progress import MigrationCancelled, MigrationProgress
+from .rate_limit import RetryPolicy
+from .sharding import DONE, FAILED, LeaseKeeper, Shard, ShardQueue, worker_id
+from .skip_index import IssueKeyIndex
+from .snapshot import ExtractionSnapshot, snapshot_root
+from .users import UserResolver, load_user_map_file, people_in
+
+
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+MAX_SHARDS_PER_PROJECT = 1000
+# A batched mapping transaction holds SQLite's write lock, which other worker processes wait on.
+SHARED_STORE_FLUSH_S = 0.05
+CLOUD_KEY_LABEL_PREFIX = "migrated-from-"
+RECOVERY_LABELS_PER_SEARCH = 100
+# Issues sharing a created timestamp come back in a fixed order; checkpoints compare on it too.
+SCAN_ORDER = " ORDER BY created ASC, key ASC"
+DEFERRED_NOTE = (
+    "subtask(s) wait for a parent outside this run; they are created by a later run once the parent is migrated."
+)
+# Scope of the pass that creates the subtasks sharded workers deferred.
+SUBTASK_CLAUSE = " AND issuetype in subTaskIssueTypes()"
+
+
+def cloud_key_label(cloud_issue_key: str) -> str:
+    return f"{CLOUD_KEY_LABEL_PREFIX}{cloud_issue_key}"
+
+
+class IssueOutcome(NamedTuple):
+    created: int = 0
+    updated: int = 0
+    comments: int = 0
+    failed: Tuple[str, ...] = ()
+    attachments: Tuple["Future[AttachmentOutcome]", ...] = ()
+
+
+class ProjectFailed(Exception):
+    # Raised out of a project's scan with the counts it reached, so its result keeps them.
+    def __init__(self, cause: Exception, counts: Dict[str, int]) -> None:
+        super().__init__(str(cause))
+        self.cause = cause
+        self.counts = counts
 
 
 class Migrator:
-    def __init__(self, request: MigrationRequest) -> None:
+    def __init__(self, request: MigrationRequest, progress: Optional[MigrationProgress] = None) -> None:
         self.request = request
+        self.progress = progress or MigrationProgress()
+        # Size estimates cost one count request per project; they are only needed for scheduling
+        # parallel projects or when someone is watching progress.
+        self.estimate_sizes = progress is not None
         self.run_id = str(uuid.uuid4())
-        self.store = MappingStore(request.db_path)
-        self.cloud = JiraClient(request.cloud_base_url, JiraAuth(request.cloud_user, request.cloud_token))
-        self.dc = JiraClient(request.dc_base_url, JiraAuth(request.dc_user, request.dc_token))
+        # Per-project phase timers are bound to the project thread and its worker threads.
+        self._phase_local = threading.local()
+        self.store = MappingStore(request.db_path, on_timing=self._on_store_timing)
+        self._snapshots: Dict[str, ExtractionSnapshot] = {}
+        # Extra JQL per project while this process works on one shard of it.
+        self._shard_clauses: Dict[str, str] = {}
+        self._snapshots_lock = threading.Lock()
+        pool_size = max(10, request.concurrency * request.parallel_projects)
+        # One budget of in-flight HTTP requests shared by every project running in parallel.
+        request_slots = threading.BoundedSemaphore(request.max_concurrent_requests)
+        retry_policy = RetryPolicy(max_retries=request.max_retries, max_backoff_s=request.max_backoff_s)
+        self.cloud = JiraClient(
+            request.cloud_base_url,
+            JiraAuth(request.cloud_user, request.cloud_token),
+            pool_maxsize=pool_size,
+            retry_policy=retry_policy,
+            max_requests_per_second=request.max_requests_per_second,
+            request_slots=request_slots,
+        )
+        self.dc = JiraClient(
+            request.dc_base_url,
+            JiraAuth(request.dc_user, request.dc_token),
+            pool_maxsize=pool_size,
+            retry_policy=retry_policy,
+            max_requests_per_second=request.max_requests_per_second,
+            request_slots=request_slots,
+        )
+        self.metadata: Optional[DCMetadataCache] = None
+        if request.validate_payloads:
+            self.metadata = DCMetadataCache(
+                self.dc,
+                self.store,
+                ttl_s=request.metadata_ttl_s,
+                default_issue_type=request.default_issue_type,
+                default_priority=request.default_priority,
+            )
+        self.users: Optional[UserResolver] = None
+        if request.migrate_users:
+            mapping = load_user_map_file(request.user_map_file) if request.user_map_file else None
+            self.users = UserResolver(self.cloud, self.dc, self.store, mapping=mapping, log=self._log)
+        self.attachments: Optional[AttachmentCopier] = None
+        if request.migrate_attachments:
+            self.attachments = AttachmentCopier(
+                self.cloud,
+                self.dc,
+                self.store,
+                workers=request.attachment_concurrency,
+                max_bytes_per_second=request.attachment_max_bytes_per_second,
+                spool_dir=request.attachment_spool_dir,
+                dry_run=request.dry_run,
+                log=self._log,
+            )
+
+    def _bind_phase_timer(self, timer: Optional[PhaseTimer]) -> None:
+        self._phase_local.timer = timer
+
+    def _phase(self, name: str) -> ContextManager[Any]:
+        timer: Optional[PhaseTimer] = getattr(self._phase_local, "timer", None)
+        return timer.phase(name) if timer is not None else nullcontext()
 
-    def _log(self, level: str, message: str) -> None:
-        self.store.log(self.run_id, level, message)
+    def _on_store_timing(self, op: str, seconds: float) -> None:
+        timer: Optional[PhaseTimer] = getattr(self._phase_local, "timer", None)
+        if timer is not None:
+            timer.add("mapping_write", seconds)
+
+    def _log(
+        self,
+        level: str,
+        message: str,
+        project_key: Optional[str] = None,
+        issue_key: Optional[str] = None,
+        phase: Optional[str] = None,
+        duration_s: Optional[float] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if project_key is None and issue_key:
+            project_key = issue_key.rsplit("-", 1)[0]
+        error_class = type(error).__name__ if error is not None else None
+        self.store.log(self.run_id, level, message, project_key, issue_key, phase, duration_s, error_class)
 
     @staticmethod
     def _normalize_key(raw: str) -> str:
@@ -32,19 +170,8 @@ class Migrator:
         return clean[:10] if clean else "MIG"
 
     def discover_projects(self) -> DiscoverProjectsResponse:
-        projects = self.cloud.list_projects_cloud()
-        transformed = [
-            ProjectSummary(
-                key=p.get("key", ""),
-                name=p.get("name", ""),
-                project_type_key=p.get("projectTypeKey", "unknown"),
-                style=p.get("style", "unknown"),
-            )
-            for p in projects
-            if p.get("key")
-        ]
-        transformed.sort(key=lambda p: p.key)
-        return DiscoverProjectsResponse(projects=transformed)
+        projects = fetch_projects(self.cloud)
+        return DiscoverProjectsResponse(projects=projects, total=len(projects), fetched_at=time.time())
 
     def _target_key(self, source_project_key: str) -> str:
         prefix = self._normalize_key(self.request.target_project_prefix)
@@ -65,87 +192,630 @@ class Migrator:
     def _ensure_project(self, source_project_key: str, target_project_key: str) -> bool:
         mapped = self.store.get_project_map(source_project_key)
         if mapped:
-            self._log("info", f"project mapping exists: {source_project_key} -> {mapped}")
+            message = f"project mapping exists: {source_project_key} -> {mapped}"
+            self._log("info", message, source_project_key, phase="project")
             return False
 
         if self.request.dry_run:
-            self._log("info", f"dry-run: would create project {target_project_key}")
+            message = f"dry-run: would create project {target_project_key}"
+            self._log("info", message, source_project_key, phase="project")
             self.store.set_project_map(source_project_key, target_project_key)
             return True
 
         try:
             self.dc.get_project_dc(target_project_key)
-            self._log("info", f"destination project exists: {target_project_key}")
+            self._log("info", f"destination project exists: {target_project_key}", source_project_key, phase="project")
         except Exception:
             payload = self._build_project_payload(target_project_key, source_project_key)
             self.dc.create_project_dc(payload)
-            self._log("info", f"created destination project {target_project_key}")
+            self._log("info", f"created destination project {target_project_key}", source_project_key, phase="project")
 
         self.store.set_project_map(source_project_key, target_project_key)
         return True
 
-    def _iter_source_issues(self, source_project_key: str):
+    def _source_scope(self, source_project_key: str) -> str:
         done_clause = "" if self.request.include_done else " AND statusCategory != Done"
-        jql = f"project = {source_project_key}{done_clause} ORDER BY created ASC"
-        start_at = 0
-        total_seen = 0
+        return f"project = {source_project_key}{done_clause}{self._shard_clauses.get(source_project_key, '')}"
+
+    def _iter_source_pages(self, jql: str) -> Iterator[List[Dict[str, Any]]]:
+        next_page_token: Optional[str] = None
         while True:
-            page = self.cloud.search_issues(jql, start_at=start_at, max_results=self.request.issue_batch_size)
+            page = self.cloud.search_issues_jql(
+                jql,
+                next_page_token=next_page_token,
+                max_results=self.request.issue_batch_size,
+                include_comments=self.request.migrate_comments,
+                include_attachments=self.request.migrate_attachments,
+            )
             issues = page.get("issues", [])
-            if not issues:
-                break
-            for issue in issues:
-                yield issue
-                total_seen += 1
-                if total_seen >= self.request.max_issues_per_project:
+            if issues:
+                yield issues
+            next_page_token = page.get("nextPageToken")
+            if not issues or page.get("isLast") or not next_page_token:
+                return
+
+    def _snapshot(self, source_project_key: str) -> Optional[ExtractionSnapshot]:
+        if not self.request.snapshot_dir:
+            return None
+        with self._snapshots_lock:
+            snapshot = self._snapshots.get(source_project_key)
+            if snapshot is None:
+                scope = f"{self._source_scope(source_project_key)}|comments={self.request.migrate_comments}"
+                if self.request.migrate_attachments:
+                    scope += "|attachments=True"
+                root = snapshot_root(self.request.snapshot_dir, self.request.cloud_base_url, source_project_key, scope)
+                snapshot = ExtractionSnapshot(root)
+                self._snapshots[source_project_key] = snapshot
+            return snapshot
+
+    def _with_full_comments(self, issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Snapshots must be self-contained, so truncated inline comment lists are completed
+        # while extracting instead of on every later run.
+        if not self.request.migrate_comments:
+            return issues
+        for issue in issues:
+            inline = safe_get(issue, "fields", "comment")
+            if isinstance(inline, dict) and inline.get("total", 0) <= len(inline.get("comments") or []):
+                continue
+            comments = self.cloud.list_comments_cloud(issue["key"])
+            issue.setdefault("fields", {})["comment"] = {"comments": comments, "total": len(comments)}
+        return issues
+
+    def _iter_snapshot_pages(
+        self, snapshot: ExtractionSnapshot, source_project_key: str
+    ) -> Iterator[List[Dict[str, Any]]]:
+        scope = self._source_scope(source_project_key)
+        if snapshot.complete:
+            if not self.request.snapshot_offline and snapshot.taken_at is not None:
+                since = (snapshot.taken_at - RESUME_MARGIN).strftime("%Y/%m/%d %H:%M")
+                with snapshot.writer() as writer:
+                    for issues in self._iter_source_pages(f'{scope} AND updated >= "{since}"{SCAN_ORDER}'):
+                        writer.append(self._with_full_comments(issues))
+                    writer.mark_finished()
+                self._log(
+                    "info",
+                    f"snapshot refresh for {source_project_key}: {writer.appended} changed issue(s)",
+                    source_project_key,
+                    phase="snapshot",
+                )
+            yield from snapshot.iter_pages(self.request.issue_batch_size)
+            return
+
+        if self.request.snapshot_offline:
+            raise RuntimeError(f"no complete snapshot for {source_project_key} under {self.request.snapshot_dir}")
+        snapshot.reset()
+        with snapshot.writer() as writer:
+            for issues in self._iter_source_pages(f"{scope}{SCAN_ORDER}"):
+                issues = self._with_full_comments(issues)
+                writer.append(issues)
+                yield issues
+            writer.mark_finished()
+
+    def _source_project(self, source_project_key: str) -> Dict[str, Any]:
+        snapshot = self._snapshot(source_project_key)
+        if snapshot is not None and self.request.snapshot_offline:
+            cached = snapshot.project()
+            if cached is not None:
+                return cached
+        project = self.cloud.get_project(source_project_key)
+        if snapshot is not None:
+            snapshot.set_project(project)
+        return project
+
+    def _iter_source_issues(
+        self,
+        source_project_key: str,
+        after: Optional[IssuePosition] = None,
+        stats: Optional[StageStats] = None,
+        updated_since: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        snapshot = self._snapshot(source_project_key)
+        pages: Iterator[List[Dict[str, Any]]]
+        if updated_since is not None:
+            since = (updated_since - RESUME_MARGIN).strftime("%Y/%m/%d %H:%M")
+            pages = self._iter_source_pages(
+                f'{self._source_scope(source_project_key)} AND updated >= "{since}"{SCAN_ORDER}'
+            )
+        elif snapshot is not None:
+            pages = self._iter_snapshot_pages(snapshot, source_project_key)
+        else:
+            resume_clause = resume_jql_clause(after) if after else ""
+            pages = self._iter_source_pages(
+                f"{self._source_scope(source_project_key)}{resume_clause}{SCAN_ORDER}"
+            )
+        timer: Optional[PhaseTimer] = getattr(self._phase_local, "timer", None)
+        if timer is not None:
+            pages = timer.timed("extract", pages)
+        if self.users is not None:
+            pages = self._with_users_resolved(pages, timer)
+        prefetcher: Optional[Prefetcher[List[Dict[str, Any]]]] = None
+        if self.request.prefetch_pages > 0:
+            prefetcher = Prefetcher(
+                pages, self.request.prefetch_pages, name=f"prefetch-{source_project_key}", stats=stats
+            )
+            pages = prefetcher
+
+        limit = self.request.max_issues_per_project
+        # A snapshot covers the whole scope, so while one is filled the cap only limits what is
+        # yielded: the remaining pages are still read, which writes them to the snapshot.
+        filling_snapshot = updated_since is None and snapshot is not None and not snapshot.complete
+        total_seen = 0
+        try:
+            for issues in pages:
+                for issue in issues if total_seen < limit else ():
+                    if after is not None:
+                        position = issue_position(issue)
+                        if position is not None and position <= after:
+                            continue
+                    yield issue
+                    total_seen += 1
+                    if total_seen >= limit:
+                        break
+                if total_seen >= limit and (not filling_snapshot or self.progress.cancelled):
                     return
-            start_at += len(issues)
+        finally:
+            if prefetcher is not None and not prefetcher.close():
+                message = f"prefetch for {source_project_key} still waiting on Cloud after close; stops once it returns"
+                self._log("warning", message, source_project_key, phase="extract")
+
+    def _with_users_resolved(
+        self, pages: Iterator[List[Dict[str, Any]]], timer: Optional[PhaseTimer]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # Runs ahead of the workers (on the prefetch thread when there is one), so the per-issue
+        # lookups in _map_issue_payload and _migrate_comments are memory hits.
+        assert self.users is not None
+        try:
+            for issues in pages:
+                with timer.phase("users") if timer is not None else nullcontext():
+                    self.users.resolve(people_in(issues))
+                yield issues
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
 
-    def _map_issue_payload(self, issue: Dict[str, Any], target_project_key: str) -> Dict[str, Any]:
+    def _dc_username(self, person: Optional[Dict[str, Any]]) -> Optional[str]:
+        return self.users.username(person) if self.users is not None and person else None
+
+    def _mention(self, attrs: Dict[str, Any]) -> Optional[str]:
+        return self._dc_username({"accountId": attrs["id"]}) if attrs.get("id") else None
+
+    def _wiki(self, body: Any) -> str:
+        # Cloud v3 returns ADF documents; DC v2 takes wiki markup.
+        return body if isinstance(body, str) else adf_to_wiki(body, mention=self._mention)
+
+    def _map_issue_payload(
+        self, issue: Dict[str, Any], target_project_key: str, dc_parent_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         fields = issue.get("fields", {})
         summary = fields.get("summary") or f"Migrated issue from {issue['key']}"
         description = fields.get("description")
         issue_type_name = safe_get(fields, "issuetype", "name", default="Task")
         priority_name = safe_get(fields, "priority", "name")
 
+        labels = list(fields.get("labels", []))
+        if self.request.stamp_cloud_keys and cloud_key_label(issue["key"]) not in labels:
+            labels.append(cloud_key_label(issue["key"]))
         payload: Dict[str, Any] = {
             "fields": {
                 "project": {"key": target_project_key},
                 "summary": summary,
                 "issuetype": {"name": issue_type_name},
-                "labels": fields.get("labels", []),
+                "labels": labels,
             }
         }
 
         if description:
-            payload["fields"]["description"] = description
+            payload["fields"]["description"] = self._wiki(description)
         if priority_name:
             payload["fields"]["priority"] = {"name": priority_name}
+        if dc_parent_key:
+            payload["fields"]["parent"] = {"key": dc_parent_key}
+        for role in ("assignee", "reporter"):
+            username = self._dc_username(fields.get(role))
+            if username:
+                payload["fields"][role] = {"name": username}
 
         return payload
 
-    def _migrate_comments(self, cloud_issue_key: str, dc_issue_key: str) -> int:
+    def _source_comments(self, cloud_issue_key: str, issue: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Search results carry the first page of comments inline; only issues with more
+        # comments than were returned need their own (paginated) fetch.
+        inline = safe_get(issue or {}, "fields", "comment")
+        if isinstance(inline, dict):
+            comments = inline.get("comments") or []
+            if inline.get("total", len(comments)) <= len(comments):
+                return comments
+        with self._phase("extract"):
+            return self.cloud.list_comments_cloud(cloud_issue_key)
+
+    def _new_comments(
+        self, cloud_issue_key: str, comments: List[Dict[str, Any]], since: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        # Comments copied since comment_map existed are known by id; for issues migrated before
+        # that, anything created after the last sync watermark is new.
+        known = self.store.get_comment_ids(cloud_issue_key)
+        if known:
+            return [c for c in comments if str(c.get("id")) not in known]
+        if since is None:
+            return comments
+        return [c for c in comments if c.get("created") and parse_jira_datetime(c["created"]) > since]
+
+    def _migrate_comments(
+        self,
+        cloud_issue_key: str,
+        dc_issue_key: str,
+        issue: Optional[Dict[str, Any]] = None,
+        only_new_since: Optional[datetime] = None,
+        only_new: bool = False,
+    ) -> int:
         if not self.request.migrate_comments:
             return 0
-        comments = self.cloud.list_comments_cloud(cloud_issue_key)
+        comments = self._source_comments(cloud_issue_key, issue)
+        if self.users is not None:
+            self.users.resolve(c["author"] for c in comments if c.get("author"))
+        if only_new:
+            comments = self._new_comments(cloud_issue_key, comments, only_new_since)
         created = 0
+        copied: List[Tuple[str, str, str]] = []
         for comment in comments:
             body = comment.get("body")
             if not body:
                 continue
-            body_text = body if isinstance(body, str) else str(body)
+            with self._phase("transform"):
+                body_text = self._wiki(body)
             if self.request.dry_run:
                 created += 1
                 continue
-            self.dc.create_comment_dc(dc_issue_key, f"[migrated from {cloud_issue_key}]\n{body_text}")
+            with self._phase("load"):
+                dc_comment = self.dc.create_comment_dc(
+                    dc_issue_key, f"[migrated from {cloud_issue_key}]{self._comment_author(comment)}\n{body_text}"
+                )
             created += 1
+            if comment.get("id") is not None:
+                copied.append((str(comment["id"]), cloud_issue_key, str((dc_comment or {}).get("id", ""))))
+        self.store.set_comment_maps(copied)
         return created
 
+    def _comment_author(self, comment: Dict[str, Any]) -> str:
+        # DC sets the author to the migrating account, so the original author goes in the header.
+        author = comment.get("author")
+        if not author:
+            return ""
+        username = self._dc_username(author)
+        return f" by [~{username}]" if username else f" by {author.get('displayName') or 'unknown user'}"
+
+    def _prepare_payload(
+        self, issue: Dict[str, Any], target_project_key: str, dc_parent_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        payload = self._map_issue_payload(issue, target_project_key, dc_parent_key)
+        if self.metadata is not None:
+            dropped: List[str] = []
+            payload = self.metadata.translate(target_project_key, payload, dropped)
+            if dropped:
+                message = f"not sent to DC: {', '.join(dropped)}"
+                self._log("warning", message, issue_key=issue["key"], phase="transform")
+        return payload
+
+    def _rejected_by_dc(self, exc: Exception, target_project_key: str) -> None:
+        # A 400 for a payload the metadata cache passed means the cache is stale.
+        response = getattr(exc, "response", None)
+        if self.metadata is not None and getattr(response, "status_code", None) == 400:
+            self.metadata.invalidate(target_project_key)
+
+    def _epic_link_field(self) -> Optional[str]:
+        if self.request.epic_link_field or self.metadata is None:
+            return self.request.epic_link_field
+        return self.metadata.custom_field_id("Epic Link")
+
+    @staticmethod
+    def _subtask_parent(issue: Dict[str, Any]) -> Optional[str]:
+        issue_type = safe_get(issue, "fields", "issuetype") or {}
+        if issue_type.get("subtask") or issue_type.get("hierarchyLevel") == -1:
+            return safe_get(issue, "fields", "parent", "key")
+        return None
+
+    def _record_references(self, issues: List[Dict[str, Any]]) -> None:
+        # Links and epic parents are applied after every issue exists (see _apply_links), so
+        # pass one never waits on, or looks up, the other end of a reference.
+        if not self.request.migrate_links:
+            return
+        rows: List[Tuple[str, str, str, str, Optional[str]]] = []
+        for issue in issues:
+            cloud_key = issue["key"]
+            parent_key = safe_get(issue, "fields", "parent", "key")
+            if parent_key and self._subtask_parent(issue) is None and self._epic_link_field():
+                rows.append((f"parent:{cloud_key}", "parent", cloud_key, parent_key, None))
+            for link in safe_get(issue, "fields", "issuelinks") or []:
+                # Each link is listed on both of its issues; only the inward side records it.
+                target_key = safe_get(link, "outwardIssue", "key")
+                if target_key and link.get("id") is not None:
+                    rows.append((str(link["id"]), "link", cloud_key, target_key, safe_get(link, "type", "name")))
+        self.store.add_pending_links(rows)
+
+    def _queue_attachments(
+        self, cloud_issue_key: str, dc_issue_key: str, issue: Optional[Dict[str, Any]]
+    ) -> List["Future[AttachmentOutcome]"]:
+        if self.attachments is None:
+            return []
+        attachments = safe_get(issue or {}, "fields", "attachment") or []
+        future = self.attachments.submit(cloud_issue_key, dc_issue_key, attachments)
+        return [future] if future is not None else []
+
+    def _add_attachment_result(
+        self, totals: AttachmentOutcome, future: "Future[AttachmentOutcome]", source_project_key: str
+    ) -> AttachmentOutcome:
+        try:
+            outcome = future.result()
+        except Exception as exc:
+            message = f"attachment task in {source_project_key} failed: {type(exc).__name__}: {exc}"
+            self._log("error", message, source_project_key, phase="attachments", error=exc)
+            outcome = AttachmentOutcome(failed=1)
+        return AttachmentOutcome(*(a + b for a, b in zip(totals, outcome)))
+
+    def _begin_inflight(self, target_project_key: str, cloud_keys: List[str]) -> None:
+        # Without the stamp a lost create cannot be found in DC, so there is nothing to journal.
+        if self.request.stamp_cloud_keys and cloud_keys:
+            self.store.begin_inflight(cloud_keys[0].rsplit("-", 1)[0], target_project_key, cloud_keys)
+
+    def _end_inflight(self, cloud_keys: List[str]) -> None:
+        # For journaled creates that were never sent.
+        if self.request.stamp_cloud_keys and not self.request.dry_run:
+            self.store.end_inflight(cloud_keys)
+
+    def _find_stamped(self, dc_project_key: str, cloud_keys: List[str]) -> Dict[str, str]:
+        # One JQL search per chunk of keys. Labels match case-insensitively in JQL, so the
+        # returned labels are compared the same way.
+        by_label = {cloud_key_label(key).lower(): key for key in cloud_keys}
+        quoted = ", ".join(f'"{cloud_key_label(key)}"' for key in cloud_keys)
+        jql = f"project = {dc_project_key} AND labels in ({quoted}) ORDER BY created ASC"
+        found: Dict[str, str] = {}
+        start_at = 0
+        while True:
+            page = self.dc.search_issues_dc(jql, ["labels"], start_at=start_at, max_results=2 * len(cloud_keys))
+            issues = page.get("issues") or []
+            for dc_issue in issues:
+                for label in safe_get(dc_issue, "fields", "labels") or []:
+                    cloud_key = by_label.get(label.lower())
+                    if cloud_key is None:
+                        continue
+                    if cloud_key in found:
+                        message = f"{cloud_key} exists twice in DC: {found[cloud_key]}, {dc_issue['key']}"
+                        self._log("error", message, issue_key=cloud_key, phase="recovery")
+                    else:
+                        found[cloud_key] = dc_issue["key"]
+            start_at += len(issues)
+            if not issues or start_at >= page.get("total", 0):
+                return found
+
+    def recover_inflight(self, source_project_key: str) -> int:
+        # Checks only the creates journaled by an interrupted run, so the cost follows the number
+        # in flight when it stopped rather than the size of the project. Returns the issues found.
+        if self.request.dry_run or not self.request.stamp_cloud_keys:
+            return 0
+        inflight = self.store.get_inflight(source_project_key)
+        entries = [(key, dc_project_key) for key, dc_project_key, dc_issue_key in inflight if not dc_issue_key]
+        if not entries:
+            return 0
+        mapped = self.store.get_issue_maps(key for key, _ in entries)
+        by_project: Dict[str, List[str]] = {}
+        for key, dc_project_key in entries:
+            if key not in mapped:
+                by_project.setdefault(dc_project_key, []).append(key)
+        found: Dict[str, str] = {}
+        for dc_project_key, keys in by_project.items():
+            for start in range(0, len(keys), RECOVERY_LABELS_PER_SEARCH):
+                found.update(self._find_stamped(dc_project_key, keys[start : start + RECOVERY_LABELS_PER_SEARCH]))
+        self.store.resolve_inflight(found, [key for key, _ in entries if key not in found])
+        message = f"{source_project_key}: {len(entries)} in-flight create(s) checked, {len(found)} found in DC"
+        self._log("info", message, source_project_key, phase="recovery")
+        return len(found)
+
+    def _finish_recovered(self, issue: Dict[str, Any], dc_issue_key: str) -> IssueOutcome:
+        # The interrupted run created the issue but stopped before the work that follows a create.
+        cloud_key = issue["key"]
+        self._record_references([issue])
+        comments = self._migrate_comments(cloud_key, dc_issue_key, issue, only_new=True)
+        attachments = self._queue_attachments(cloud_key, dc_issue_key, issue)
+        self.store.end_inflight([cloud_key])
+        return IssueOutcome(comments=comments, attachments=tuple(attachments))
+
+    def _migrate_issue(
+        self, issue: Dict[str, Any], target_project_key: str, ordinal: int, dc_parent_key: Optional[str] = None
+    ) -> IssueOutcome:
+        cloud_key = issue["key"]
+        try:
+            with self._phase("transform"):
+                payload = self._prepare_payload(issue, target_project_key, dc_parent_key)
+        except InvalidPayload as exc:
+            self._log("error", f"{cloud_key} not sent to DC: {exc}", issue_key=cloud_key, phase="transform", error=exc)
+            self._end_inflight([cloud_key])
+            return IssueOutcome(failed=(cloud_key,))
+        if self.request.dry_run:
+            dc_issue_key = f"{target_project_key}-DRY-{ordinal}"
+        else:
+            # Journaled by the scan, a page of creates at a time (see dispatch_creates).
+            try:
+                with self._phase("load"):
+                    created_issue = self.dc.create_issue_dc(payload)
+            except Exception as exc:
+                # One rejected issue fails alone, as in a bulk batch; the rest of the project goes on.
+                self._rejected_by_dc(exc, target_project_key)
+                if getattr(exc, "response", None) is not None:
+                    # DC answered, so nothing was created; without an answer the journal entry stays
+                    # for the next run to look up.
+                    self.store.end_inflight([cloud_key])
+                message = f"{cloud_key} not created in DC: {type(exc).__name__}: {exc}"
+                self._log("error", message, issue_key=cloud_key, phase="create", error=exc)
+                return IssueOutcome(failed=(cloud_key,))
+            dc_issue_key = created_issue["key"]
+
+        self.store.set_issue_map(cloud_key, dc_issue_key)
+        self._record_references([issue])
+        return IssueOutcome(
+            created=1,
+            comments=self._migrate_comments(cloud_key, dc_issue_key, issue),
+            attachments=tuple(self._queue_attachments(cloud_key, dc_issue_key, issue)),
+        )
+
+    def _migrate_subtask(
+        self,
+        issue: Dict[str, Any],
+        target_project_key: str,
+        ordinal: int,
+        parent_key: str,
+        parent_future: Optional[Future],
+    ) -> IssueOutcome:
+        # The parent was submitted earlier to the same FIFO pool, so it is running or done by now.
+        if parent_future is not None:
+            wait([parent_future])
+        dc_parent_key = self.store.get_issue_map(parent_key)
+        if dc_parent_key is None:
+            message = f"subtask {issue['key']} not created: parent {parent_key} was not migrated"
+            self._log("error", message, issue_key=issue["key"], phase="create")
+            self._end_inflight([issue["key"]])
+            return IssueOutcome(failed=(issue["key"],))
+        return self._migrate_issue(issue, target_project_key, ordinal, dc_parent_key)
+
+    def _sync_issue(
+        self, issue: Dict[str, Any], dc_issue_key: str, target_project_key: str, since: datetime
+    ) -> IssueOutcome:
+        cloud_key = issue["key"]
+        if not self.request.dry_run:
+            parent_key = self._subtask_parent(issue)
+            dc_parent_key = self.store.get_issue_map(parent_key) if parent_key else None
+            try:
+                # Translated like a create, so renamed and unknown values are handled the same way.
+                with self._phase("transform"):
+                    fields = self._prepare_payload(issue, target_project_key, dc_parent_key)["fields"]
+                # Project, issue type and parent changes need a move in DC; only content fields are synced.
+                moved = ("project", "issuetype", "parent")
+                update = {name: value for name, value in fields.items() if name not in moved}
+                with self._phase("load"):
+                    self.dc.update_issue_dc(dc_issue_key, {"fields": update})
+            except Exception as exc:
+                # One rejected update fails alone; the rest of the delta pass goes on.
+                self._rejected_by_dc(exc, target_project_key)
+                message = f"{cloud_key} not updated in DC ({dc_issue_key}): {type(exc).__name__}: {exc}"
+                self._log("error", message, issue_key=cloud_key, phase="sync", error=exc)
+                return IssueOutcome(failed=(cloud_key,))
+        self._record_references([issue])
+        comments = self._migrate_comments(cloud_key, dc_issue_key, issue, only_new_since=since, only_new=True)
+        attachments = self._queue_attachments(cloud_key, dc_issue_key, issue)
+        return IssueOutcome(updated=1, comments=comments, attachments=tuple(attachments))
+
+    @staticmethod
+    def _split_bulk_response(count: int, response: Dict[str, Any]) -> Tuple[Dict[int, str], Dict[int, str]]:
+        # DC lists created issues in request order, skipping the elements reported in "errors".
+        errors: Dict[int, str] = {}
+        for error in response.get("errors", []):
+            index = error.get("failedElementNumber")
+            if isinstance(index, int) and 0 <= index < count:
+                element_errors = error.get("elementErrors") or {}
+                messages = list(element_errors.get("errorMessages") or []) + [
+                    f"{field}: {message}" for field, message in (element_errors.get("errors") or {}).items()
+                ]
+                errors[index] = "; ".join(messages) or f"status {error.get('status', 'unknown')}"
+
+        created: Dict[int, str] = {}
+        created_issues = iter(response.get("issues", []))
+        for index in range(count):
+            if index in errors:
+                continue
+            issue = next(created_issues, None)
+            if issue is None or not issue.get("key"):
+                errors[index] = "missing from bulk response"
+                continue
+            created[index] = issue["key"]
+        return created, errors
+
+    def _migrate_issue_batch(
+        self, batch: List[Tuple[int, Dict[str, Any]]], target_project_key: str
+    ) -> IssueOutcome:
+        pending: List[Tuple[int, Dict[str, Any], Dict[str, Any]]] = []
+        invalid: Dict[str, str] = {}
+        with self._phase("transform"):
+            for ordinal, issue in batch:
+                try:
+                    pending.append((ordinal, issue, self._prepare_payload(issue, target_project_key)))
+                except InvalidPayload as exc:
+                    invalid[issue["key"]] = f"not sent to DC: {exc}"
+        mapped: List[Tuple[str, str]] = []
+        last_errors: Dict[str, str] = {}
+        # Keys whose request got no answer from DC; their journal entries stay for the stamp lookup.
+        unanswered: Dict[str, str] = {}
+
+        for _ in range(self.request.bulk_retries + 1):
+            if not pending:
+                break
+            if self.request.dry_run:
+                created = {i: f"{target_project_key}-DRY-{ordinal}" for i, (ordinal, _, _) in enumerate(pending)}
+                errors: Dict[int, str] = {}
+            else:
+                self._begin_inflight(target_project_key, [issue["key"] for _, issue, _ in pending])
+                try:
+                    with self._phase("load"):
+                        response = self.dc.create_issues_bulk_dc([payload for _, _, payload in pending])
+                except Exception as exc:
+                    # The whole request failed: this batch fails alone and the rest of the project goes on.
+                    self._rejected_by_dc(exc, target_project_key)
+                    failed = {issue["key"]: f"{type(exc).__name__}: {exc}" for _, issue, _ in pending}
+                    answered = getattr(exc, "response", None) is not None
+                    last_errors, unanswered = (failed, {}) if answered else ({}, failed)
+                    break
+                created, errors = self._split_bulk_response(len(pending), response)
+                if errors and self.metadata is not None:
+                    self.metadata.invalidate(target_project_key)
+
+            mapped.extend((pending[i][1]["key"], dc_issue_key) for i, dc_issue_key in created.items())
+            last_errors = {pending[i][1]["key"]: message for i, message in errors.items()}
+            pending = [pending[i] for i in sorted(errors)]
+
+        if not self.request.dry_run:
+            # DC reported these elements as not created, so there is nothing to recover.
+            self.store.end_inflight(last_errors)
+        last_errors.update(unanswered)
+        last_errors.update(invalid)
+        self.store.set_issue_maps(mapped)
+        mapped_keys = {cloud_key for cloud_key, _ in mapped}
+        self._record_references([issue for _, issue in batch if issue["key"] in mapped_keys])
+        for cloud_key, message in last_errors.items():
+            self._log("error", f"bulk create failed for {cloud_key}: {message}", issue_key=cloud_key, phase="create")
+
+        issues_by_key = {issue["key"]: issue for _, issue in batch}
+        comments_created = sum(
+            self._migrate_comments(cloud_key, dc_issue_key, issues_by_key.get(cloud_key))
+            for cloud_key, dc_issue_key in mapped
+        )
+        attachments = tuple(
+            future
+            for cloud_key, dc_issue_key in mapped
+            for future in self._queue_attachments(cloud_key, dc_issue_key, issues_by_key.get(cloud_key))
+        )
+        return IssueOutcome(
+            created=len(mapped), comments=comments_created, failed=tuple(last_errors), attachments=attachments
+        )
+
+    @staticmethod
+    def _changed_since(issue: Dict[str, Any], watermark: Optional[datetime]) -> bool:
+        # The JQL window starts a day early (minute precision, user time zone); the exact cut is
+        # made here, with a little slack for clock skew between us and Cloud.
+        updated = safe_get(issue, "fields", "updated")
+        if watermark is None or not updated:
+            return True
+        try:
+            return parse_jira_datetime(updated) >= watermark - SYNC_CLOCK_SKEW
+        except ValueError:
+            return True
+
     def _migrate_single_project(self, source_project_key: str) -> ProjectMigrationResult:
         target_project_key = self._target_key(source_project_key)
         notes: List[str] = []
+        project_started = time.perf_counter()
+        timer = PhaseTimer()
+        self._bind_phase_timer(timer)
 
-        source_project = self.cloud.get_project(source_project_key)
+        source_project = self._source_project(source_project_key)
         source_style = source_project.get("style", "unknown")
         source_type = source_project.get("projectTypeKey", "unknown")
 
@@ -155,27 +825,261 @@ class Migrator:
         created_project = self._ensure_project(source_project_key, target_project_key)
         issues_scanned = 0
         issues_created = 0
+        issues_updated = 0
+        issues_failed = 0
+        issues_deferred = 0
         comments_created = 0
         skipped_issues = 0
+        # Shards of a sharded run skip this: the coordinator recovered before any worker started.
+        issues_recovered = 0 if source_project_key in self._shard_clauses else self.recover_inflight(source_project_key)
+        recovered = {
+            key: dc_key
+            for key, _, dc_key in ([] if self.request.dry_run else self.store.get_inflight(source_project_key))
+            if dc_key
+        }
 
-        for issue in self._iter_source_issues(source_project_key):
-            issues_scanned += 1
-            cloud_key = issue["key"]
-            if self.store.get_issue_map(cloud_key):
-                skipped_issues += 1
-                continue
+        # Mapped keys are loaded once, and keys are claimed on the scanning thread so a key seen
+        # twice (offset paging can shift) never reaches two workers.
+        migrated = IssueKeyIndex(source_project_key, self.store.iter_issue_keys(source_project_key))
+        scope = self._source_scope(source_project_key)
+        pass_started = datetime.now(timezone.utc)
+        watermark: Optional[datetime] = None
+        if self.request.delta_sync:
+            saved_watermark = self.store.get_sync_watermark(source_project_key, scope)
+            watermark = datetime.fromisoformat(saved_watermark) if saved_watermark else None
+            if watermark is None:
+                notes.append("No sync watermark yet; ran a full create pass instead of a delta sync.")
+        resume_from: Optional[IssuePosition] = None
+        # Snapshot reads are local and not in created order, and delta passes are small, so keyset
+        # checkpoints only apply to full scans that go to Cloud.
+        use_checkpoint = not self.request.snapshot_dir and watermark is None
+        if self.request.resume_from_checkpoint and use_checkpoint:
+            saved = self.store.get_checkpoint(source_project_key, scope)
+            resume_from = make_position(*saved) if saved else None
+            if resume_from:
+                position = f"{resume_from.created_raw}/{resume_from.issue_key}"
+                self._log("info", f"resuming {source_project_key} after {position}", source_project_key, phase="scan")
+        if watermark is None:
+            self.store.start_sync_pass(source_project_key, scope, pass_started.isoformat(), fresh=resume_from is None)
+        tracker = CheckpointTracker()
+        checkpoint_every = self.request.issue_batch_size
+        saved_at = 0
 
-            payload = self._map_issue_payload(issue, target_project_key)
-            if self.request.dry_run:
-                dc_issue_key = f"{target_project_key}-DRY-{issues_scanned}"
-            else:
-                created_issue = self.dc.create_issue_dc(payload)
-                dc_issue_key = created_issue["key"]
+        stage_stats = StageStats()
+        worker_wait_s = 0.0
+        max_in_flight = self.request.concurrency * 2
+        in_flight: Dict[Future, List[Tuple[int, str]]] = {}
+        attachment_futures: List["Future[AttachmentOutcome]"] = []
+        attachment_totals = AttachmentOutcome()
+        # Cloud key -> future for issues still in flight, so a subtask can wait on its parent.
+        submitted: Dict[str, Future] = {}
+        deferred: List[Tuple[int, Dict[str, Any]]] = []
+        batch: List[Tuple[int, Dict[str, Any]]] = []
 
-            self.store.set_issue_map(cloud_key, dc_issue_key)
-            issues_created += 1
-            comments_created += self._migrate_comments(cloud_key, dc_issue_key)
+        def save_checkpoint(force: bool = False) -> None:
+            nonlocal saved_at
+            position = tracker.position
+            if not use_checkpoint or position is None or tracker.advanced == saved_at:
+                return
+            if force or tracker.advanced - saved_at >= checkpoint_every:
+                self.store.set_checkpoint(
+                    source_project_key, self.run_id, scope, position.created_raw, position.issue_key
+                )
+                saved_at = tracker.advanced
 
+        def track_attachments(futures: Iterable["Future[AttachmentOutcome]"]) -> None:
+            # Finished transfers are folded into the totals as they complete, so the list only
+            # holds transfers still queued or running, which the copier's queue bounds.
+            nonlocal attachment_totals
+            attachment_futures.extend(futures)
+            running = []
+            for future in attachment_futures:
+                if future.done():
+                    attachment_totals = self._add_attachment_result(attachment_totals, future, source_project_key)
+                else:
+                    running.append(future)
+            attachment_futures[:] = running
+
+        def collect(done: Set[Future]) -> None:
+            nonlocal issues_created, issues_updated, comments_created, issues_failed
+            for future in done:
+                outcome: IssueOutcome = future.result()
+                issues_created += outcome.created
+                issues_updated += outcome.updated
+                comments_created += outcome.comments
+                issues_failed += len(outcome.failed)
+                track_attachments(outcome.attachments)
+                self.progress.record(
+                    source_project_key, created=outcome.created, failed=len(outcome.failed), comments=outcome.comments
+                )
+                failed_keys = set(outcome.failed)
+                for ordinal, cloud_key in in_flight.pop(future):
+                    submitted.pop(cloud_key, None)
+                    tracker.finished(ordinal, ok=cloud_key not in failed_keys)
+            save_checkpoint()
+
+        def submit(fn: Any, items: List[Tuple[int, str]], *args: Any) -> None:
+            nonlocal worker_wait_s
+            if len(in_flight) >= max_in_flight:
+                started = time.monotonic()
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                worker_wait_s += time.monotonic() - started
+                collect(done)
+            future = pool.submit(fn, *args)
+            in_flight[future] = items
+            for _, cloud_key in items:
+                submitted[cloud_key] = future
+
+        # Single creates are journaled in groups of a page: one commit makes the whole group
+        # durable before any of its creates is sent, instead of one commit per issue.
+        creates: List[Tuple[Any, List[Tuple[int, str]], Tuple[Any, ...]]] = []
+        queued_creates: Set[str] = set()
+
+        def dispatch_creates() -> None:
+            if not creates:
+                return
+            if not self.request.dry_run:
+                self._begin_inflight(target_project_key, [key for _, items, _ in creates for _, key in items])
+            for fn, items, args in creates:
+                submit(fn, items, *args)
+            creates.clear()
+            queued_creates.clear()
+
+        def queue_create(fn: Any, items: List[Tuple[int, str]], *args: Any) -> None:
+            creates.append((fn, items, args))
+            queued_creates.update(key for _, key in items)
+            if len(creates) >= self.request.issue_batch_size:
+                dispatch_creates()
+
+        def submit_subtask(ordinal: int, issue: Dict[str, Any], parent_key: str) -> bool:
+            if parent_key in queued_creates:
+                dispatch_creates()
+            parent_future = submitted.get(parent_key)
+            if parent_future is None and self.store.get_issue_map(parent_key) is None:
+                return False
+            queue_create(
+                self._migrate_subtask,
+                [(ordinal, issue["key"])],
+                issue,
+                target_project_key,
+                ordinal,
+                parent_key,
+                parent_future,
+            )
+            return True
+
+        @contextmanager
+        def keep_counts() -> Iterator[None]:
+            try:
+                yield
+            except Exception as exc:
+                # Entered before the pool, so its workers have finished here; their work still counts.
+                for future in list(in_flight):
+                    if future.exception() is None:
+                        collect({future})
+                counts = {
+                    "issues_scanned": issues_scanned,
+                    "issues_created": issues_created,
+                    "issues_updated": issues_updated,
+                    "issues_failed": issues_failed,
+                    "issues_recovered": issues_recovered,
+                    "comments_created": comments_created,
+                    "skipped_issues": skipped_issues,
+                }
+                raise ProjectFailed(exc, counts) from exc
+
+        with keep_counts(), ThreadPoolExecutor(
+            max_workers=self.request.concurrency, initializer=self._bind_phase_timer, initargs=(timer,)
+        ) as pool:
+            source_issues = self._iter_source_issues(
+                source_project_key, after=resume_from, stats=stage_stats, updated_since=watermark
+            )
+            for issue in source_issues:
+                if self.progress.cancelled:
+                    notes.append("Cancelled before the scan finished; rerun to resume from the checkpoint.")
+                    break
+                issues_scanned += 1
+                cloud_key = issue["key"]
+                tracker.scanned(issues_scanned, issue_position(issue))
+                if not migrated.add(cloud_key):
+                    if cloud_key in recovered:
+                        self.progress.record(source_project_key, scanned=1)
+                        submit(self._finish_recovered, [(issues_scanned, cloud_key)], issue, recovered.pop(cloud_key))
+                        continue
+                    dc_issue_key = self.store.get_issue_map(cloud_key) if watermark is not None else None
+                    if dc_issue_key and self._changed_since(issue, watermark):
+                        self.progress.record(source_project_key, scanned=1)
+                        submit(
+                            self._sync_issue,
+                            [(issues_scanned, cloud_key)],
+                            issue,
+                            dc_issue_key,
+                            target_project_key,
+                            watermark,
+                        )
+                        continue
+                    if self.attachments is not None and safe_get(issue, "fields", "attachment"):
+                        # Picks up files a previous run failed to copy; copied ones are skipped by id.
+                        dc_issue_key = dc_issue_key or self.store.get_issue_map(cloud_key)
+                        if dc_issue_key:
+                            track_attachments(self._queue_attachments(cloud_key, dc_issue_key, issue))
+                    skipped_issues += 1
+                    tracker.finished(issues_scanned)
+                    self.progress.record(source_project_key, scanned=1, skipped=1)
+                    continue
+                self.progress.record(source_project_key, scanned=1)
+
+                parent_key = self._subtask_parent(issue) if self.request.migrate_links else None
+                if parent_key is not None:
+                    # DC needs the parent when a subtask is created; only these issues wait.
+                    if not submit_subtask(issues_scanned, issue, parent_key):
+                        deferred.append((issues_scanned, issue))
+                    continue
+                if not self.request.bulk_create:
+                    queue_create(
+                        self._migrate_issue, [(issues_scanned, cloud_key)], issue, target_project_key, issues_scanned
+                    )
+                    continue
+                batch.append((issues_scanned, issue))
+                if len(batch) >= self.request.bulk_batch_size:
+                    submit(self._migrate_issue_batch, [(o, i["key"]) for o, i in batch], batch, target_project_key)
+                    batch = []
+
+            dispatch_creates()
+            if batch:
+                submit(self._migrate_issue_batch, [(o, i["key"]) for o, i in batch], batch, target_project_key)
+            # Subtasks scanned before their parent; parents from this project are submitted by now.
+            for ordinal, issue in deferred:
+                if not submit_subtask(ordinal, issue, self._subtask_parent(issue) or ""):
+                    issues_deferred += 1
+                    tracker.finished(ordinal, ok=False)
+            dispatch_creates()
+            done, _ = wait(in_flight)
+            collect(done)
+        save_checkpoint(force=True)
+        for future in attachment_futures:
+            attachment_totals = self._add_attachment_result(attachment_totals, future, source_project_key)
+        scan_complete = not self.progress.cancelled and issues_scanned < self.request.max_issues_per_project
+        if scan_complete and not issues_failed:
+            delta_watermark = pass_started.isoformat() if watermark is not None else None
+            self.store.complete_sync_pass(source_project_key, scope, delta_watermark)
+        self.store.flush()
+
+        if issues_recovered:
+            notes.append(f"{issues_recovered} issue(s) created by an interrupted run were found in DC and mapped.")
+        if issues_failed:
+            notes.append(f"{issues_failed} issue(s) failed to create after retries; see run log {self.run_id}.")
+        if issues_deferred:
+            notes.append(f"{issues_deferred} {DEFERRED_NOTE}")
+        if attachment_totals.failed:
+            notes.append(
+                f"{attachment_totals.failed} attachment(s) failed; rerun with --no-resume to retry them "
+                f"(copied files are skipped). See run log {self.run_id}."
+            )
+
+        total_s = round(time.perf_counter() - project_started, 3)
+        message = f"{source_project_key}: {issues_created} created, {issues_updated} updated, {issues_failed} failed"
+        self._log("info", message, source_project_key, phase="project", duration_s=total_s)
         return ProjectMigrationResult(
             source_project_key=source_project_key,
             target_project_key=target_project_key,
@@ -183,12 +1087,346 @@ class Migrator:
             source_project_type=f"{source_type}/{source_style}",
             issues_scanned=issues_scanned,
             issues_created=issues_created,
+            issues_failed=issues_failed,
+            issues_updated=issues_updated,
+            issues_deferred=issues_deferred,
+            issues_recovered=issues_recovered,
             comments_created=comments_created,
             skipped_issues=skipped_issues,
+            attachments_copied=attachment_totals.copied,
+            attachments_deduplicated=attachment_totals.deduplicated,
+            attachments_failed=attachment_totals.failed,
+            attachment_bytes=attachment_totals.bytes,
             notes=notes,
+            pipeline={**stage_stats.as_dict(), "worker_wait_s": round(worker_wait_s, 3)},
+            timings={**timer.as_dict(), "total_s": total_s},
+        )
+
+    def _failed_project_result(self, source_project_key: str, exc: Exception, **counts: int) -> ProjectMigrationResult:
+        # Counts the project reached before failing, if any; the required ones default to zero.
+        counts = {"issues_scanned": 0, "issues_created": 0, "comments_created": 0, "skipped_issues": 0, **counts}
+        return ProjectMigrationResult(
+            source_project_key=source_project_key,
+            target_project_key=self._target_key(source_project_key),
+            created_project=False,
+            source_project_type="unknown",
+            **counts,
+            notes=[f"Project migration failed: {exc}"],
+            error=f"{type(exc).__name__}: {exc}",
         )
 
+    def _migrate_project_isolated(self, source_project_key: str) -> ProjectMigrationResult:
+        if self.progress.cancelled:
+            return self._failed_project_result(source_project_key, MigrationCancelled("cancelled before start"))
+        self.progress.project_started(source_project_key)
+        try:
+            return self._migrate_single_project(source_project_key)
+        except Exception as exc:
+            cause, counts = (exc.cause, exc.counts) if isinstance(exc, ProjectFailed) else (exc, {})
+            message = f"project {source_project_key} failed: {type(cause).__name__}: {cause}"
+            self._log("error", message, source_project_key, phase="project", error=cause)
+            return self._failed_project_result(source_project_key, cause, **counts)
+        finally:
+            self._bind_phase_timer(None)
+            self.progress.project_finished(source_project_key)
+
+    def _schedule_order(self) -> List[str]:
+        keys = list(dict.fromkeys(self.request.source_project_keys))
+        if not self.estimate_sizes and (len(keys) < 2 or self.request.parallel_projects < 2):
+            return keys
+
+        def estimate(key: str) -> int:
+            snapshot = self._snapshot(key)
+            if snapshot is not None and snapshot.complete:
+                return snapshot.issue_count()
+            try:
+                return self.cloud.count_issues_cloud(self._source_scope(key))
+            except Exception:
+                return 0
+
+        with ThreadPoolExecutor(max_workers=self.request.parallel_projects) as pool:
+            sizes = dict(zip(keys, pool.map(estimate, keys)))
+        self.progress.expect(sum(min(size, self.request.max_issues_per_project) for size in sizes.values()))
+        # Largest first, so the biggest project is not the one left running alone at the end.
+        return sorted(keys, key=lambda key: -sizes[key])
+
+    def _apply_link(self, row: Any) -> Optional[str]:
+        try:
+            if not self.request.dry_run:
+                with self._phase("load"):
+                    if row["kind"] == "parent":
+                        fields = {self._epic_link_field(): row["dc_target_key"]}
+                        self.dc.update_issue_dc(row["dc_source_key"], {"fields": fields})
+                    else:
+                        link_type = row["link_type"] or "Relates"
+                        self.dc.create_issue_link_dc(link_type, row["dc_source_key"], row["dc_target_key"])
+            return row["cloud_link_id"]
+        except Exception as exc:
+            message = f"link {row['cloud_link_id']} from {row['source_cloud_key']} failed: {exc}"
+            self._log("error", message, issue_key=row["source_cloud_key"], phase="links", error=exc)
+            return None
+
+    def _apply_links(self) -> Tuple[int, int]:
+        # Pass two: every link whose two ends are now in issue_map, across all projects of this
+        # run and earlier ones. Links to issues not migrated yet stay pending for a later run.
+        if not self.request.migrate_links or self.progress.cancelled:
+            return 0, self.store.count_pending_links() if self.request.migrate_links else 0
+        applied = 0
+        with ThreadPoolExecutor(max_workers=self.request.concurrency) as pool:
+            for rows in self.store.iter_resolvable_links():
+                done = [cloud_link_id for cloud_link_id in pool.map(self._apply_link, rows) if cloud_link_id]
+                if not self.request.dry_run:
+                    self.store.mark_links_done(done)
+                applied += len(done)
+        pending = self.store.count_pending_links() - (applied if self.request.dry_run else 0)
+        return applied, pending
+
+    def plan_shards(self, source_project_key: str) -> List[str]:
+        # Equal created-date windows written as JQL's minute-precision literals. Each boundary is
+        # "<" for one shard and ">=" for the next, so the windows partition the project in
+        # whatever time zone Cloud reads them. Bursty creation makes windows uneven; leases even
+        # that out as long as there are more shards than workers.
+        scope = self._source_scope(source_project_key)
+        total = self.cloud.count_issues_cloud(scope)
+        count = min(-(-total // self.request.shard_issues), MAX_SHARDS_PER_PROJECT)
+        if count <= 1:
+            return [""]
+
+        def edge(order: str) -> Optional[datetime]:
+            page = self.cloud.search_issues_jql(f"{scope} ORDER BY created {order}", max_results=1)
+            created = safe_get((page.get("issues") or [{}])[0], "fields", "created")
+            return parse_jira_datetime(created) if created else None
+
+        first, last = edge("ASC"), edge("DESC")
+        if first is None or last is None:
+            return [""]
+        step = (last - first) / count
+        marks = sorted(
+            {(first + step * i).astimezone(timezone.utc).strftime("%Y/%m/%d %H:%M") for i in range(1, count)}
+        )
+        if not marks:
+            return [""]
+        return (
+            [f' AND created < "{marks[0]}"']
+            + [f' AND created >= "{start}" AND created < "{end}"' for start, end in zip(marks, marks[1:])]
+            + [f' AND created >= "{marks[-1]}"']
+        )
+
+    def migrate_shard(self, shard: Shard) -> ProjectMigrationResult:
+        self._shard_clauses[shard.project_key] = shard.clause
+        try:
+            return self._migrate_project_isolated(shard.project_key)
+        finally:
+            self._shard_clauses.pop(shard.project_key, None)
+
+    def _merge_shard_results(
+        self, source_project_key: str, created_project: bool, shards: List[Dict[str, Any]], recovered: int = 0
+    ) -> ProjectMigrationResult:
+        merged = ProjectMigrationResult(
+            source_project_key=source_project_key,
+            target_project_key=self._target_key(source_project_key),
+            created_project=created_project,
+            source_project_type="unknown",
+            issues_scanned=0,
+            issues_created=0,
+            comments_created=0,
+            skipped_issues=0,
+            issues_recovered=recovered,
+            notes=[],
+        )
+        totals = merged.model_dump()
+        notes: List[str] = []
+        timings: Dict[str, float] = {}
+        for shard in shards:
+            if shard["status"] != DONE or not shard["result"]:
+                continue
+            part = ProjectMigrationResult.model_validate_json(shard["result"])
+            for name, value in part.model_dump().items():
+                if isinstance(value, int) and not isinstance(value, bool):
+                    totals[name] += value
+            totals["source_project_type"] = part.source_project_type
+            notes.extend(note for note in part.notes if note not in notes)
+            for name, seconds in part.timings.items():
+                timings[name] = round(timings.get(name, 0.0) + seconds, 3)
+        failed = [shard for shard in shards if shard["status"] == FAILED]
+        unfinished = [shard for shard in shards if shard["status"] not in (DONE, FAILED)]
+        if failed:
+            totals["error"] = f"{len(failed)} shard(s) failed; last error: {failed[-1]['error']}"
+        if unfinished:
+            notes.append(f"{len(unfinished)} shard(s) unfinished; rerun to migrate the rest.")
+        if recovered:
+            notes.append(f"{recovered} issue(s) created by an interrupted run were found in DC and mapped.")
+        notes.append(f"Migrated as {len(shards)} shard(s).")
+        return ProjectMigrationResult(**{**totals, "notes": notes, "timings": timings})
+
+    def _retry_deferred(self, merged: ProjectMigrationResult) -> ProjectMigrationResult:
+        # A worker defers a subtask whose parent is in another shard that had not created it yet.
+        # Once every shard has finished those parents exist, so one pass over the project's
+        # subtasks creates them; everything already mapped is skipped.
+        retry = self.migrate_shard(Shard(0, self.run_id, merged.source_project_key, SUBTASK_CLAUSE, 1))
+        if retry.error:
+            return merged.model_copy(update={"notes": [*merged.notes, f"Deferred subtask pass failed: {retry.error}"]})
+        counts = {
+            name: getattr(merged, name) + getattr(retry, name)
+            for name in (
+                "issues_created",
+                "issues_failed",
+                "comments_created",
+                "attachments_copied",
+                "attachments_deduplicated",
+                "attachments_failed",
+                "attachment_bytes",
+            )
+        }
+        notes = [note for note in merged.notes if not note.endswith(DEFERRED_NOTE)]
+        notes += [note for note in retry.notes if note not in notes]
+        return merged.model_copy(update={**counts, "issues_deferred": retry.issues_deferred, "notes": notes})
+
+    def run_sharded(self) -> MigrationResult:
+        # Coordinator: create target projects, split each project into shards in the queue
+        # table, then let `workers` processes claim them. More workers (other containers or
+        # nodes sharing the database) can join with run_shard_worker(request, run_id).
+        if self.request.snapshot_dir or self.request.delta_sync:
+            raise ValueError("snapshots and delta sync are per-project; run them with workers=1")
+        queue = ShardQueue(
+            self.request.db_path, lease_s=self.request.shard_lease_s, max_attempts=self.request.shard_max_attempts
+        )
+        keys = list(dict.fromkeys(self.request.source_project_keys))
+        created_projects: Dict[str, bool] = {}
+        recovered: Dict[str, int] = {}
+        planning_errors: Dict[str, ProjectMigrationResult] = {}
+        for key in keys:
+            try:
+                created_projects[key] = self._ensure_project(key, self._target_key(key))
+                recovered[key] = self.recover_inflight(key)
+                # Committed first: the queue's write would otherwise wait for the batched
+                # mapping transaction to be flushed by its timer.
+                self.store.flush()
+                queue.enqueue(self.run_id, key, self.plan_shards(key))
+            except Exception as exc:
+                message = f"project {key} could not be sharded: {type(exc).__name__}: {exc}"
+                self._log("error", message, key, phase="shard", error=exc)
+                planning_errors[key] = self._failed_project_result(key, exc)
+        self.store.flush()
+
+        workers = self.request.workers
+        # Every process has its own limiter and connection pool, so the budgets are split.
+        worker_request = self.request.model_copy(
+            update={
+                "workers": 1,
+                "max_requests_per_second": self.request.max_requests_per_second / workers,
+                "max_concurrent_requests": max(1, self.request.max_concurrent_requests // workers),
+            }
+        )
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(run_shard_worker, worker_request, self.run_id) for _ in range(workers)]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:
+                    self._log("error", f"shard worker exited: {type(exc).__name__}: {exc}", phase="shard", error=exc)
+
+        shards = queue.shards(self.run_id)
+        queue.close()
+        project_results = [
+            planning_errors.get(key)
+            or self._merge_shard_results(
+                key,
+                created_projects.get(key, False),
+                [s for s in shards if s["project_key"] == key],
+                recovered.get(key, 0),
+            )
+            for key in keys
+        ]
+        project_results = [
+            self._retry_deferred(result) if result.issues_deferred and not result.error else result
+            for result in project_results
+        ]
+        with self.store.batch():
+            links_created, links_pending = self._apply_links()
+            if self.attachments is not None:
+                self.attachments.close()
+            self._log("info", f"sharded run complete: {len(shards)} shard(s), {workers} worker(s)", phase="run")
+        return MigrationResult(
+            run_id=self.run_id,
+            dry_run=self.request.dry_run,
+            projects=project_results,
+            links_created=links_created,
+            links_pending=links_pending,
+        )
+
+    def iter_project_results(self) -> Iterator[ProjectMigrationResult]:
+        self.progress.start(len(set(self.request.source_project_keys)))
+        with ThreadPoolExecutor(max_workers=self.request.parallel_projects) as pool:
+            futures = [pool.submit(self._migrate_project_isolated, key) for key in self._schedule_order()]
+            for future in as_completed(futures):
+                yield future.result()
+
     def run(self) -> MigrationResult:
-        project_results = [self._migrate_single_project(key) for key in self.request.source_project_keys]
-        self._log("info", f"run complete for {len(project_results)} project(s)")
-        return MigrationResult(run_id=self.run_id, dry_run=self.request.dry_run, projects=project_results)
+        if self.request.log_retention_days:
+            self.store.compact_run_log(self.request.log_retention_days)
+        if self.request.workers > 1:
+            return self.run_sharded()
+        order = {key: index for index, key in enumerate(self.request.source_project_keys)}
+        with self.store.batch():
+            try:
+                project_results = sorted(self.iter_project_results(), key=lambda r: order[r.source_project_key])
+                links_created, links_pending = self._apply_links()
+            finally:
+                if self.attachments is not None:
+                    self.attachments.close()
+                self.progress.finish()
+                for snapshot in self._snapshots.values():
+                    snapshot.close()
+                self._snapshots.clear()
+            self._log("info", f"run complete for {len(project_results)} project(s)")
+        return MigrationResult(
+            run_id=self.run_id,
+            dry_run=self.request.dry_run,
+            projects=project_results,
+            links_created=links_created,
+            links_pending=links_pending,
+            metadata_cache=self.metadata.stats() if self.metadata is not None else {},
+            users=self.users.stats() if self.users is not None else {},
+            rate_limits={
+                "cloud": self.cloud.rate_limiter.snapshot(),
+                "dc": self.dc.rate_limiter.snapshot(),
+            },
+        )
+
+
+def run_shard_worker(request: MigrationRequest, run_id: str, poll_s: float = 1.0) -> int:
+    # Claims shards of `run_id` until none is pending or leased. While other workers hold the
+    # last leases it keeps polling, so a shard whose worker died is reclaimed once its lease runs
+    # out. Returns the number of shards this worker completed.
+    migrator = Migrator(request)
+    migrator.run_id = run_id
+    migrator.store.flush_interval_s = SHARED_STORE_FLUSH_S
+    queue = ShardQueue(request.db_path, lease_s=request.shard_lease_s, max_attempts=request.shard_max_attempts)
+    owner = worker_id()
+    completed = 0
+    try:
+        while True:
+            shard = queue.claim(run_id, owner)
+            if shard is None:
+                if not queue.unfinished(run_id):
+                    return completed
+                time.sleep(poll_s)
+                continue
+            migrator.progress = MigrationProgress()
+            with LeaseKeeper(queue, shard, owner, on_lost=migrator.progress.cancel) as lease:
+                result = migrator.migrate_shard(shard)
+            # Mappings must be durable before the shard is marked done.
+            migrator.store.flush()
+            if lease.lost:
+                message = f"lost the lease on shard {shard.shard_id}; another worker took it over"
+                migrator._log("error", message, shard.project_key, phase="shard")
+            elif result.error:
+                queue.fail(shard, owner, result.error)
+            elif queue.complete(shard, owner, result.model_dump_json()):
+                completed += 1
+    finally:
+        if migrator.attachments is not None:
+            migrator.attachments.close()
+        queue.close()
+        migrator.store.close()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 
@@ -14,16 +16,25 @@ class ProjectSummary(BaseModel):
     name: str
     project_type_key: str = "unknown"
     style: str = "unknown"
+    issue_count: int | None = None
 
 
 class DiscoverProjectsRequest(BaseModel):
     cloud_base_url: str
     cloud_user: str
     cloud_token: str
+    include_issue_counts: bool = Field(False, description="Add each project's issue count (Cloud insight)")
+    refresh: bool = Field(False, description="Bypass the server-side cache and fetch the list again")
+    query: str | None = Field(None, description="Keep projects whose key or name contains this text")
+    offset: int = Field(0, ge=0)
+    limit: int | None = Field(None, ge=1, description="Projects per response; all when unset")
 
 
 class DiscoverProjectsResponse(BaseModel):
     projects: list[ProjectSummary]
+    total: int = Field(0, description="Projects matching the query, before offset and limit")
+    cached: bool = False
+    fetched_at: float | None = Field(None, description="Epoch seconds when the list was read from Cloud")
 
 
 class MigrationRequest(BaseModel):
@@ -41,6 +52,48 @@ class MigrationRequest(BaseModel):
     migrate_comments: bool = True
     include_done: bool = True
     issue_batch_size: int = 100
+    concurrency: int = Field(4, ge=1, description="Issues created in parallel per project")
+    parallel_projects: int = Field(2, ge=1, description="Projects migrated at the same time")
+    max_concurrent_requests: int = Field(16, ge=1, description="In-flight HTTP requests across all projects")
+    prefetch_pages: int = Field(2, ge=0, description="Search pages fetched ahead while loading; 0 disables")
+    bulk_create: bool = Field(False, description="Create issues through /rest/api/2/issue/bulk")
+    bulk_batch_size: int = Field(50, ge=1, description="Issues per bulk create request")
+    bulk_retries: int = Field(2, ge=0, description="Retries for elements that fail inside a bulk request")
+    delta_sync: bool = Field(False, description="Update mapped issues changed since the last sync watermark")
+    resume_from_checkpoint: bool = Field(True, description="Restart issue scans after the last committed position")
+    snapshot_dir: str | None = Field(None, description="Cache Cloud extraction as per-project snapshots here")
+    snapshot_offline: bool = Field(False, description="Read only from snapshots; never query Cloud for issues")
+    stamp_cloud_keys: bool = Field(
+        True, description="Label each DC issue with its Cloud key so an interrupted create can be found again"
+    )
+    migrate_links: bool = Field(True, description="Recreate subtask parents and issue links")
+    epic_link_field: str | None = Field(
+        None, description="DC field id (e.g. customfield_10101) that takes the parent of non-subtask issues"
+    )
+    validate_payloads: bool = Field(True, description="Check issue payloads against cached DC create metadata")
+    metadata_ttl_s: float = Field(600.0, gt=0, description="How long DC metadata stays cached")
+    default_issue_type: str | None = Field("Task", description="DC issue type used when the Cloud type is unknown")
+    default_priority: str | None = Field(None, description="DC priority used when the Cloud priority is unknown")
+    migrate_users: bool = Field(True, description="Map assignee, reporter and comment authors to DC usernames")
+    user_map_file: str | None = Field(
+        None, description="CSV of Cloud accountId or email, DC username; consulted before any lookup"
+    )
+    migrate_attachments: bool = Field(False, description="Stream attachments from Cloud to DC")
+    attachment_concurrency: int = Field(2, ge=1, description="Attachment transfers running at the same time")
+    attachment_max_bytes_per_second: float | None = Field(
+        None, gt=0, description="Bandwidth cap shared by all attachment transfers"
+    )
+    attachment_spool_dir: str | None = Field(None, description="Temp dir for files hashed before a dedupe check")
+    workers: int = Field(1, ge=1, description="Processes sharing a sharded run; 1 runs in this process")
+    shard_issues: int = Field(5000, ge=1, description="Target issues per shard when workers > 1")
+    shard_lease_s: float = Field(120.0, gt=0, description="Lease on a claimed shard, renewed by heartbeats")
+    shard_max_attempts: int = Field(3, ge=1, description="Claims of one shard before it is marked failed")
+    max_retries: int = Field(5, ge=0, description="Retries per request on 429/5xx")
+    max_backoff_s: float = Field(60.0, gt=0, description="Upper bound for a single retry wait")
+    max_requests_per_second: float = Field(50.0, gt=0, description="Ceiling for the adaptive per-host rate")
+    log_retention_days: float = Field(
+        30.0, ge=0, description="Run log events of runs idle this long are deleted when a run starts; 0 keeps them"
+    )
     db_path: str = "./.migrator/mappings.sqlite3"
 
 
@@ -51,12 +104,100 @@ class ProjectMigrationResult(BaseModel):
     source_project_type: str
     issues_scanned: int
     issues_created: int
+    issues_failed: int = 0
+    issues_updated: int = 0
+    issues_deferred: int = 0
+    issues_recovered: int = 0
     comments_created: int
     skipped_issues: int
+    attachments_copied: int = 0
+    attachments_deduplicated: int = 0
+    attachments_failed: int = 0
+    attachment_bytes: int = 0
     notes: list[str]
+    pipeline: dict[str, float] = Field(default_factory=dict)
+    timings: dict[str, float] = Field(
+        default_factory=dict, description="Seconds per phase (extract, transform, load, mapping_write) and total"
+    )
+    error: str | None = None
 
 
 class MigrationResult(BaseModel):
     run_id: str
     dry_run: bool
     projects: list[ProjectMigrationResult]
+    links_created: int = 0
+    links_pending: int = 0
+    metadata_cache: dict[str, float] = Field(default_factory=dict)
+    users: dict[str, int] = Field(default_factory=dict)
+    rate_limits: dict[str, dict[str, float]] = Field(default_factory=dict)
+
+
+class ValidationRequest(MigrationRequest):
+    sample_size: int | None = Field(
+        None, ge=1, description="Compare this many randomly chosen mapped issues instead of whole projects"
+    )
+    max_reported_items: int = Field(1000, ge=0, description="Differences listed per project; all are counted")
+
+
+class IssueDifference(BaseModel):
+    kind: str = Field(..., description="missing (not in DC), extra (only in DC) or mismatched")
+    cloud_issue_key: str | None = None
+    dc_issue_key: str | None = None
+    fields: list[str] = Field(default_factory=list, description="Compared fields that differ")
+
+
+class ProjectValidationResult(BaseModel):
+    source_project_key: str
+    target_project_key: str | None = None
+    sampled: bool = False
+    cloud_issues: int = 0
+    dc_issues: int = 0
+    compared: int = 0
+    matched: int = 0
+    missing: int = 0
+    extra: int = 0
+    mismatched: int = 0
+    mismatched_fields: dict[str, int] = Field(default_factory=dict)
+    items: list[IssueDifference] = Field(default_factory=list)
+    items_truncated: bool = False
+    timings: dict[str, float] = Field(default_factory=dict)
+    error: str | None = None
+
+
+class ValidationResult(BaseModel):
+    projects: list[ProjectValidationResult]
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    run_id: str | None = None
+    dry_run: bool
+    source_project_keys: list[str]
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    progress: dict[str, Any] = Field(default_factory=dict)
+    result: MigrationResult | None = None
+    error: str | None = None
+
+
+class RunEvent(BaseModel):
+    id: int
+    level: str
+    message: str
+    project_key: str | None = None
+    issue_key: str | None = None
+    phase: str | None = None
+    duration_s: float | None = None
+    error_class: str | None = None
+    created_at: str
+
+
+class RunEventsPage(BaseModel):
+    run_id: str
+    events: list[RunEvent]
+    next_after_id: int | None = Field(None, description="Pass as after_id for the next page; null on the last page")
+    events_total: int = Field(0, description="Events of the whole run, before filters")
+    errors_total: int = 0
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MigrationCancelled(Exception):
+    pass
+
+
+class MigrationProgress:
+    # Live counters shared between a running Migrator and whoever reports on it. Every update
+    # bumps `version` and wakes waiters, so streams can block (or await) until something changes.
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        # Event loops awaiting a change, woken from the worker threads.
+        self._listeners: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.cancel_event = threading.Event()
+        self.version = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expected_issues = 0
+        self.projects_total = 0
+        self.projects_done = 0
+        self.current_projects: Dict[str, int] = {}
+        self.issues_scanned = 0
+        self.issues_created = 0
+        self.issues_failed = 0
+        self.skipped_issues = 0
+        self.comments_created = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self.cancel_event.set()
+            self._changed()
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._cond.notify_all()
+        for loop, event in self._listeners:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the loop has closed; its waiter is gone
+
+    def start(self, projects_total: int) -> None:
+        with self._cond:
+            self.started_at = time.monotonic()
+            self.projects_total = projects_total
+            self._changed()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.finished_at = time.monotonic()
+            self._changed()
+
+    def expect(self, issues: int) -> None:
+        with self._cond:
+            self.expected_issues += issues
+            self._changed()
+
+    def project_started(self, project_key: str) -> None:
+        with self._cond:
+            self.current_projects[project_key] = 0
+            self._changed()
+
+    def project_finished(self, project_key: str) -> None:
+        with self._cond:
+            self.current_projects.pop(project_key, None)
+            self.projects_done += 1
+            self._changed()
+
+    def record(
+        self,
+        project_key: str = "",
+        scanned: int = 0,
+        created: int = 0,
+        failed: int = 0,
+        skipped: int = 0,
+        comments: int = 0,
+    ) -> None:
+        with self._cond:
+            self.issues_scanned += scanned
+            self.issues_created += created
+            self.issues_failed += failed
+            self.skipped_issues += skipped
+            self.comments_created += comments
+            if project_key in self.current_projects:
+                self.current_projects[project_key] += scanned
+            self._changed()
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+    async def wait_for_change_async(self, version: int, timeout: float) -> int:
+        listener = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self.version != version:
+                return self.version
+            self._listeners.append(listener)
+        try:
+            await asyncio.wait_for(listener[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._listeners.remove(listener)
+        return self.version
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            end = self.finished_at or time.monotonic()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            scanned_per_s = self.issues_scanned / elapsed if elapsed > 0 else 0.0
+            created_per_s = self.issues_created / elapsed if elapsed > 0 else 0.0
+            remaining = max(0, self.expected_issues - self.issues_scanned)
+            eta_s = remaining / scanned_per_s if scanned_per_s > 0 and self.expected_issues else None
+            return {
+                "version": self.version,
+                "elapsed_s": round(elapsed, 1),
+                "projects_total": self.projects_total,
+                "projects_done": self.projects_done,
+                "current_projects": dict(self.current_projects),
+                "expected_issues": self.expected_issues,
+                "issues_scanned": self.issues_scanned,
+                "issues_created": self.issues_created,
+                "issues_failed": self.issues_failed,
+                "skipped_issues": self.skipped_issues,
+                "comments_created": self.comments_created,
+                "issues_scanned_per_s": round(scanned_per_s, 2),
+                "issues_created_per_s": round(created_per_s, 2),
+                "eta_s": round(eta_s, 1) if eta_s is not None and not self.finished_at else None,
+                "cancel_requested": self.cancelled,
+            }
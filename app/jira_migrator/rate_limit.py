@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Mapping, Optional
+
+
+# Token bucket whose refill rate follows AIMD. One instance is shared per host, so a 429 seen by
+# any client or thread slows every caller down instead of each one backing off on its own.
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        initial_rate: float = 10.0,
+        min_rate: float = 0.5,
+        max_rate: float = 100.0,
+        additive_increase: float = 0.5,
+        decrease_factor: float = 0.5,
+        burst: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._tokens = burst
+        self._last_refill = clock()
+        self._paused_until = 0.0
+        # When the rate was last cut; signals from requests issued before then belong to that episode.
+        self._decreased_at = float("-inf")
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1 - 1e-9:
+                    self._tokens -= 1
+                    self.requests += 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self._rate
+            self._sleep(delay)
+            waited += delay
+
+    def now(self) -> float:
+        return self._clock()
+
+    def _decrease(self, factor: float, issued_at: Optional[float]) -> None:
+        # Called with self._lock held. The requests in flight when the server pushed back all
+        # report it; only the first report of an episode cuts the rate, so N concurrent 429s
+        # count once instead of compounding N times.
+        now = self._clock()
+        if (issued_at is not None and issued_at <= self._decreased_at) or now < self._paused_until:
+            return
+        self._rate = max(self.min_rate, self._rate * factor)
+        self._decreased_at = now
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None, issued_at: Optional[float] = None) -> None:
+        # issued_at is the limiter's now() when the request was sent.
+        with self._lock:
+            if headers is not None and _near_limit(headers):
+                self._decrease(1 - (1 - self.decrease_factor) / 2, issued_at)
+            else:
+                self._rate = min(self.max_rate, self._rate + self.additive_increase / max(self._rate, 1.0))
+
+    def set_max_rate(self, max_rate: float) -> None:
+        with self._lock:
+            self.max_rate = max_rate
+            self._rate = max(self.min_rate, min(self._rate, max_rate))
+
+    def on_throttle(self, retry_after_s: Optional[float] = None, issued_at: Optional[float] = None) -> None:
+        with self._lock:
+            self.throttled += 1
+            self._decrease(self.decrease_factor, issued_at)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after_s:
+                self._paused_until = max(self._paused_until, self._clock() + retry_after_s)
+
+    def sleep(self, seconds: float) -> None:
+        self._sleep(seconds)
+
+    def on_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self._rate, 3),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retries": self.retries,
+            }
+
+
+class ByteRateLimiter:
+    # Bandwidth cap shared by every transfer that calls consume(); a chunk may overdraw the
+    # bucket, and the debt is slept off before the next one, so large chunks still average out.
+    def __init__(
+        self,
+        bytes_per_second: float,
+        burst_bytes: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.bytes_per_second = bytes_per_second
+        self.burst_bytes = burst_bytes if burst_bytes is not None else bytes_per_second
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst_bytes
+        self._last_refill = clock()
+
+    def consume(self, size: int) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst_bytes, self._tokens + (now - self._last_refill) * self.bytes_per_second)
+            self._last_refill = now
+            self._tokens -= size
+            delay = -self._tokens / self.bytes_per_second if self._tokens < 0 else 0.0
+        if delay:
+            self._sleep(delay)
+        return delay
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_backoff_s: float = 1.0,
+        max_backoff_s: float = 60.0,
+        jitter: float = 0.5,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.jitter = jitter
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int, retry_after_s: Optional[float] = None) -> float:
+        if retry_after_s is not None:
+            base = retry_after_s
+        else:
+            base = self.base_backoff_s * (2**attempt)
+        base = min(base, self.max_backoff_s)
+        return base + base * self.jitter * self._rng.random()
+
+
+def parse_retry_after(headers: Mapping[str, str], now: Optional[datetime] = None) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                when = None
+            if when is not None:
+                return _seconds_until(when, now)
+
+    reset = headers.get("X-RateLimit-Reset")
+    if reset and headers.get("X-RateLimit-Remaining", "").strip() == "0":
+        try:
+            when = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return _seconds_until(when, now)
+    return None
+
+
+def _seconds_until(when: datetime, now: Optional[datetime]) -> float:
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def _near_limit(headers: Mapping[str, str]) -> bool:
+    if headers.get("X-RateLimit-NearLimit", "").lower() == "true":
+        return True
+    remaining = headers.get("X-RateLimit-Remaining")
+    limit = headers.get("X-RateLimit-Limit")
+    try:
+        return remaining is not None and limit is not None and int(remaining) * 10 < int(limit)
+    except ValueError:
+        return False
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for_host(host: str, **kwargs: float) -> AdaptiveRateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(**kwargs)
+            _limiters[host] = limiter
+        elif "max_rate" in kwargs and kwargs["max_rate"] != limiter.max_rate:
+            # The latest client's cap applies to every caller of the host from now on.
+            limiter.set_max_rate(kwargs["max_rate"])
+        return limiter
+
+
+def limiter_snapshots() -> Dict[str, Dict[str, float]]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {host: limiter.snapshot() for host, limiter in limiters.items()}
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class Shard(NamedTuple):
+    shard_id: int
+    run_id: str
+    project_key: str
+    # JQL appended to the project scope, e.g. ' AND created >= "2024/01/01 00:00"'
+    clause: str
+    attempts: int
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ShardQueue:
+    # Shards of a sharded run, shared by every worker process that points at the same database.
+    # A claim is a lease that runs out after `lease_s` unless the holder heartbeats; an expired
+    # lease can be claimed by any worker, so the shards of a crashed worker are picked up again.
+    # Leases compare wall-clock time, so workers on several nodes need synchronized clocks.
+    #
+    # The queue has its own connection and commits every call at once, unlike MappingStore's
+    # batched writes; a subclass can keep the same interface on another backend.
+    def __init__(
+        self,
+        db_path: str,
+        lease_s: float = 120.0,
+        max_attempts: int = 3,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS shard_queue (
+                shard_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                project_key TEXT NOT NULL,
+                clause TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_shard_queue_claim ON shard_queue(run_id, status, lease_expires);
+            """
+        )
+
+    @contextmanager
+    def _immediate(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes cannot claim one shard.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, run_id: str, project_key: str, clauses: List[str]) -> int:
+        with self._immediate() as conn:
+            existing = conn.execute(
+                "SELECT COUNT(*) FROM shard_queue WHERE run_id = ? AND project_key = ?", (run_id, project_key)
+            ).fetchone()[0]
+            if existing:
+                return 0
+            conn.executemany(
+                "INSERT INTO shard_queue(run_id, project_key, clause) VALUES(?, ?, ?)",
+                [(run_id, project_key, clause) for clause in clauses],
+            )
+        return len(clauses)
+
+    def claim(self, run_id: str, owner: str) -> Optional[Shard]:
+        now = self._clock()
+        with self._immediate() as conn:
+            # A shard whose worker died on every attempt (out of memory, killed) fails for good
+            # instead of being handed to the next worker forever.
+            conn.execute(
+                "UPDATE shard_queue SET status = ?, error = ?, owner = NULL, lease_expires = NULL, "
+                "updated_at = CURRENT_TIMESTAMP "
+                "WHERE run_id = ? AND status = ? AND lease_expires < ? AND attempts >= ?",
+                (
+                    FAILED,
+                    f"lease expired on all {self.max_attempts} attempt(s)",
+                    run_id,
+                    LEASED,
+                    now,
+                    self.max_attempts,
+                ),
+            )
+            row = conn.execute(
+                "SELECT shard_id, project_key, clause, attempts FROM shard_queue "
+                "WHERE run_id = ? AND (status = ? OR (status = ? AND lease_expires < ? AND attempts < ?)) "
+                "ORDER BY shard_id LIMIT 1",
+                (run_id, PENDING, LEASED, now, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE shard_queue SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = CURRENT_TIMESTAMP WHERE shard_id = ?",
+                (LEASED, owner, now + self.lease_s, row["shard_id"]),
+            )
+        return Shard(row["shard_id"], run_id, row["project_key"], row["clause"], row["attempts"] + 1)
+
+    def heartbeat(self, shard: Shard, owner: str) -> bool:
+        # False once the lease is gone: it expired and another worker claimed the shard.
+        with self._immediate() as conn:
+            updated = conn.execute(
+                "UPDATE shard_queue SET lease_expires = ?, updated_at = CURRENT_TIMESTAMP "
+                "WHERE shard_id = ? AND status = ? AND owner = ?",
+                (self._clock() + self.lease_s, shard.shard_id, LEASED, owner),
+            ).rowcount
+        return updated == 1
+
+    def complete(self, shard: Shard, owner: str, result: str) -> bool:
+        with self._immediate() as conn:
+            updated = conn.execute(
+                "UPDATE shard_queue SET status = ?, result = ?, error = NULL, lease_expires = NULL, "
+                "updated_at = CURRENT_TIMESTAMP WHERE shard_id = ? AND status = ? AND owner = ?",
+                (DONE, result, shard.shard_id, LEASED, owner),
+            ).rowcount
+        return updated == 1
+
+    def fail(self, shard: Shard, owner: str, error: str) -> None:
+        # Back to pending for another attempt, or failed for good after max_attempts.
+        status = FAILED if shard.attempts >= self.max_attempts else PENDING
+        with self._immediate() as conn:
+            conn.execute(
+                "UPDATE shard_queue SET status = ?, error = ?, owner = NULL, lease_expires = NULL, "
+                "updated_at = CURRENT_TIMESTAMP WHERE shard_id = ? AND status = ? AND owner = ?",
+                (status, error, shard.shard_id, LEASED, owner),
+            )
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM shard_queue WHERE run_id = ? GROUP BY status", (run_id,)
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def unfinished(self, run_id: str) -> int:
+        counts = self.counts(run_id)
+        return counts.get(PENDING, 0) + counts.get(LEASED, 0)
+
+    def shards(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shard_id, project_key, clause, status, attempts, result, error FROM shard_queue "
+                "WHERE run_id = ? ORDER BY shard_id",
+                (run_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LeaseKeeper:
+    # Heartbeats a claimed shard from a background thread; `on_lost` runs once if the lease is
+    # taken over, so the worker can stop instead of duplicating another worker's progress.
+    def __init__(self, queue: ShardQueue, shard: Shard, owner: str, on_lost: Callable[[], None]) -> None:
+        self.queue = queue
+        self.shard = shard
+        self.owner = owner
+        self.on_lost = on_lost
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{shard.shard_id}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.queue.lease_s / 3):
+            try:
+                alive = self.queue.heartbeat(self.shard, self.owner)
+            except sqlite3.Error:
+                continue
+            if not alive:
+                self.lost = True
+                self.on_lost()
+                return
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
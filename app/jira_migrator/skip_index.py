@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Iterable, Set
+
+
+class IssueKeyIndex:
+    # Membership set for the Cloud keys of one project, stored as a bitmap over issue numbers
+    # (one bit per number, ~125 KB per million issues). Keys that do not look like
+    # "<PROJECT>-<n>", e.g. after a project key change, fall back to a plain set.
+    def __init__(self, project_key: str, keys: Iterable[str] = ()) -> None:
+        self.prefix = f"{project_key}-"
+        self._bits = bytearray()
+        self._other: Set[str] = set()
+        self._count = 0
+        for key in keys:
+            self.add(key)
+
+    def _number(self, key: str) -> int:
+        if key.startswith(self.prefix):
+            tail = key[len(self.prefix) :]
+            if tail.isdigit():
+                return int(tail)
+        return -1
+
+    def add(self, key: str) -> bool:
+        number = self._number(key)
+        if number < 0:
+            if key in self._other:
+                return False
+            self._other.add(key)
+            self._count += 1
+            return True
+
+        byte, bit = divmod(number, 8)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        mask = 1 << bit
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        self._count += 1
+        return True
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        number = self._number(key)
+        if number < 0:
+            return key in self._other
+        byte, bit = divmod(number, 8)
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << bit))
+
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+def snapshot_root(base_dir: str, site_url: str, project_key: str, scope: str) -> Path:
+    host = urlparse(site_url).netloc or site_url
+    scope_hash = hashlib.sha1(scope.encode("utf-8")).hexdigest()[:10]
+    safe_host = "".join(c if c.isalnum() or c in ".-" else "_" for c in host)
+    return Path(base_dir) / safe_host / f"{project_key}-{scope_hash}"
+
+
+class ExtractionSnapshot:
+    # Append-only gzip JSONL of Cloud issues (with their comments inline) plus a small SQLite
+    # index of key -> (updated, line). A changed issue is appended again and the index points at
+    # the newest line, so readers skip stale copies without rewriting the data file. The index
+    # and the data file length are committed when a writer closes: bytes past the recorded length
+    # (a crash mid-write) are cut off by the next writer, and a fill that never finished is
+    # started over.
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        root.mkdir(parents=True, exist_ok=True)
+        self.data_path = root / "issues.jsonl.gz"
+        self._db = sqlite3.connect(str(root / "index.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS issues (
+                    issue_key TEXT PRIMARY KEY,
+                    updated TEXT,
+                    line INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _meta(self, name: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, name: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta(name, value) VALUES(?, ?)", (name, value))
+
+    @property
+    def complete(self) -> bool:
+        return self._meta("complete") == "1"
+
+    @property
+    def taken_at(self) -> Optional[datetime]:
+        value = self._meta("taken_at")
+        return datetime.fromisoformat(value) if value else None
+
+    @property
+    def line_count(self) -> int:
+        return int(self._meta("lines") or 0)
+
+    def issue_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM issues").fetchone()[0]
+
+    def project(self) -> Optional[Dict[str, Any]]:
+        value = self._meta("project")
+        return json.loads(value) if value else None
+
+    def set_project(self, project: Dict[str, Any]) -> None:
+        with self._db:
+            self._set_meta("project", json.dumps(project))
+
+    def reset(self) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM issues")
+            self._db.execute("DELETE FROM meta WHERE name != 'project'")
+        if self.data_path.exists():
+            self.data_path.unlink()
+
+    def _indexed_updated(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        found: Dict[str, Optional[str]] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = self._db.execute(
+                f"SELECT issue_key, updated FROM issues WHERE issue_key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update((row["issue_key"], row["updated"]) for row in rows)
+        return found
+
+    @contextmanager
+    def writer(self, taken_at: Optional[datetime] = None) -> Iterator["SnapshotWriter"]:
+        size = int(self._meta("size") or 0)
+        if self.data_path.exists() and self.data_path.stat().st_size != size:
+            with open(self.data_path, "r+b") as raw:
+                raw.truncate(size)
+        writer = SnapshotWriter(self, self.line_count, taken_at or datetime.now(timezone.utc))
+        try:
+            yield writer
+        finally:
+            writer.close()
+
+    def _commit_append(self, writer: "SnapshotWriter") -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO issues(issue_key, updated, line) VALUES(?, ?, ?)", writer.index_rows
+            )
+            self._set_meta("lines", str(writer.next_line))
+            self._set_meta("size", str(self.data_path.stat().st_size if self.data_path.exists() else 0))
+            if writer.finished:
+                self._set_meta("taken_at", writer.taken_at.isoformat())
+                self._set_meta("complete", "1")
+
+    def iter_pages(self, page_size: int) -> Iterator[List[Dict[str, Any]]]:
+        lines = self.line_count
+        if not lines or not self.data_path.exists():
+            return
+        latest = bytearray((lines + 7) // 8)
+        for (line,) in self._db.execute("SELECT line FROM issues"):
+            latest[line >> 3] |= 1 << (line & 7)
+
+        page: List[Dict[str, Any]] = []
+        with gzip.open(self.data_path, "rt", encoding="utf-8") as handle:
+            try:
+                for line_no, raw in enumerate(handle):
+                    if line_no >= lines:
+                        break
+                    if not latest[line_no >> 3] & (1 << (line_no & 7)):
+                        continue
+                    page.append(json.loads(raw))
+                    if len(page) >= page_size:
+                        yield page
+                        page = []
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                pass
+        if page:
+            yield page
+
+
+class SnapshotWriter:
+    def __init__(self, snapshot: ExtractionSnapshot, first_line: int, taken_at: datetime) -> None:
+        self.snapshot = snapshot
+        self.taken_at = taken_at
+        self.next_line = first_line
+        self.index_rows: List[Tuple[str, Optional[str], int]] = []
+        self.appended = 0
+        self.finished = False
+        self._handle = gzip.open(snapshot.data_path, "at", encoding="utf-8", compresslevel=6)
+
+    def append(self, issues: Iterable[Dict[str, Any]]) -> int:
+        issues = list(issues)
+        known = self.snapshot._indexed_updated([issue["key"] for issue in issues])
+        written = 0
+        for issue in issues:
+            key = issue["key"]
+            updated = (issue.get("fields") or {}).get("updated")
+            if key in known and updated is not None and known[key] == updated:
+                continue
+            self._handle.write(json.dumps(issue, separators=(",", ":")))
+            self._handle.write("\n")
+            self.index_rows.append((key, updated, self.next_line))
+            self.next_line += 1
+            written += 1
+        self.appended += written
+        return written
+
+    def mark_finished(self) -> None:
+        self.finished = True
+
+    def close(self) -> None:
+        self._handle.close()
+        self.snapshot._commit_append(self)
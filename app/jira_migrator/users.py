@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import csv
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .jira_client import JiraClient, safe_get
+from .mapping_store import MappingStore
+
+# Cloud's bulk user endpoint accepts this many accountId parameters per request.
+CLOUD_USER_BATCH = 90
+
+
+def people_in(issues: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Assignee, reporter and inline comment authors: every Cloud user a page of issues refers to.
+    people: List[Dict[str, Any]] = []
+    for issue in issues:
+        fields = issue.get("fields") or {}
+        people.extend(person for person in (fields.get("assignee"), fields.get("reporter")) if person)
+        people.extend(c["author"] for c in safe_get(fields, "comment", "comments") or [] if c.get("author"))
+    return people
+
+
+def load_user_map_file(path: str) -> Dict[str, str]:
+    # Two columns per row: a Cloud accountId or email address, and the DC username.
+    mapping: Dict[str, str] = {}
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.reader(handle):
+            if len(row) < 2 or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            source, username = row[0].strip(), row[1].strip()
+            mapping[source.lower() if "@" in source else source] = username
+    return mapping
+
+
+class UserResolver:
+    # Maps Cloud accountIds to DC usernames once per person rather than once per issue. A whole
+    # page is resolved together: known ids come from memory, the rest from one user_map read,
+    # and only ids never seen before cost requests (one Cloud bulk call per batch for emails the
+    # search did not return, then one DC search per email). Ids that cannot be mapped are stored
+    # with no username, so later pages and later runs do not look them up again.
+    def __init__(
+        self,
+        cloud: JiraClient,
+        dc: JiraClient,
+        store: MappingStore,
+        mapping: Optional[Dict[str, str]] = None,
+        log: Optional[Callable[..., None]] = None,
+    ) -> None:
+        self.cloud = cloud
+        self.dc = dc
+        self.store = store
+        self.mapping = mapping or {}
+        self._log = log or (lambda level, message, **fields: None)
+        self._lock = threading.Lock()
+        # Remote lookups are serialized so two projects never resolve the same new id twice.
+        self._lookup_lock = threading.Lock()
+        self._known: Dict[str, Optional[str]] = {}
+        self.cloud_lookups = 0
+        self.dc_lookups = 0
+
+    def _unknown(self, account_ids: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [account_id for account_id in dict.fromkeys(account_ids) if account_id not in self._known]
+
+    def _remember(self, resolved: Dict[str, Optional[str]]) -> None:
+        with self._lock:
+            self._known.update(resolved)
+
+    def resolve(self, people: Iterable[Dict[str, Any]]) -> None:
+        people = list(people)
+        emails: Dict[str, str] = {}
+        for person in people:
+            if person.get("accountId") and person.get("emailAddress"):
+                emails[person["accountId"]] = person["emailAddress"]
+        unknown = self._unknown(person.get("accountId", "") for person in people if person.get("accountId"))
+        if not unknown:
+            return
+        with self._lookup_lock:
+            unknown = self._unknown(unknown)
+            if not unknown:
+                return
+            resolved: Dict[str, Optional[str]] = {
+                account_id: self.mapping[account_id] for account_id in unknown if account_id in self.mapping
+            }
+            stored = self.store.get_user_maps([account_id for account_id in unknown if account_id not in resolved])
+            resolved.update(stored)
+            remaining = [account_id for account_id in unknown if account_id not in resolved]
+            missing_email = [account_id for account_id in remaining if account_id not in emails]
+            failed: Set[str] = set()
+            for start in range(0, len(missing_email), CLOUD_USER_BATCH):
+                chunk = missing_email[start : start + CLOUD_USER_BATCH]
+                self.cloud_lookups += 1
+                try:
+                    users = self.cloud.get_users_cloud(chunk)
+                except Exception as exc:
+                    # Not cached: these ids are retried on a later page instead of marked unmappable.
+                    message = f"Cloud user lookup failed: {type(exc).__name__}: {exc}"
+                    self._log("error", message, phase="users", error=exc)
+                    failed.update(chunk)
+                    continue
+                emails.update((u["accountId"], u["emailAddress"]) for u in users if u.get("emailAddress"))
+            found: Dict[str, Optional[str]] = {}
+            for account_id in remaining:
+                if account_id in failed:
+                    continue
+                email = emails.get(account_id)
+                try:
+                    found[account_id] = self._dc_username(email) if email else None
+                except Exception as exc:
+                    message = f"DC user search for {email} failed: {type(exc).__name__}: {exc}"
+                    self._log("error", message, phase="users", error=exc)
+            self.store.set_user_maps(found.items())
+            resolved.update(found)
+            self._remember(resolved)
+
+    def _dc_username(self, email: str) -> Optional[str]:
+        mapped = self.mapping.get(email.lower())
+        if mapped:
+            return mapped
+        self.dc_lookups += 1
+        users = self.dc.find_users_dc(email)
+        matches = [u for u in users if (u.get("emailAddress") or "").lower() == email.lower() and u.get("name")]
+        # An email shared by several DC accounts is ambiguous; leave those people unassigned.
+        return matches[0]["name"] if len(matches) == 1 else None
+
+    def username(self, person: Optional[Dict[str, Any]]) -> Optional[str]:
+        account_id = (person or {}).get("accountId")
+        if not account_id:
+            return None
+        with self._lock:
+            if account_id in self._known:
+                return self._known[account_id]
+        self.resolve([person or {}])
+        with self._lock:
+            return self._known.get(account_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            mapped = sum(1 for username in self._known.values() if username)
+            return {
+                "mapped": mapped,
+                "unmapped": len(self._known) - mapped,
+                "cloud_lookups": self.cloud_lookups,
+                "dc_lookups": self.dc_lookups,
+            }
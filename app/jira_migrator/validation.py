@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+
+from .adf import adf_to_wiki
+from .jira_client import JiraAuth, JiraClient, safe_get
+from .mapping_store import MappingStore
+from .migrator import CLOUD_KEY_LABEL_PREFIX
+from .models import IssueDifference, ProjectValidationResult, ValidationRequest, ValidationResult
+from .pipeline import Prefetcher
+from .rate_limit import RetryPolicy
+
+COMPARED_FIELDS = ("summary", "description", "labels", "priority", "comments")
+VALIDATION_FIELDS = ["summary", "description", "labels", "priority", "comment"]
+_DIGEST_SIZE = 8
+_KEYS_PER_SEARCH = 100
+_SPILL_FETCH = 1000
+_WHITESPACE = re.compile(r"\s+")
+
+# (Cloud key, DC key, digest)
+DigestRow = Tuple[str, Optional[str], bytes]
+Pages = Iterator[List[Dict[str, Any]]]
+
+
+def _normalize(text: Optional[str]) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def issue_digest(
+    summary: Optional[str], description: Optional[str], labels: Iterable[str], priority: Optional[str], comments: int
+) -> bytes:
+    # One short hash per compared field, so a mismatch can name the fields that differ.
+    parts = (
+        _normalize(summary),
+        _normalize(description),
+        "\n".join(sorted(label for label in labels if not label.startswith(CLOUD_KEY_LABEL_PREFIX))),
+        (priority or "").lower(),
+        str(comments),
+    )
+    return b"".join(hashlib.blake2b(part.encode("utf-8"), digest_size=_DIGEST_SIZE).digest() for part in parts)
+
+
+def differing_fields(cloud_digest: bytes, dc_digest: bytes) -> List[str]:
+    return [
+        name
+        for index, name in enumerate(COMPARED_FIELDS)
+        if cloud_digest[index * _DIGEST_SIZE : (index + 1) * _DIGEST_SIZE]
+        != dc_digest[index * _DIGEST_SIZE : (index + 1) * _DIGEST_SIZE]
+    ]
+
+
+def _comment_count(fields: Dict[str, Any]) -> int:
+    comment = fields.get("comment")
+    if not isinstance(comment, dict):
+        return 0
+    return int(comment.get("total", len(comment.get("comments") or [])))
+
+
+def _stamped_key(issue: Dict[str, Any]) -> Optional[str]:
+    for label in safe_get(issue, "fields", "labels") or []:
+        if label.startswith(CLOUD_KEY_LABEL_PREFIX):
+            return label[len(CLOUD_KEY_LABEL_PREFIX) :]
+    return None
+
+
+class HashSpill:
+    # Per-issue digests of one side in a throwaway SQLite file, read back in Cloud key order:
+    # a project of any size is compared holding a few pages in memory.
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript(
+            """
+            CREATE TABLE digest (
+                cloud_issue_key TEXT PRIMARY KEY,
+                dc_issue_key TEXT,
+                digest BLOB NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE TABLE unmapped (
+                dc_issue_key TEXT PRIMARY KEY,
+                stamped_cloud_key TEXT
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def _insert(self, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+        if not rows:
+            return
+        self._conn.execute("BEGIN")
+        self._conn.executemany(sql, rows)
+        self._conn.execute("COMMIT")
+
+    def add(self, rows: Sequence[DigestRow]) -> None:
+        # A key seen twice (offset paging can shift) keeps its last digest.
+        self._insert("INSERT OR REPLACE INTO digest VALUES(?, ?, ?)", rows)
+
+    def add_unmapped(self, rows: Sequence[Tuple[str, Optional[str]]]) -> None:
+        self._insert("INSERT OR REPLACE INTO unmapped VALUES(?, ?)", rows)
+
+    def _iter(self, sql: str) -> Iterator[Any]:
+        cursor = self._conn.execute(sql)
+        while True:
+            rows = cursor.fetchmany(_SPILL_FETCH)
+            if not rows:
+                return
+            yield from rows
+
+    def __iter__(self) -> Iterator[DigestRow]:
+        return self._iter("SELECT cloud_issue_key, dc_issue_key, digest FROM digest ORDER BY cloud_issue_key")
+
+    def iter_unmapped(self) -> Iterator[Tuple[str, Optional[str]]]:
+        return self._iter("SELECT dc_issue_key, stamped_cloud_key FROM unmapped ORDER BY dc_issue_key")
+
+    def count(self) -> int:
+        digests = self._conn.execute("SELECT COUNT(*) FROM digest").fetchone()[0]
+        return digests + self._conn.execute("SELECT COUNT(*) FROM unmapped").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def merge_digests(
+    cloud_rows: Iterable[DigestRow], dc_rows: Iterable[DigestRow]
+) -> Iterator[Tuple[str, str, Optional[str], List[str]]]:
+    # Merge join of two streams sorted by Cloud key -> (kind, Cloud key, DC key, differing fields),
+    # kind being matched, mismatched, missing (Cloud only) or extra (DC only).
+    cloud_iter, dc_iter = iter(cloud_rows), iter(dc_rows)
+    cloud_row, dc_row = next(cloud_iter, None), next(dc_iter, None)
+    while cloud_row is not None or dc_row is not None:
+        if cloud_row is not None and (dc_row is None or cloud_row[0] < dc_row[0]):
+            yield "missing", cloud_row[0], None, []
+            cloud_row = next(cloud_iter, None)
+        elif dc_row is not None and (cloud_row is None or dc_row[0] < cloud_row[0]):
+            yield "extra", dc_row[0], dc_row[1], []
+            dc_row = next(dc_iter, None)
+        elif cloud_row is not None and dc_row is not None:
+            fields = differing_fields(cloud_row[2], dc_row[2])
+            yield ("mismatched" if fields else "matched"), cloud_row[0], dc_row[1], fields
+            cloud_row, dc_row = next(cloud_iter, None), next(dc_iter, None)
+
+
+class MigrationValidator:
+    # Post-migration check: streams both sides in parallel, hashes the compared fields of each
+    # issue, joins the two through issue_map and reports missing, extra and mismatched issues.
+    def __init__(self, request: ValidationRequest) -> None:
+        self.request = request
+        self.store = MappingStore(request.db_path)
+        pool_size = max(10, 2 * request.parallel_projects)
+        request_slots = threading.BoundedSemaphore(request.max_concurrent_requests)
+        retry_policy = RetryPolicy(max_retries=request.max_retries, max_backoff_s=request.max_backoff_s)
+        self.cloud = JiraClient(
+            request.cloud_base_url,
+            JiraAuth(request.cloud_user, request.cloud_token),
+            pool_maxsize=pool_size,
+            retry_policy=retry_policy,
+            max_requests_per_second=request.max_requests_per_second,
+            request_slots=request_slots,
+        )
+        self.dc = JiraClient(
+            request.dc_base_url,
+            JiraAuth(request.dc_user, request.dc_token),
+            pool_maxsize=pool_size,
+            retry_policy=retry_policy,
+            max_requests_per_second=request.max_requests_per_second,
+            request_slots=request_slots,
+        )
+        self._dc_username: Callable[[str], Optional[str]] = lru_cache(maxsize=10_000)(self._lookup_username)
+        self._dc_priority: Callable[[str], str] = lru_cache(maxsize=1_000)(self._lookup_priority)
+
+    def _lookup_username(self, account_id: str) -> Optional[str]:
+        return self.store.get_user_maps([account_id]).get(account_id)
+
+    def _lookup_priority(self, name: str) -> str:
+        return self.store.get_field_map(f"priority:{name}") or name
+
+    def _mention(self, attrs: Dict[str, Any]) -> Optional[str]:
+        return self._dc_username(attrs["id"]) if attrs.get("id") else None
+
+    def _cloud_digest(self, issue: Dict[str, Any]) -> bytes:
+        # Normalized the way the migrator writes an issue to DC.
+        fields = issue.get("fields") or {}
+        description = fields.get("description")
+        priority = safe_get(fields, "priority", "name")
+        return issue_digest(
+            fields.get("summary") or f"Migrated issue from {issue['key']}",
+            adf_to_wiki(description, mention=self._mention if self.request.migrate_users else None),
+            fields.get("labels") or [],
+            self._dc_priority(priority) if priority else None,
+            _comment_count(fields) if self.request.migrate_comments else 0,
+        )
+
+    def _dc_digest(self, issue: Dict[str, Any]) -> bytes:
+        fields = issue.get("fields") or {}
+        return issue_digest(
+            fields.get("summary"),
+            fields.get("description"),
+            fields.get("labels") or [],
+            safe_get(fields, "priority", "name"),
+            _comment_count(fields) if self.request.migrate_comments else 0,
+        )
+
+    def _cloud_pages(self, jql: str) -> Pages:
+        next_page_token: Optional[str] = None
+        while True:
+            page = self.cloud.search_issues_jql(
+                jql,
+                next_page_token=next_page_token,
+                max_results=self.request.issue_batch_size,
+                fields=VALIDATION_FIELDS,
+            )
+            issues = page.get("issues", [])
+            if issues:
+                yield issues
+            next_page_token = page.get("nextPageToken")
+            if not issues or page.get("isLast") or not next_page_token:
+                return
+
+    def _dc_pages(self, jql: str) -> Pages:
+        start_at = 0
+        while True:
+            page = self.dc.search_issues_dc(
+                jql, VALIDATION_FIELDS, start_at=start_at, max_results=self.request.issue_batch_size
+            )
+            issues = page.get("issues") or []
+            if issues:
+                yield issues
+            start_at += len(issues)
+            if not issues or start_at >= page.get("total", 0):
+                return
+
+    @staticmethod
+    def _keyed_pages(search: Callable[[str], Pages], scope: str, keys: List[str]) -> Pages:
+        # `key in (...)` is answered with a 400 when a listed key no longer exists; halving the
+        # chunk until the key is alone costs a few searches per deleted issue.
+        for start in range(0, len(keys), _KEYS_PER_SEARCH):
+            pending = [keys[start : start + _KEYS_PER_SEARCH]]
+            while pending:
+                chunk = pending.pop()
+                try:
+                    found = list(search(f"{scope} AND key in ({', '.join(chunk)})"))
+                except requests.HTTPError as exc:
+                    if getattr(exc.response, "status_code", None) != 400:
+                        raise
+                    if len(chunk) > 1:
+                        middle = len(chunk) // 2
+                        pending.extend([chunk[middle:], chunk[:middle]])
+                    continue
+                yield from found
+
+    def _prefetched(self, pages: Pages, name: str) -> Iterator[List[Dict[str, Any]]]:
+        if not self.request.prefetch_pages:
+            yield from pages
+            return
+        with Prefetcher(pages, self.request.prefetch_pages, name=name) as prefetched:
+            yield from prefetched
+
+    def _spill_cloud(self, spill: HashSpill, pages: Pages) -> None:
+        for issues in self._prefetched(pages, "validate-cloud"):
+            spill.add([(issue["key"], None, self._cloud_digest(issue)) for issue in issues])
+
+    def _spill_dc(self, spill: HashSpill, pages: Pages) -> None:
+        for issues in self._prefetched(pages, "validate-dc"):
+            cloud_keys = self.store.get_cloud_keys(issue["key"] for issue in issues)
+            mapped = [issue for issue in issues if issue["key"] in cloud_keys]
+            spill.add([(cloud_keys[issue["key"]], issue["key"], self._dc_digest(issue)) for issue in mapped])
+            unmapped = [issue for issue in issues if issue["key"] not in cloud_keys]
+            spill.add_unmapped([(issue["key"], _stamped_key(issue)) for issue in unmapped])
+
+    def _sample_keys(self, source_project_key: str) -> List[str]:
+        # Reservoir sample of the mapped keys: memory follows the sample size, not the project.
+        size = self.request.sample_size or 0
+        rng = random.Random()
+        sample: List[str] = []
+        for seen, key in enumerate(self.store.iter_issue_keys(source_project_key)):
+            if seen < size:
+                sample.append(key)
+            else:
+                slot = rng.randint(0, seen)
+                if slot < size:
+                    sample[slot] = key
+        return sample
+
+    def _report(
+        self,
+        result: ProjectValidationResult,
+        kind: str,
+        cloud_key: Optional[str],
+        dc_key: Optional[str],
+        fields: List[str],
+    ) -> None:
+        setattr(result, kind, getattr(result, kind) + 1)
+        for name in fields:
+            result.mismatched_fields[name] = result.mismatched_fields.get(name, 0) + 1
+        if len(result.items) < self.request.max_reported_items:
+            result.items.append(
+                IssueDifference(kind=kind, cloud_issue_key=cloud_key, dc_issue_key=dc_key, fields=fields)
+            )
+        else:
+            result.items_truncated = True
+
+    def _timed(self, timings: Dict[str, float], name: str, fn: Callable[..., None], *args: Any) -> None:
+        started = time.perf_counter()
+        try:
+            fn(*args)
+        finally:
+            timings[name] = round(time.perf_counter() - started, 3)
+
+    def validate_project(self, source_project_key: str) -> ProjectValidationResult:
+        started = time.perf_counter()
+        target_project_key = self.store.get_project_map(source_project_key)
+        if target_project_key is None:
+            return ProjectValidationResult(
+                source_project_key=source_project_key, error="no project mapping; migrate the project first"
+            )
+        sampled = self.request.sample_size is not None
+        result = ProjectValidationResult(
+            source_project_key=source_project_key, target_project_key=target_project_key, sampled=sampled
+        )
+        done_clause = "" if self.request.include_done else " AND statusCategory != Done"
+        cloud_scope = f"project = {source_project_key}{done_clause}"
+        dc_scope = f"project = {target_project_key}"
+        if sampled:
+            cloud_keys = self._sample_keys(source_project_key)
+            dc_keys = list(self.store.get_issue_maps(cloud_keys).values())
+            cloud_pages = self._keyed_pages(self._cloud_pages, cloud_scope, cloud_keys)
+            dc_pages = self._keyed_pages(self._dc_pages, dc_scope, dc_keys)
+        else:
+            cloud_pages = self._cloud_pages(f"{cloud_scope} ORDER BY key ASC")
+            dc_pages = self._dc_pages(f"{dc_scope} ORDER BY key ASC")
+
+        timings: Dict[str, float] = {}
+        with TemporaryDirectory(prefix="jira-validate-") as spill_dir:
+            cloud_spill = HashSpill(str(Path(spill_dir) / "cloud.sqlite3"))
+            dc_spill = HashSpill(str(Path(spill_dir) / "dc.sqlite3"))
+            try:
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    sides = [
+                        pool.submit(self._timed, timings, "cloud_s", self._spill_cloud, cloud_spill, cloud_pages),
+                        pool.submit(self._timed, timings, "dc_s", self._spill_dc, dc_spill, dc_pages),
+                    ]
+                    for side in sides:
+                        side.result()
+                merge_started = time.perf_counter()
+                for kind, cloud_key, dc_key, fields in merge_digests(cloud_spill, dc_spill):
+                    if kind in ("matched", "mismatched"):
+                        result.compared += 1
+                    if kind == "matched":
+                        result.matched += 1
+                        continue
+                    if kind == "missing":
+                        # Never migrated, or mapped to a DC issue that is gone.
+                        dc_key = self.store.get_issue_map(cloud_key)
+                    self._report(result, kind, cloud_key, dc_key, fields)
+                for dc_key, stamped_key in dc_spill.iter_unmapped():
+                    self._report(result, "extra", stamped_key, dc_key, [])
+                timings["merge_s"] = round(time.perf_counter() - merge_started, 3)
+                if sampled:
+                    result.cloud_issues = self.cloud.count_issues_cloud(cloud_scope)
+                    result.dc_issues = int(self.dc.search_issues_dc(dc_scope, [], max_results=0).get("total", 0))
+                else:
+                    result.cloud_issues, result.dc_issues = cloud_spill.count(), dc_spill.count()
+            finally:
+                cloud_spill.close()
+                dc_spill.close()
+        result.timings = {**timings, "total_s": round(time.perf_counter() - started, 3)}
+        return result
+
+    def _validate_isolated(self, source_project_key: str) -> ProjectValidationResult:
+        try:
+            return self.validate_project(source_project_key)
+        except Exception as exc:
+            return ProjectValidationResult(source_project_key=source_project_key, error=f"{type(exc).__name__}: {exc}")
+
+    def run(self) -> ValidationResult:
+        keys = list(dict.fromkeys(self.request.source_project_keys))
+        try:
+            with ThreadPoolExecutor(max_workers=self.request.parallel_projects) as pool:
+                return ValidationResult(projects=list(pool.map(self._validate_isolated, keys)))
+        finally:
+            self.store.close()
@@ -1,21 +1,44 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from jira_migrator.discovery import ProjectDiscoveryCache, fetch_projects, filter_projects
 from jira_migrator.jira_client import JiraAuth, JiraClient
+from jira_migrator.jobs import FINISHED_STATES, JobManager, MigrationJob
+from jira_migrator.mapping_store import RunLogReader
+from jira_migrator.metrics import REGISTRY
 from jira_migrator.migrator import Migrator
 from jira_migrator.models import (
     DiscoverProjectsRequest,
     DiscoverProjectsResponse,
+    JobStatus,
     MigrationRequest,
     MigrationResult,
+    ProjectSummary,
+    RunEvent,
+    RunEventsPage,
+    ValidationRequest,
+    ValidationResult,
 )
+from jira_migrator.validation import MigrationValidator
 
-app = FastAPI(title="Jira Cloud to DC Migrator", version="0.2.0")
+jobs = JobManager(max_workers=2)
+discovery_cache = ProjectDiscoveryCache(ttl_s=300.0)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    jobs.shutdown()
+
+
+app = FastAPI(title="Jira Cloud to DC Migrator", version="0.2.0", lifespan=lifespan)
 
 static_dir = Path(__file__).parent / "static"
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
@@ -31,25 +54,36 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/projects/discover", response_model=DiscoverProjectsResponse)
 def discover_projects(request: DiscoverProjectsRequest) -> DiscoverProjectsResponse:
-    try:
+    def fetch(include_issue_counts: bool) -> list[ProjectSummary]:
         cloud = JiraClient(request.cloud_base_url, JiraAuth(request.cloud_user, request.cloud_token))
-        projects = cloud.list_projects_cloud()
-        return DiscoverProjectsResponse(
-            projects=[
-                {
-                    "key": p.get("key", ""),
-                    "name": p.get("name", ""),
-                    "project_type_key": p.get("projectTypeKey", "unknown"),
-                    "style": p.get("style", "unknown"),
-                }
-                for p in projects
-                if p.get("key")
-            ]
+        return fetch_projects(cloud, include_issue_counts=include_issue_counts)
+
+    try:
+        discovered = discovery_cache.get(
+            request.cloud_base_url,
+            request.cloud_user,
+            request.cloud_token,
+            fetch,
+            include_issue_counts=request.include_issue_counts,
+            refresh=request.refresh,
         )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    matching = filter_projects(discovered.projects, request.query)
+    end = None if request.limit is None else request.offset + request.limit
+    return DiscoverProjectsResponse(
+        projects=matching[request.offset : end],
+        total=len(matching),
+        cached=discovered.cached,
+        fetched_at=discovered.fetched_at,
+    )
 
 
 @app.post("/api/migrate", response_model=MigrationResult)
@@ -59,3 +93,93 @@ def migrate(request: MigrationRequest) -> MigrationResult:
         return migrator.run()
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.post("/api/validate", response_model=ValidationResult)
+def validate(request: ValidationRequest) -> ValidationResult:
+    try:
+        return MigrationValidator(request).run()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+def _job_or_404(job_id: str) -> MigrationJob:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"unknown job {job_id}")
+    return job
+
+
+@app.post("/api/jobs", response_model=JobStatus, status_code=202)
+def create_job(request: MigrationRequest) -> JobStatus:
+    return jobs.submit(request).to_status()
+
+
+@app.get("/api/jobs", response_model=list[JobStatus])
+def list_jobs() -> list[JobStatus]:
+    return [job.to_status(include_result=False) for job in jobs.list()]
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str) -> JobStatus:
+    return _job_or_404(job_id).to_status()
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=JobStatus)
+def cancel_job(job_id: str) -> JobStatus:
+    _job_or_404(job_id)
+    return jobs.cancel(job_id).to_status()
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    job = _job_or_404(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        async for status in jobs.stream(job):
+            if status is None:
+                yield ": keep-alive\n\n"
+                continue
+            event = "done" if status.status in FINISHED_STATES else "progress"
+            yield f"event: {event}\ndata: {status.model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _db_path_for_run(run_id: str) -> str:
+    # Runs started through the API are looked up among the jobs; anything else (the CLI, a past
+    # process) is expected in the default database.
+    for job in jobs.list():
+        if job.run_id == run_id:
+            return job.request.db_path
+    return MigrationRequest.model_fields["db_path"].default
+
+
+@app.get("/api/runs/{run_id}/events", response_model=RunEventsPage)
+def run_events(
+    run_id: str,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    level: str | None = None,
+    project: str | None = None,
+    issue: str | None = None,
+    phase: str | None = None,
+) -> RunEventsPage:
+    db_path = _db_path_for_run(run_id)
+    if not Path(db_path).exists():
+        raise HTTPException(status_code=404, detail=f"unknown run {run_id}")
+    reader = RunLogReader(db_path)
+    try:
+        run = reader.run(run_id)
+        if run is None:
+            raise HTTPException(status_code=404, detail=f"unknown run {run_id}")
+        rows = reader.events(run_id, after_id, limit, level=level, project_key=project, issue_key=issue, phase=phase)
+    finally:
+        reader.close()
+    return RunEventsPage(
+        run_id=run_id,
+        events=[RunEvent(**row) for row in rows],
+        next_after_id=rows[-1]["id"] if len(rows) == limit else None,
+        events_total=run["events"],
+        errors_total=run["errors"],
+    )
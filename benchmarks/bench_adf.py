@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "app")]
+
+from jira_migrator.adf import adf_to_wiki  # noqa: E402
+
+
+def _text(value: str, *marks: str) -> Dict[str, Any]:
+    node: Dict[str, Any] = {"type": "text", "text": value}
+    if marks:
+        node["marks"] = [{"type": mark} for mark in marks]
+    return node
+
+
+def _block(n: int) -> List[Dict[str, Any]]:
+    # One of each node type the converter handles, roughly 1 KB of JSON.
+    words = f"line {n} with *stars* and [brackets] "
+    return [
+        {"type": "heading", "attrs": {"level": 3}, "content": [_text(f"Section {n}")]},
+        {
+            "type": "paragraph",
+            "content": [
+                _text(words * 2),
+                _text("bold", "strong"),
+                {"type": "mention", "attrs": {"id": f"acct-{n % 50}", "text": f"@user{n % 50}"}},
+                {"type": "hardBreak"},
+                _text("inline code", "code"),
+            ],
+        },
+        {
+            "type": "bulletList",
+            "content": [
+                {"type": "listItem", "content": [{"type": "paragraph", "content": [_text(f"item {n}.{i}")]}]}
+                for i in range(3)
+            ],
+        },
+        {"type": "codeBlock", "attrs": {"language": "python"}, "content": [_text(f"value = {n}\nprint(value)\n")]},
+        {
+            "type": "table",
+            "content": [
+                {
+                    "type": "tableRow",
+                    "content": [
+                        {"type": "tableCell", "content": [{"type": "paragraph", "content": [_text(f"r{r}c{c}")]}]}
+                        for c in range(3)
+                    ],
+                }
+                for r in range(2)
+            ],
+        },
+        {"type": "mediaSingle", "content": [{"type": "media", "attrs": {"id": f"m{n}", "alt": f"file{n}.png"}}]},
+    ]
+
+
+def make_document(target_bytes: int) -> Dict[str, Any]:
+    content: List[Dict[str, Any]] = []
+    size = 0
+    n = 0
+    while size < target_bytes:
+        blocks = _block(n)
+        content.extend(blocks)
+        size += len(json.dumps(blocks))
+        n += 1
+    return {"type": "doc", "version": 1, "content": content}
+
+
+def measure(document: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    mention = lambda attrs: attrs["id"].replace("acct-", "user.")  # noqa: E731
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        wiki = adf_to_wiki(document, mention=mention)
+        best = min(best, time.perf_counter() - started)
+    # Baseline: decoding the same document from the search response, which every issue pays anyway.
+    encoded = json.dumps(document)
+    decode = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        json.loads(encoded)
+        decode = min(decode, time.perf_counter() - started)
+    tracemalloc.start()
+    adf_to_wiki(document, mention=mention)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    input_bytes = len(encoded)
+    return {
+        "input_kb": round(input_bytes / 1024, 1),
+        "output_kb": round(len(wiki) / 1024, 1),
+        "ms": round(best * 1000, 3),
+        "us_per_kb": round(best * 1e6 / (input_bytes / 1024), 2),
+        "mb_per_s": round(input_bytes / best / 1e6, 1),
+        "x_json_decode": round(best / decode, 2),
+        # Peak allocation while converting, output string included.
+        "peak_alloc_over_output": round(peak / max(1, len(wiki)), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ADF to wiki markup conversion")
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[4, 64, 1024, 4096, 16384])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    for size_kb in args.sizes_kb:
+        report = measure(make_document(size_kb * 1024), args.repeat)
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print(
+                f"{report['input_kb']:>9.1f} KB  {report['ms']:>9.3f} ms  {report['us_per_kb']:>7.2f} us/KB  "
+                f"{report['mb_per_s']:>6.1f} MB/s  {report['x_json_decode']:>5.2f}x json decode  "
+                f"peak {report['peak_alloc_over_output']:>5.2f}x output"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "app"), str(ROOT / "tests")]
+
+from fake_jira import FakeJiraConfig, FakeJiraServer  # noqa: E402
+from jira_migrator.migrator import Migrator  # noqa: E402
+from jira_migrator.models import MigrationRequest  # noqa: E402
+from jira_migrator.rate_limit import limiter_for_host  # noqa: E402
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "serial": {"concurrency": 1, "parallel_projects": 1, "prefetch_pages": 0},
+    "concurrent": {"concurrency": 8, "parallel_projects": 2},
+    "bulk": {"concurrency": 8, "parallel_projects": 2, "bulk_create": True},
+    "throttled": {"concurrency": 8, "parallel_projects": 2, "_server_rps": 300},
+}
+
+
+def _serve(config: FakeJiraConfig, ports: "multiprocessing.Queue[int]", stop: Any) -> None:
+    with FakeJiraServer(config) as server:
+        ports.put(server.server_address[1])
+        stop.wait()
+
+
+@contextmanager
+def fake_jira_process(config: FakeJiraConfig) -> Iterator[Tuple[str, str]]:
+    # The server runs in its own process so peak RSS and CPU belong to the migrator alone.
+    ports: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(config, ports, stop), daemon=True)
+    process.start()
+    try:
+        port = ports.get(timeout=10)
+        yield f"http://127.0.0.1:{port}", f"http://localhost:{port}"
+    finally:
+        stop.set()
+        process.join(timeout=5)
+
+
+class RequestTimer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: List[float] = []
+
+    def wrap(self, session: Any) -> None:
+        original = session.request
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples.append(elapsed)
+
+        session.request = timed
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SqliteWriteCounter:
+    def __init__(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+    def __call__(self, sql: str) -> None:
+        head = sql.lstrip()[:6].upper()
+        if head in ("INSERT", "UPDATE", "DELETE", "REPLAC"):
+            self.statements += 1
+        elif head == "COMMIT":
+            self.commits += 1
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    options = dict(SCENARIOS[name])
+    keys = [f"P{n}" for n in range(args.projects)]
+    config = FakeJiraConfig(
+        projects={key: args.issues for key in keys},
+        comments_per_issue=args.comments,
+        latency_s=args.latency_ms / 1000,
+        latency_jitter_s=args.jitter_ms / 1000,
+        max_requests_per_second=options.pop("_server_rps", None),
+        retry_after_s=0.05,
+    )
+    with fake_jira_process(config) as (cloud_url, dc_url), tempfile.TemporaryDirectory() as tmp:
+        for url in (cloud_url, dc_url):
+            limiter_for_host(url.split("//", 1)[1], initial_rate=args.rate, max_rate=args.rate, burst=args.rate / 10)
+        request = MigrationRequest(
+            cloud_base_url=cloud_url,
+            cloud_user="bench",
+            cloud_token="bench",
+            dc_base_url=dc_url,
+            dc_user="bench",
+            dc_token="bench",
+            source_project_keys=keys,
+            dry_run=False,
+            max_issues_per_project=args.issues,
+            max_requests_per_second=args.rate,
+            max_concurrent_requests=args.max_concurrent_requests,
+            db_path=str(Path(tmp) / "bench.sqlite3"),
+            **options,
+        )
+        migrator = Migrator(request)
+        timer = RequestTimer()
+        timer.wrap(migrator.cloud.session)
+        timer.wrap(migrator.dc.session)
+        writes = SqliteWriteCounter()
+        migrator.store._conn.set_trace_callback(writes)
+
+        started = time.perf_counter()
+        result = migrator.run()
+        elapsed = time.perf_counter() - started
+        migrator.store.close()
+
+    created = sum(project.issues_created for project in result.projects)
+    return {
+        "scenario": name,
+        "issues": args.issues * args.projects,
+        "issues_created": created,
+        "issues_failed": sum(project.issues_failed for project in result.projects),
+        "seconds": round(elapsed, 3),
+        "issues_per_s": round(created / elapsed, 1) if elapsed else 0.0,
+        "requests": len(timer.samples),
+        "p50_ms": round(timer.percentile(0.50) * 1000, 2),
+        "p99_ms": round(timer.percentile(0.99) * 1000, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "sqlite_writes": writes.statements,
+        "sqlite_commits": writes.commits,
+    }
+
+
+def _scenario_process(name: str, args: argparse.Namespace, reports: "multiprocessing.Queue[Dict[str, Any]]") -> None:
+    reports.put(run_scenario(name, args))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark Migrator.run against a local fake Jira")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Repeatable; default all")
+    parser.add_argument("--issues", type=int, default=1000, help="Issues per synthetic project")
+    parser.add_argument("--projects", type=int, default=2)
+    parser.add_argument("--comments", type=int, default=1, help="Comments per issue")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--rate", type=float, default=2000.0, help="Requests per second per host")
+    parser.add_argument("--max-concurrent-requests", type=int, default=32)
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per scenario")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    for name in args.scenario or list(SCENARIOS):
+        # Each scenario runs in a fresh process so peak RSS is not inherited from the previous one.
+        reports: "multiprocessing.Queue[Dict[str, Any]]" = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_scenario_process, args=(name, args, reports))
+        process.start()
+        report = reports.get()
+        process.join()
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print(
+                f"{report['scenario']:<11} {report['issues_per_s']:>8.1f} issues/s  "
+                f"p50 {report['p50_ms']:>7.2f} ms  p99 {report['p99_ms']:>7.2f} ms  "
+                f"rss {report['peak_rss_mb']:>6.1f} MB  sqlite {report['sqlite_writes']} writes / "
+                f"{report['sqlite_commits']} commits  ({report['issues_created']}/{report['issues']} "
+                f"in {report['seconds']}s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
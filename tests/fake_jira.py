@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from jira_migrator.rate_limit import limiter_for_host
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _jira_time(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+@dataclass
+class FakeJiraConfig:
+    # issue count per Cloud project; issues are synthesized on demand, so 1M costs no memory
+    projects: Dict[str, int] = field(default_factory=lambda: {"SRC": 100})
+    comments_per_issue: int = 1
+    attachments_per_issue: int = 0
+    attachment_size: int = 1024
+    # every attachment of an issue has the same bytes, as when one file is attached twice
+    duplicate_attachments: bool = False
+    latency_s: float = 0.0
+    latency_jitter_s: float = 0.0
+    throttle_rate: float = 0.0
+    # like Jira's own limiter: answer 429 once more than this many requests arrive per second
+    max_requests_per_second: Optional[float] = None
+    server_error_rate: float = 0.0
+    retry_after_s: float = 0.0
+    seed: int = 7
+    # synthetic issue n is created at EPOCH + n * created_step_s
+    created_step_s: int = 1
+
+
+class FakeJiraState:
+    def __init__(self, config: FakeJiraConfig) -> None:
+        self.config = config
+        self.lock = threading.Lock()
+        self.rng = random.Random(config.seed)
+        self.requests: Dict[str, int] = {}
+        self.dc_projects: Dict[str, Dict[str, Any]] = {}
+        self.dc_issues: Dict[str, Dict[str, Any]] = {}
+        self.dc_comments: Dict[str, List[str]] = {}
+        self.dc_counters: Dict[str, int] = {}
+        self.dc_attachments: Dict[str, List[Tuple[str, str, int]]] = {}
+        self.throttled = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def over_budget(self) -> bool:
+        limit = self.config.max_requests_per_second
+        if limit is None:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count > limit
+
+    def count(self, route: str) -> None:
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def cloud_issue(
+        self, project_key: str, number: int, with_comments: bool, with_attachments: bool = False
+    ) -> Dict[str, Any]:
+        created = EPOCH + timedelta(seconds=number * self.config.created_step_s)
+        fields: Dict[str, Any] = {
+            "summary": f"{project_key} synthetic issue {number}",
+            "description": f"Body of {project_key}-{number}",
+            "issuetype": {"name": "Task" if number % 5 else "Bug"},
+            "priority": {"name": "Medium"},
+            "labels": ["synthetic"] if number % 3 == 0 else [],
+            "project": {"key": project_key},
+            "created": _jira_time(created),
+            "updated": _jira_time(created + timedelta(days=1)),
+        }
+        if with_comments:
+            fields["comment"] = {
+                "comments": self.cloud_comments(project_key, number)[:20],
+                "total": self.config.comments_per_issue,
+            }
+        if with_attachments:
+            fields["attachment"] = [
+                {
+                    "id": str(number * 1000 + n),
+                    "filename": f"file-{n}.bin",
+                    "size": self.config.attachment_size,
+                    "mimeType": "application/octet-stream",
+                }
+                for n in range(self.config.attachments_per_issue)
+            ]
+        return {"id": str(100000 + number), "key": f"{project_key}-{number}", "fields": fields}
+
+    def attachment_content(self, attachment_id: int) -> bytes:
+        seed = attachment_id // 1000 if self.config.duplicate_attachments else attachment_id
+        pattern = f"{seed}:".encode("ascii")
+        return (pattern * (self.config.attachment_size // len(pattern) + 1))[: self.config.attachment_size]
+
+    def cloud_comments(self, project_key: str, number: int) -> List[Dict[str, Any]]:
+        created = EPOCH + timedelta(seconds=number * self.config.created_step_s, minutes=1)
+        return [
+            {
+                "id": f"{number}{n:04d}",
+                "body": f"Comment {n} on {project_key}-{number}",
+                "created": _jira_time(created + timedelta(seconds=n)),
+            }
+            for n in range(self.config.comments_per_issue)
+        ]
+
+    def create_dc_issue(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        project_key = (fields.get("project") or {}).get("key")
+        if not project_key or not fields.get("summary"):
+            raise ValueError("project and summary are required")
+        with self.lock:
+            number = self.dc_counters.get(project_key, 0) + 1
+            self.dc_counters[project_key] = number
+            key = f"{project_key}-{number}"
+            self.dc_issues[key] = fields
+        return {"id": str(number), "key": key, "self": f"/rest/api/2/issue/{key}"}
+
+
+_JQL_PROJECT = re.compile(r"project\s*=\s*([A-Za-z0-9_]+)")
+_JQL_DATE = re.compile(r'(created|updated)\s*(>=|<)\s*"(\d{4}/\d{2}/\d{2} \d{2}:\d{2})"')
+
+
+def _parse_jql(jql: str, step: int = 1) -> Tuple[str, int, Optional[int]]:
+    # -> (project, first issue number, last issue number or None for no upper bound)
+    project = _JQL_PROJECT.search(jql)
+    first, last = 1, None
+    for field_name, operator, value in _JQL_DATE.findall(jql):
+        moment = datetime.strptime(value, "%Y/%m/%d %H:%M").replace(tzinfo=timezone.utc)
+        # synthetic issue n is created at EPOCH + n * step and updated a day later
+        offset = moment - EPOCH - (timedelta(days=1) if field_name == "updated" else timedelta())
+        bound = -(-int(offset.total_seconds()) // step)
+        if operator == ">=":
+            first = max(first, bound)
+        else:
+            last = bound - 1 if last is None else min(last, bound - 1)
+    return (project.group(1) if project else ""), first, last
+
+
+class FakeJiraHandler(BaseHTTPRequestHandler):
+    server: "FakeJiraServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive requests stall on
+    # delayed ACKs and every call looks ~40 ms slower than the configured latency.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def _send(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+        if isinstance(body, bytes):
+            data, content_type = body, "application/octet-stream"
+        else:
+            data, content_type = (b"" if body is None else json.dumps(body).encode("utf-8")), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not self.headers.get("Content-Type", "").startswith("application/json"):
+            return {"_raw": raw, "_content_type": self.headers.get("Content-Type", ""), "_headers": self.headers}
+        return json.loads(raw or b"{}")
+
+    def _inject(self) -> bool:
+        state = self.server.state
+        config = state.config
+        with state.lock:
+            jitter, roll = state.rng.random(), state.rng.random()
+        delay = config.latency_s + jitter * config.latency_jitter_s
+        if delay:
+            time.sleep(delay)
+        if roll < config.throttle_rate or state.over_budget():
+            state.throttled += 1
+            self._send(429, {"errorMessages": ["rate limited"]}, {"Retry-After": str(config.retry_after_s)})
+            return True
+        if roll < config.throttle_rate + config.server_error_rate:
+            self._send(503, {"errorMessages": ["unavailable"]}, {"Retry-After": str(config.retry_after_s)})
+            return True
+        return False
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:
+        self._dispatch("PUT")
+
+    def _dispatch(self, method: str) -> None:
+        body = self._body() if method in ("POST", "PUT") else {}
+        if self._inject():
+            return
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(url.path)
+            if route_method == method and match:
+                self.server.state.count(f"{method} {pattern.pattern}")
+                try:
+                    status, payload = handler(self.server.state, match, query, body)
+                except ValueError as exc:
+                    status, payload = 400, {"errorMessages": [str(exc)]}
+                self._send(status, payload)
+                return
+        self._send(404, {"errorMessages": [f"no route for {method} {url.path}"]})
+
+
+def _project_search(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    keys = sorted(state.config.projects)
+    start = int(query.get("startAt", 0))
+    size = int(query.get("maxResults", 50))
+    values = [
+        {"id": str(10000 + i), "key": key, "name": f"Project {key}", "projectTypeKey": "software", "style": "classic"}
+        for i, key in enumerate(keys[start : start + size], start=start)
+    ]
+    if "insight" in query.get("expand", ""):
+        for value in values:
+            value["insight"] = {"totalIssueCount": state.config.projects[value["key"]]}
+    return 200, {"values": values, "startAt": start, "maxResults": size, "total": len(keys),
+                 "isLast": start + size >= len(keys)}
+
+
+def _cloud_project(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    key = match.group(1)
+    if key not in state.config.projects:
+        return 404, {"errorMessages": ["no project"]}
+    return 200, {"key": key, "name": f"Project {key}", "projectTypeKey": "software", "style": "classic"}
+
+
+def _search_window(state: FakeJiraState, jql: str) -> Tuple[str, int, int]:
+    project_key, first, last = _parse_jql(jql, state.config.created_step_s)
+    total = state.config.projects.get(project_key, 0)
+    return project_key, first, total if last is None else min(total, last)
+
+
+def _search_offset(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    project_key, first, total = _search_window(state, body.get("jql", ""))
+    start = int(body.get("startAt", 0))
+    size = min(int(body.get("maxResults", 50)), 100)
+    numbers = range(first + start, min(total, first + start + size - 1) + 1)
+    issues = [state.cloud_issue(project_key, n, "comment" in body.get("fields", [])) for n in numbers]
+    return 200, {"issues": issues, "startAt": start, "maxResults": size, "total": max(0, total - first + 1)}
+
+
+def _search_token(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    project_key, first, total = _search_window(state, body.get("jql", ""))
+    start = int(body.get("nextPageToken") or first)
+    size = min(int(body.get("maxResults", 50)), 100)
+    end = min(total, start + size - 1)
+    fields = body.get("fields", [])
+    numbers = range(start, end + 1)
+    if body.get("jql", "").rstrip().endswith("DESC"):
+        # newest first: the page mirrors the ascending one from the top of the window
+        numbers = range(total - (start - first), total - (end - first) - 1, -1)
+    issues = [state.cloud_issue(project_key, n, "comment" in fields, "attachment" in fields) for n in numbers]
+    is_last = end >= total
+    return 200, {"issues": issues, "isLast": is_last, "nextPageToken": None if is_last else str(end + 1)}
+
+
+def _approximate_count(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    _, first, total = _search_window(state, body.get("jql", ""))
+    return 200, {"count": max(0, total - first + 1)}
+
+
+def _cloud_comments(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    project_key, number = match.group(1), int(match.group(2))
+    comments = state.cloud_comments(project_key, number)
+    start = int(query.get("startAt", 0))
+    size = int(query.get("maxResults", 50))
+    return 200, {"comments": comments[start : start + size], "startAt": start, "total": len(comments)}
+
+
+def _cloud_attachment(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    return 200, state.attachment_content(int(match.group(1)))
+
+
+def _dc_upload_attachment(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    key = match.group(1)
+    if body["_headers"].get("X-Atlassian-Token") != "no-check":
+        return 403, {"errorMessages": ["XSRF check failed"]}
+    boundary = body["_content_type"].split("boundary=", 1)[1].encode("ascii")
+    head, _, rest = body["_raw"].partition(b"\r\n\r\n")
+    content = rest[: rest.rindex(b"\r\n--" + boundary + b"--")]
+    filename = re.search(rb'filename="([^"]*)"', head)
+    with state.lock:
+        if key not in state.dc_issues:
+            return 404, {"errorMessages": ["no issue"]}
+        uploads = state.dc_attachments.setdefault(key, [])
+        name = filename.group(1).decode() if filename else ""
+        uploads.append((name, hashlib.sha256(content).hexdigest(), len(content)))
+        attachment_id = f"{key}/{len(uploads)}"
+    return 200, [{"id": attachment_id, "filename": uploads[-1][0], "size": len(content)}]
+
+
+def _dc_project(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    project = state.dc_projects.get(match.group(1))
+    return (200, project) if project else (404, {"errorMessages": ["no project"]})
+
+
+def _dc_create_project(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    with state.lock:
+        state.dc_projects[body["key"]] = body
+    return 201, {"key": body["key"], "id": str(len(state.dc_projects))}
+
+
+def _dc_create_issue(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    return 201, state.create_dc_issue(body.get("fields") or {})
+
+
+def _dc_bulk_create(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    issues, errors = [], []
+    for index, update in enumerate(body.get("issueUpdates", [])):
+        try:
+            issues.append(state.create_dc_issue(update.get("fields") or {}))
+        except ValueError as exc:
+            errors.append({"status": 400, "failedElementNumber": index, "elementErrors": {"errorMessages": [str(exc)]}})
+    return (201 if issues else 400), {"issues": issues, "errors": errors}
+
+
+def _dc_update_issue(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    key = match.group(1)
+    with state.lock:
+        if key not in state.dc_issues:
+            return 404, {"errorMessages": ["no issue"]}
+        state.dc_issues[key].update(body.get("fields") or {})
+    return 204, None
+
+
+def _dc_create_comment(state: FakeJiraState, match: Any, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    key = match.group(1)
+    with state.lock:
+        comments = state.dc_comments.setdefault(key, [])
+        comments.append(body.get("body", ""))
+        return 201, {"id": f"{key}/{len(comments)}", "body": body.get("body", "")}
+
+
+ROUTES = [
+    ("GET", re.compile(r"/rest/api/3/project/search"), _project_search),
+    ("GET", re.compile(r"/rest/api/3/project/([^/]+)"), _cloud_project),
+    ("POST", re.compile(r"/rest/api/3/search"), _search_offset),
+    ("POST", re.compile(r"/rest/api/3/search/jql"), _search_token),
+    ("POST", re.compile(r"/rest/api/3/search/approximate-count"), _approximate_count),
+    ("GET", re.compile(r"/rest/api/3/issue/([A-Za-z0-9_]+)-(\d+)/comment"), _cloud_comments),
+    ("GET", re.compile(r"/rest/api/3/attachment/content/(\d+)"), _cloud_attachment),
+    ("GET", re.compile(r"/rest/api/2/project/([^/]+)"), _dc_project),
+    ("POST", re.compile(r"/rest/api/2/project"), _dc_create_project),
+    ("POST", re.compile(r"/rest/api/2/issue"), _dc_create_issue),
+    ("POST", re.compile(r"/rest/api/2/issue/bulk"), _dc_bulk_create),
+    ("PUT", re.compile(r"/rest/api/2/issue/([^/]+)"), _dc_update_issue),
+    ("POST", re.compile(r"/rest/api/2/issue/([^/]+)/comment"), _dc_create_comment),
+    ("POST", re.compile(r"/rest/api/2/issue/([^/]+)/attachments"), _dc_upload_attachment),
+]
+
+
+class FakeJiraServer(ThreadingHTTPServer):
+    # One process-local server plays both Jira Cloud (/rest/api/3) and Jira DC (/rest/api/2).
+    # Use `cloud_url` and `dc_url`: they name the same socket by different hosts so each side
+    # gets its own per-host rate limiter in JiraClient.
+    daemon_threads = True
+
+    def __init__(self, config: Optional[FakeJiraConfig] = None) -> None:
+        super().__init__(("127.0.0.1", 0), FakeJiraHandler)
+        self.state = FakeJiraState(config or FakeJiraConfig())
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-jira", daemon=True)
+
+    @property
+    def cloud_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def dc_url(self) -> str:
+        return f"http://localhost:{self.server_address[1]}"
+
+    def __enter__(self) -> "FakeJiraServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def prime_rate_limiters(self, rate: float, burst: float = 50.0) -> None:
+        # The shared per-host limiters ramp up from a cautious start; benchmarks want the
+        # configured rate from the first request so the ramp does not dominate short runs.
+        for url in (self.cloud_url, self.dc_url):
+            limiter_for_host(urlparse(url).netloc, initial_rate=rate, max_rate=rate, burst=burst)
@@ -0,0 +1,113 @@
+from jira_migrator.adf import adf_to_wiki, iter_wiki
+
+
+def text(value, *marks):
+    node = {"type": "text", "text": value}
+    if marks:
+        node["marks"] = list(marks)
+    return node
+
+
+def para(*content):
+    return {"type": "paragraph", "content": list(content)}
+
+
+def item(*content):
+    return {"type": "listItem", "content": list(content)}
+
+
+def test_converts_common_node_types():
+    doc = {
+        "type": "doc",
+        "version": 1,
+        "content": [
+            {"type": "heading", "attrs": {"level": 2}, "content": [text("Title")]},
+            para(
+                text("Hello "),
+                text("bold", {"type": "strong"}),
+                text(" and "),
+                text("site", {"type": "link", "attrs": {"href": "https://x.io"}}),
+                text(" a*b "),
+                {"type": "mention", "attrs": {"id": "a-1", "text": "@Alice"}},
+                {"type": "mention", "attrs": {"id": "z-9", "text": "@Zed"}},
+                {"type": "hardBreak"},
+                text("x", {"type": "code"}),
+            ),
+            {
+                "type": "bulletList",
+                "content": [
+                    item(para(text("one")), {"type": "orderedList", "content": [item(para(text("nested")))]}),
+                    item(para(text("two"))),
+                ],
+            },
+            {"type": "codeBlock", "attrs": {"language": "python"}, "content": [text("x = {'a': 1}\nprint(x)")]},
+            {
+                "type": "table",
+                "content": [
+                    {
+                        "type": "tableRow",
+                        "content": [
+                            {"type": "tableHeader", "content": [para(text("H1"))]},
+                            {"type": "tableHeader", "content": [para(text("H2"))]},
+                        ],
+                    },
+                    {
+                        "type": "tableRow",
+                        "content": [
+                            {"type": "tableCell", "content": [para(text("a")), para(text("b|c"))]},
+                            {"type": "tableCell", "content": []},
+                        ],
+                    },
+                ],
+            },
+            {"type": "mediaSingle", "content": [{"type": "media", "attrs": {"id": "abc", "alt": "shot.png"}}]},
+            {"type": "panel", "attrs": {"panelType": "warning"}, "content": [para(text("careful"))]},
+            {"type": "rule"},
+        ],
+    }
+
+    wiki = adf_to_wiki(doc, mention=lambda attrs: "alice" if attrs["id"] == "a-1" else None)
+
+    assert wiki == (
+        "h2. Title\n\n"
+        "Hello *bold* and [site|https://x.io] a\\*b [~alice]@Zed\n{{x}}\n\n"
+        "* one\n*# nested\n* two\n\n"
+        "{code:python}\nx = {'a': 1}\nprint(x)\n{code}\n\n"
+        "|| H1 || H2 ||\n| a \\\\ b\\|c |   |\n\n"
+        "!shot.png!\n\n"
+        "{warning}\ncareful\n{warning}\n\n"
+        "----"
+    )
+
+
+def test_strings_and_missing_bodies_pass_through():
+    assert adf_to_wiki("already *wiki*") == "already *wiki*"
+    assert adf_to_wiki(None) == ""
+    assert adf_to_wiki({"type": "doc", "content": [para(), {"type": "unknownThing"}]}) == "\n\n"
+
+
+def test_deep_nesting_does_not_recurse():
+    doc = {"type": "doc", "content": [para(text("leaf"))]}
+    for _ in range(20_000):
+        doc = {"type": "blockquote", "content": [doc]}
+
+    wiki = adf_to_wiki({"type": "doc", "content": [doc]})
+
+    assert wiki.count("{quote}") == 40_000
+    assert "leaf" in wiki
+
+
+def test_large_document_is_streamed_in_bounded_chunks():
+    rows = [
+        {"type": "tableRow", "content": [{"type": "tableCell", "content": [para(text(f"cell {n}"))]}]}
+        for n in range(50_000)
+    ]
+    doc = {"type": "doc", "content": [{"type": "table", "content": rows}, para(text("end"))]}
+
+    chunks = list(iter_wiki(doc))
+    wiki = "".join(chunks)
+
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 100_000
+    assert wiki.count("\n") == 50_001
+    assert wiki.endswith("| cell 49999 |\n\nend")
@@ -0,0 +1,77 @@
+import threading
+
+import requests
+
+from jira_migrator.attachments import AttachmentCopier
+from jira_migrator.mapping_store import MappingStore
+from jira_migrator.rate_limit import AdaptiveRateLimiter, RetryPolicy
+
+
+class Download:
+    def __init__(self, body, gate=None):
+        self.body = body
+        self.gate = gate
+
+    def iter_content(self, size):
+        if self.gate is not None:
+            self.gate.wait(5)
+        yield self.body
+
+    def close(self):
+        pass
+
+
+class AttachmentCloud:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.downloads = 0
+
+    def open_attachment_cloud(self, attachment_id):
+        self.downloads += 1
+        return Download(f"file {attachment_id}".encode(), self.gate)
+
+
+class AttachmentDC:
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.uploads = []
+        self.retry_policy = RetryPolicy(max_retries=3, base_backoff_s=0, jitter=0)
+        self.rate_limiter = AdaptiveRateLimiter(sleep=lambda seconds: None)
+
+    def upload_attachment_dc(self, issue_key, filename, chunks, size, mime_type):
+        body = b"".join(chunks)
+        if self.statuses:
+            response = requests.Response()
+            response.status_code = self.statuses.pop(0)
+            raise requests.HTTPError(f"{response.status_code}", response=response)
+        self.uploads.append((issue_key, body))
+        return [{"id": str(len(self.uploads))}]
+
+
+def test_throttled_upload_is_retried_from_a_fresh_download(tmp_path):
+    cloud, dc = AttachmentCloud(), AttachmentDC(statuses=[429, 503])
+    copier = AttachmentCopier(cloud, dc, MappingStore(str(tmp_path / "m.sqlite3")))
+
+    outcome = copier.submit("SRC-1", "DST-1", [{"id": 7, "filename": "a.txt", "size": 6}]).result()
+    copier.close()
+
+    assert (outcome.copied, outcome.failed) == (1, 0)
+    assert dc.uploads == [("DST-1", b"file 7")]
+    assert cloud.downloads == 3
+
+
+def test_submit_blocks_once_the_queue_is_full(tmp_path):
+    gate = threading.Event()
+    copier = AttachmentCopier(
+        AttachmentCloud(gate), AttachmentDC(), MappingStore(str(tmp_path / "m.sqlite3")), workers=1, max_pending=2
+    )
+    futures = [copier.submit(f"SRC-{n}", f"DST-{n}", [{"id": n, "size": 6}]) for n in (1, 2)]
+    third = threading.Thread(target=lambda: futures.append(copier.submit("SRC-3", "DST-3", [{"id": 3, "size": 6}])))
+    third.start()
+    third.join(0.2)
+
+    assert third.is_alive()
+    gate.set()
+    third.join(5)
+    copier.close()
+    assert sum(future.result().copied for future in futures) == 3
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from jira_migrator.discovery import ProjectDiscoveryCache, filter_projects
+from jira_migrator.jira_client import JiraAuth, JiraClient
+from jira_migrator.models import ProjectSummary
+
+from fake_jira import FakeJiraConfig, FakeJiraServer
+
+
+def test_projects_are_paged_past_the_first_page_with_counts():
+    projects = {f"P{n:03d}": n for n in range(250)}
+    with FakeJiraServer(FakeJiraConfig(projects=projects)) as server:
+        server.prime_rate_limiters(1000.0)
+        client = JiraClient(server.cloud_url, JiraAuth("u", "t"), max_requests_per_second=1000.0)
+        found = client.list_projects_cloud(include_issue_counts=True)
+        pages = server.state.requests["GET /rest/api/3/project/search"]
+
+    assert [project["key"] for project in found] == sorted(projects)
+    assert found[-1]["insight"]["totalIssueCount"] == 249
+    assert pages == 3
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_discovery_cache_is_per_credentials_with_ttl_and_refresh():
+    clock = Clock()
+    cache = ProjectDiscoveryCache(ttl_s=60, clock=clock)
+    fetches = []
+
+    def fetch(include_issue_counts):
+        fetches.append(include_issue_counts)
+        time.sleep(0.05)
+        return [ProjectSummary(key="ABC", name="Alpha", issue_count=3 if include_issue_counts else None)]
+
+    threads = [
+        threading.Thread(target=cache.get, args=("https://site.example/", "u", "t", fetch)) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fetches == [False]
+
+    assert cache.get("https://SITE.example", "u", "t", fetch).cached
+    assert not cache.get("https://site.example", "u", "other", fetch).cached
+    assert not cache.get("https://site.example", "u", "t", fetch, refresh=True).cached
+    # A list with counts also answers requests without them.
+    assert cache.get("https://site.example", "u", "t", fetch, include_issue_counts=True).projects[0].issue_count == 3
+    clock.now += 30
+    assert cache.get("https://site.example", "u", "t", fetch).projects[0].issue_count == 3
+    clock.now += 61
+    assert not cache.get("https://site.example", "u", "t", fetch).cached
+    assert fetches == [False, False, False, True, False]
+    assert cache._fetching == {}
+
+    projects = cache.get("https://site.example", "u", "t", fetch).projects
+    assert [p.key for p in filter_projects(projects, "alp")] == ["ABC"]
+    assert filter_projects(projects, "zzz") == []
+
+
+def test_failed_fetch_releases_its_lock():
+    cache = ProjectDiscoveryCache()
+
+    def fetch(include_issue_counts):
+        raise ConnectionError("site down")
+
+    for user in ("a", "b"):
+        with pytest.raises(ConnectionError):
+            cache.get("https://site.example", user, "t", fetch)
+    assert cache._fetching == {}
@@ -0,0 +1,85 @@
+import hashlib
+
+import jira_migrator.attachments as attachments_module
+from jira_migrator.metrics import REGISTRY
+from jira_migrator.migrator import Migrator
+from jira_migrator.models import MigrationRequest
+
+from fake_jira import FakeJiraConfig, FakeJiraServer
+
+
+def run_against(server, tmp_path, **overrides):
+    server.prime_rate_limiters(1000.0)
+    params = dict(
+        cloud_base_url=server.cloud_url,
+        cloud_user="u",
+        cloud_token="t",
+        dc_base_url=server.dc_url,
+        dc_user="u",
+        dc_token="t",
+        source_project_keys=["SRC"],
+        dry_run=False,
+        issue_batch_size=10,
+        max_requests_per_second=1000.0,
+        db_path=str(tmp_path / "mappings.sqlite3"),
+    )
+    params.update(overrides)
+    return Migrator(MigrationRequest(**params)).run().projects[0]
+
+
+def test_migrates_over_http_through_injected_throttling(tmp_path):
+    config = FakeJiraConfig(projects={"SRC": 45}, comments_per_issue=2, throttle_rate=0.03, server_error_rate=0.1)
+    with FakeJiraServer(config) as server:
+        result = run_against(server, tmp_path, concurrency=4)
+        state = server.state
+
+    assert result.error is None
+    assert result.issues_scanned == 45
+    assert result.issues_created == 45
+    assert result.comments_created == 90
+    assert len(state.dc_issues) == 45
+    assert sum(len(comments) for comments in state.dc_comments.values()) == 90
+    assert state.throttled > 0
+    assert set(result.timings) >= {"extract_s", "transform_s", "load_s", "mapping_write_s", "total_s"}
+    assert result.timings["load_s"] > 0
+    exposition = REGISTRY.render()
+    assert 'endpoint="/rest/api/2/issue/{key}/comment"' in exposition
+    assert "jira_request_throttled_total" in exposition
+
+
+def test_bulk_rerun_over_http_creates_nothing_new(tmp_path):
+    with FakeJiraServer(FakeJiraConfig(projects={"SRC": 30}, comments_per_issue=0)) as server:
+        first = run_against(server, tmp_path, bulk_create=True, bulk_batch_size=8)
+        second = run_against(server, tmp_path, bulk_create=True, resume_from_checkpoint=False)
+        bulk_calls = server.state.requests["POST /rest/api/2/issue/bulk"]
+
+    assert first.issues_created == 30
+    assert second.issues_created == 0
+    assert second.skipped_issues == 30
+    assert bulk_calls == 4
+
+
+def test_attachments_stream_once_and_duplicates_are_not_uploaded_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(attachments_module, "CHUNK_SIZE", 4096)
+    config = FakeJiraConfig(
+        projects={"SRC": 6},
+        comments_per_issue=0,
+        attachments_per_issue=2,
+        attachment_size=50_000,
+        duplicate_attachments=True,
+    )
+    with FakeJiraServer(config) as server:
+        first = run_against(server, tmp_path, migrate_attachments=True, attachment_max_bytes_per_second=10_000_000)
+        second = run_against(server, tmp_path, migrate_attachments=True, resume_from_checkpoint=False)
+        downloads = server.state.requests["GET /rest/api/3/attachment/content/(\\d+)"]
+        uploads = server.state.dc_attachments
+        expected = {hashlib.sha256(server.state.attachment_content(n * 1000)).hexdigest() for n in range(1, 7)}
+
+    assert first.attachments_copied == 6
+    assert first.attachments_deduplicated == 6
+    assert first.attachment_bytes == 6 * 50_000
+    assert second.attachments_copied == second.attachments_deduplicated == 0
+    assert downloads == 12
+    assert sorted(len(files) for files in uploads.values()) == [1] * 6
+    assert {sha for files in uploads.values() for _, sha, _ in files} == expected
+    assert all(size == 50_000 for files in uploads.values() for _, _, size in files)
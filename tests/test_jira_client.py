@@ -0,0 +1,83 @@
+from jira_migrator.jira_client import JiraAuth, JiraClient
+from jira_migrator.metrics import REQUEST_SECONDS, REQUESTS_TOTAL, endpoint_template
+from jira_migrator.rate_limit import AdaptiveRateLimiter, RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, data=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.data = {"ok": True} if data is None else data
+        self.text = "{}"
+        self.content = b"{}"
+        self.request = None
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+def test_client_retries_throttled_requests_with_retry_after():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(initial_rate=50, clock=clock, sleep=clock.sleep)
+    client = JiraClient("https://jira.example", JiraAuth("u", "t"), rate_limiter=limiter)
+    client.retry_policy = RetryPolicy(jitter=0)
+    responses = [FakeResponse(429, {"Retry-After": "4"}), FakeResponse(200)]
+    client.session.request = lambda *args, **kwargs: responses.pop(0)
+
+    assert client._request("GET", "/rest/api/2/myself") == {"ok": True}
+    assert clock.now >= 4
+    assert limiter.snapshot()["throttled"] == 1
+    assert limiter.snapshot()["retries"] == 1
+
+
+def test_list_comments_follows_pagination():
+    client = JiraClient("https://jira.example", JiraAuth("u", "t"), rate_limiter=AdaptiveRateLimiter(max_rate=1000))
+    comments = [{"id": str(n), "body": "x"} for n in range(5)]
+    urls = []
+
+    def request(method, url, **kwargs):
+        urls.append(url)
+        start = int(url.split("startAt=")[1].split("&")[0])
+        return FakeResponse(200, data={"comments": comments[start : start + 2], "total": len(comments)})
+
+    client.session.request = request
+
+    assert client.list_comments_cloud("SRC-1", page_size=2) == comments
+    assert len(urls) == 3
+
+
+def test_requests_are_recorded_per_endpoint_template():
+    client = JiraClient("https://metrics.example", JiraAuth("u", "t"), rate_limiter=AdaptiveRateLimiter(max_rate=1000))
+    client.retry_policy = RetryPolicy(base_backoff_s=0, jitter=0)
+    responses = [FakeResponse(503), FakeResponse(200), FakeResponse(200)]
+    client.session.request = lambda *args, **kwargs: responses.pop(0)
+
+    client._request("POST", "/rest/api/2/issue/MIG-1/comment")
+    client._request("POST", "/rest/api/2/issue/MIG-2/comment")
+
+    endpoint = "/rest/api/2/issue/{key}/comment"
+    labels = dict(host="metrics.example", method="POST", endpoint=endpoint)
+    assert REQUEST_SECONDS.count(**labels) == 3
+    assert REQUESTS_TOTAL.value(status="503", **labels) == 1
+    assert REQUESTS_TOTAL.value(status="200", **labels) == 2
+    assert endpoint_template("/rest/api/3/project/search?startAt=50") == "/rest/api/3/project/search"
+    assert endpoint_template("/rest/api/2/issue/bulk") == "/rest/api/2/issue/bulk"
+    assert endpoint_template("/rest/api/3/attachment/content/10042") == "/rest/api/3/attachment/content/{key}"
@@ -0,0 +1,98 @@
+import asyncio
+
+import jira_migrator.jobs as jobs_module
+from jira_migrator.jobs import JobManager, MigrationJob
+from jira_migrator.migrator import Migrator
+from jira_migrator.models import MigrationRequest
+
+from test_migrator import FakeCloud, FakeDC
+
+
+def make_request(tmp_path, **overrides):
+    params = dict(
+        cloud_base_url="https://cloud.example",
+        cloud_user="u",
+        cloud_token="t",
+        dc_base_url="https://dc.example",
+        dc_user="u",
+        dc_token="t",
+        source_project_keys=["SRC"],
+        dry_run=False,
+        db_path=str(tmp_path / "mappings.sqlite3"),
+    )
+    params.update(overrides)
+    return MigrationRequest(**params)
+
+
+def patch_migrator(monkeypatch, cloud, dc):
+    class FakeMigrator(Migrator):
+        def __init__(self, request, progress=None):
+            super().__init__(request, progress=progress)
+            self.cloud = cloud
+            self.dc = dc
+            self.metadata.dc = dc
+            self.users.cloud, self.users.dc = cloud, dc
+
+    monkeypatch.setattr(jobs_module, "Migrator", FakeMigrator)
+
+
+def stream_statuses(manager, job):
+    async def collect():
+        return [status async for status in manager.stream(job, heartbeat_s=0.05) if status is not None]
+
+    return asyncio.run(collect())
+
+
+def test_job_runs_in_background_and_streams_progress(tmp_path, monkeypatch):
+    patch_migrator(monkeypatch, FakeCloud(30, comments_per_issue=1), FakeDC())
+    manager = JobManager(max_workers=1)
+
+    job = manager.submit(make_request(tmp_path))
+    statuses = stream_statuses(manager, job)
+
+    final = statuses[-1]
+    assert final.status == "succeeded"
+    assert final.result.projects[0].issues_created == 30
+    assert final.progress["issues_scanned"] == 30
+    assert final.progress["expected_issues"] == 30
+    assert final.progress["comments_created"] == 30
+    assert manager.get(job.job_id).to_status().run_id == final.result.run_id
+
+
+def test_cancelled_job_stops_scanning(tmp_path, monkeypatch):
+    manager = JobManager(max_workers=1)
+    cloud = FakeCloud(30)
+    search = cloud.search_issues_jql
+
+    def search_then_cancel(*args, **kwargs):
+        page = search(*args, **kwargs)
+        for running in manager.list():
+            manager.cancel(running.job_id)
+        return page
+
+    cloud.search_issues_jql = search_then_cancel
+    patch_migrator(monkeypatch, cloud, FakeDC())
+    job = manager.submit(make_request(tmp_path, issue_batch_size=5, prefetch_pages=0))
+
+    final = stream_statuses(manager, job)[-1]
+
+    assert final.status == "cancelled"
+    assert final.progress["issues_scanned"] == 0
+    assert "Cancelled" in final.result.projects[0].notes[-1]
+
+
+def test_idle_streams_await_on_one_event_loop(tmp_path):
+    manager = JobManager(max_workers=1)
+    job = MigrationJob(make_request(tmp_path))
+
+    async def first_events():
+        events = manager.stream(job, heartbeat_s=0.05)
+        return [await events.__anext__() for _ in range(3)]
+
+    async def two_streams():
+        return await asyncio.gather(first_events(), first_events())
+
+    for first, *keep_alives in asyncio.run(two_streams()):
+        assert first.status == job.to_status().status
+        assert keep_alives == [None, None]
+    assert job.progress._listeners == []
@@ -1,4 +1,6 @@
-from jira_migrator.mapping_store import MappingStore
+import sqlite3
+
+from jira_migrator.mapping_store import MappingStore, RunLogReader
 
 
 def test_mapping_store_roundtrip(tmp_path):
@@ -12,3 +14,131 @@ def test_mapping_store_roundtrip(tmp_path):
     assert store.get_project_map("SRC") == "DST"
     assert store.get_issue_map("SRC-1") == "DST-1"
     assert store.get_field_map("customfield_10010") == "customfield_20020"
+
+
+def test_mapping_store_bulk_issue_maps(tmp_path):
+    store = MappingStore(str(tmp_path / "mappings.sqlite3"))
+
+    store.set_issue_maps([("SRC-1", "DST-1"), ("SRC-2", "DST-2")])
+
+    assert store.get_issue_map("SRC-1") == "DST-1"
+    assert store.get_issue_map("SRC-2") == "DST-2"
+
+
+def test_mapping_store_bulk_lookup_and_flush(tmp_path):
+    db = str(tmp_path / "mappings.sqlite3")
+    store = MappingStore(db, flush_every=10_000, flush_interval_s=3600)
+    store.set_issue_maps((f"SRC-{n}", f"DST-{n}") for n in range(1200))
+
+    assert store.get_issue_maps(["SRC-1", "SRC-1199", "SRC-5000"]) == {"SRC-1": "DST-1", "SRC-1199": "DST-1199"}
+    assert MappingStore(db).get_issue_map("SRC-1") is None
+
+    store.flush()
+
+    assert MappingStore(db).get_issue_map("SRC-1") == "DST-1"
+
+
+def test_issue_keys_are_paged_by_keyset(tmp_path):
+    store = MappingStore(str(tmp_path / "mappings.sqlite3"))
+    store.set_issue_maps((f"SRC-{n}", f"DST-{n}") for n in range(1, 26))
+
+    keys = []
+    for key in store.iter_issue_keys("SRC", page_size=10):
+        keys.append(key)
+        # Writes between pages do not disturb the scan.
+        store.set_issue_map(f"OTHER-{len(keys)}", "DST-z")
+
+    assert sorted(keys) == sorted(f"SRC-{n}" for n in range(1, 26))
+    assert len(keys) == len(set(keys))
+
+
+def test_mapping_store_concurrent_writers(tmp_path):
+    import threading
+
+    store = MappingStore(str(tmp_path / "mappings.sqlite3"), flush_every=7)
+
+    def write(prefix):
+        for n in range(100):
+            store.set_issue_map(f"{prefix}-{n}", f"DST-{prefix}-{n}")
+
+    threads = [threading.Thread(target=write, args=(f"P{t}",)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+
+    reopened = MappingStore(str(tmp_path / "mappings.sqlite3"))
+    assert len(reopened.get_issue_maps(f"P{t}-{n}" for t in range(8) for n in range(100))) == 800
+
+
+def test_idle_transaction_is_committed_by_one_flush_thread(tmp_path):
+    import threading
+    import time
+
+    db = str(tmp_path / "mappings.sqlite3")
+    store = MappingStore(db, flush_every=10_000, flush_interval_s=0.05)
+    before = threading.active_count()
+    for n in range(20):
+        store.set_issue_map(f"SRC-{n}", f"DST-{n}")
+        store.flush()
+    assert threading.active_count() <= before + 1
+
+    store.set_issue_map("SRC-idle", "DST-idle")
+    store.log("run-1", "info", "idle")
+    deadline = time.monotonic() + 5
+    while MappingStore(db).get_issue_map("SRC-idle") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert MappingStore(db).get_issue_map("SRC-idle") == "DST-idle"
+
+    flusher = store._flusher
+    store.close()
+    flusher.join(timeout=5)
+    assert not flusher.is_alive()
+
+
+def test_run_log_events_are_buffered_and_paged_by_run(tmp_path):
+    db = str(tmp_path / "mappings.sqlite3")
+    store = MappingStore(db, flush_interval_s=3600, log_batch_size=1000)
+    for n in range(5):
+        store.log("run-1", "info", f"created SRC-{n}", "SRC", f"SRC-{n}", phase="create", duration_s=0.5)
+    store.log("run-1", "error", "boom", "OTH", "OTH-1", phase="create", error_class="HTTPError")
+    store.log("run-2", "info", "other run")
+    reader = RunLogReader(db)
+
+    assert reader.run("run-1") is None
+    store.flush()
+
+    assert reader.run("run-1")["events"] == 6 and reader.run("run-1")["errors"] == 1
+    first = reader.events("run-1", limit=2, project_key="SRC")
+    rest = reader.events("run-1", after_id=first[-1]["id"], limit=10, project_key="SRC")
+    assert [event["issue_key"] for event in first + rest] == [f"SRC-{n}" for n in range(5)]
+    (error,) = reader.events("run-1", level="error")
+    assert (error["issue_key"], error["phase"], error["error_class"]) == ("OTH-1", "create", "HTTPError")
+    plan = reader._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM run_log WHERE run_id = 'run-1' AND project_key = 'SRC' AND id > 0"
+    ).fetchall()
+    assert "idx_run_log_run_project" in plan[0][3]
+
+
+def test_run_log_upgrade_and_retention(tmp_path):
+    db = str(tmp_path / "mappings.sqlite3")
+    legacy = sqlite3.connect(db)
+    legacy.execute(
+        "CREATE TABLE run_log (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, level TEXT NOT NULL, "
+        "message TEXT NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    legacy.executemany(
+        "INSERT INTO run_log(run_id, level, message, created_at) VALUES(?, ?, ?, ?)",
+        [("old", "info", "a", "2020-01-01 00:00:00"), ("old", "error", "b", "2020-01-02 00:00:00")],
+    )
+    legacy.commit()
+    legacy.close()
+
+    store = MappingStore(db)
+    store.log("new", "info", "c", "SRC")
+
+    assert store.compact_run_log(max_age_days=30) == 2
+    reader = RunLogReader(db)
+    assert reader.run("old") is None
+    assert [event["message"] for event in reader.events("new")] == ["c"]
@@ -0,0 +1,108 @@
+import requests
+
+from jira_migrator.mapping_store import MappingStore
+from jira_migrator.metadata import DCMetadataCache
+
+
+class MetadataClient:
+    def __init__(self):
+        self.calls = []
+        self.down = set()
+        self.missing = set()
+
+    def _call(self, name, value):
+        self.calls.append(name)
+        if name in self.down:
+            raise ConnectionError(f"{name} unavailable")
+        if name in self.missing:
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.HTTPError("404 Client Error", response=response)
+        return value
+
+    def get_createmeta_issue_types_dc(self, project_key):
+        return self._call("issuetypes", [{"id": "1", "name": "Task"}])
+
+    def get_createmeta_fields_dc(self, project_key, issue_type_id):
+        screen = ["project", "issuetype", "summary", "priority", "resolution", "customfield_200"]
+        return self._call("fields", [{"fieldId": field_id} for field_id in screen])
+
+    def list_priorities_dc(self):
+        return self._call("priorities", [{"name": "High"}])
+
+    def list_resolutions_dc(self):
+        return self._call("resolutions", [{"name": "Done"}, {"name": "Won't Do"}])
+
+    def list_fields_dc(self):
+        fields = [{"id": "customfield_200", "name": "Story Points", "custom": True}, {"id": "summary"}]
+        return self._call("dc_fields", fields)
+
+
+def make_cache(tmp_path):
+    store = MappingStore(str(tmp_path / "mappings.sqlite3"))
+    store.set_field_map("customfield_100", "customfield_200")
+    store.set_field_map("resolution:Cancelled", "Won't Do")
+    return DCMetadataCache(MetadataClient(), store)
+
+
+def payload(n, **fields):
+    labels = [f"migrated-from-SRC-{n}"]
+    return {"fields": {"summary": f"issue {n}", "issuetype": {"name": "Task"}, "labels": labels, **fields}}
+
+
+def test_resolutions_and_custom_fields_are_mapped_once_per_run(tmp_path):
+    cache = make_cache(tmp_path)
+
+    for n in range(5):
+        sent = cache.translate("DST", payload(n, resolution={"name": "Cancelled"}, customfield_100=3))["fields"]
+        assert sent["resolution"] == {"name": "Won't Do"}
+        assert sent["customfield_200"] == 3 and "customfield_100" not in sent
+
+    assert sorted(cache.dc.calls) == ["dc_fields", "fields", "issuetypes", "resolutions"]
+    assert cache.custom_field_id("Story Points") == "customfield_200"
+    assert cache.dc.calls.count("dc_fields") == 1
+
+
+def test_hit_ratio_counts_only_metadata_lookups(tmp_path):
+    cache = make_cache(tmp_path)
+
+    for n in range(10):
+        cache.translate("DST", payload(n, priority={"name": "High"}))
+
+    # issue types, create screen and priorities: one miss each, then a hit per issue.
+    assert cache.stats() == {"hits": 27, "misses": 3, "hit_ratio": 0.9}
+
+
+def test_failed_load_is_retried_on_the_next_call(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.dc.down.add("priorities")
+
+    assert cache.translate("DST", payload(1, priority={"name": "Urgent"}))["fields"]["priority"] == {"name": "Urgent"}
+    cache.dc.down.clear()
+    dropped = []
+    sent = cache.translate("DST", payload(2, priority={"name": "Urgent"}), dropped)["fields"]
+
+    assert "priority" not in sent
+    assert dropped == ["priority 'Urgent' (not in DC)"]
+    assert cache.dc.calls.count("priorities") == 2
+
+
+def test_missing_endpoint_is_cached_like_an_answer(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.dc.missing.add("issuetypes")
+
+    for n in range(3):
+        assert cache.translate("DST", payload(n))["fields"]["issuetype"] == {"name": "Task"}
+
+    assert cache.dc.calls == ["issuetypes"]
+
+
+def test_dropped_fields_are_reported_and_labels_kept(tmp_path):
+    cache = make_cache(tmp_path)
+    dropped = []
+
+    sent = cache.translate("DST", payload(1, description="text", customfield_999="x"), dropped)["fields"]
+
+    assert sent["labels"] == ["migrated-from-SRC-1"]
+    assert "description" not in sent and "customfield_999" not in sent
+    assert dropped == ["customfield_999 (no such DC field)", "description (not on the create screen)"]
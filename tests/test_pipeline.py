@@ -0,0 +1,76 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from jira_migrator.pipeline import Prefetcher
+
+
+def test_prefetcher_preserves_order_and_bounds_read_ahead():
+    produced = []
+
+    def source():
+        for n in range(10):
+            produced.append(n)
+            yield n
+
+    prefetcher = Prefetcher(source(), depth=2)
+    first = next(prefetcher)
+    time.sleep(0.2)
+
+    assert first == 0
+    assert len(produced) <= 4
+    assert [first] + list(prefetcher) == list(range(10))
+    assert prefetcher.stats.as_dict()["pages"] == 10
+
+
+def test_prefetcher_propagates_source_errors():
+    def source():
+        yield 1
+        raise ValueError("boom")
+
+    with Prefetcher(source(), depth=1) as prefetcher:
+        assert next(prefetcher) == 1
+        with pytest.raises(ValueError):
+            next(prefetcher)
+
+
+def test_prefetcher_close_stops_producer():
+    prefetcher = Prefetcher(itertools.count(), depth=1)
+    next(prefetcher)
+    prefetcher.close()
+
+    assert not prefetcher._thread.is_alive()
+
+
+def test_prefetcher_close_closes_the_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from itertools.count()
+        finally:
+            closed.set()
+
+    prefetcher = Prefetcher(source(), depth=1)
+    next(prefetcher)
+
+    assert prefetcher.close()
+    assert closed.is_set()
+
+
+def test_prefetcher_close_reports_a_stuck_producer():
+    release = threading.Event()
+
+    def source():
+        yield 1
+        release.wait()
+        yield 2
+
+    prefetcher = Prefetcher(source(), depth=1)
+    next(prefetcher)
+
+    assert not prefetcher.close(timeout_s=0.1)
+    release.set()
+    assert prefetcher.close()
@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+from jira_migrator.rate_limit import (
+    AdaptiveRateLimiter,
+    ByteRateLimiter,
+    RetryPolicy,
+    limiter_for_host,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_limiter_paces_requests_to_rate():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(initial_rate=10, burst=1, clock=clock, sleep=clock.sleep)
+
+    for _ in range(11):
+        limiter.acquire()
+
+    assert abs(clock.now - 1.0) < 1e-6
+
+
+def test_throttle_halves_rate_and_honors_retry_after():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(initial_rate=20, min_rate=1, clock=clock, sleep=clock.sleep)
+
+    limiter.on_throttle(retry_after_s=3)
+    limiter.acquire()
+
+    assert limiter.rate == 10
+    assert clock.now >= 3
+    assert limiter.snapshot()["throttled"] == 1
+
+
+def test_concurrent_throttles_cut_the_rate_once():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(initial_rate=40, max_rate=50, burst=16, clock=clock, sleep=clock.sleep)
+    issued = []
+    for _ in range(16):
+        limiter.acquire()
+        issued.append(limiter.now())
+        clock.now += 0.01
+
+    for issued_at in issued:
+        limiter.on_throttle(issued_at=issued_at)
+        limiter.on_success({"X-RateLimit-NearLimit": "true"}, issued_at=issued_at)
+
+    assert limiter.rate == 20
+    assert limiter.snapshot()["throttled"] == 16
+
+    clock.now += 1
+    limiter.acquire()
+    limiter.on_throttle(issued_at=limiter.now())
+    assert limiter.rate == 10
+
+
+def test_success_grows_rate_up_to_ceiling():
+    limiter = AdaptiveRateLimiter(initial_rate=1, max_rate=2, additive_increase=1)
+
+    for _ in range(10):
+        limiter.on_success({})
+
+    assert limiter.rate == 2
+
+
+def test_parse_retry_after_variants():
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    assert parse_retry_after({"Retry-After": "7"}) == 7
+    assert parse_retry_after({"Retry-After": "Mon, 01 Jan 2024 00:00:05 GMT"}, now=now) == 5
+    assert parse_retry_after({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2024-01-01T00:00:02Z"}, now=now) == 2
+    assert parse_retry_after({}) is None
+
+
+def test_retry_policy_caps_backoff():
+    policy = RetryPolicy(base_backoff_s=1, max_backoff_s=4, jitter=0)
+
+    assert policy.delay(0) == 1
+    assert policy.delay(5) == 4
+    assert policy.delay(0, retry_after_s=2.5) == 2.5
+
+
+def test_limiter_is_shared_per_host():
+    assert limiter_for_host("shared.example") is limiter_for_host("shared.example")
+
+
+def test_reused_limiter_takes_the_new_max_rate():
+    limiter = limiter_for_host("capped.example", initial_rate=20, max_rate=50)
+
+    assert limiter_for_host("capped.example", max_rate=5) is limiter
+    assert (limiter.max_rate, limiter.rate) == (5, 5)
+    limiter_for_host("capped.example", max_rate=40)
+    assert (limiter.max_rate, limiter.rate) == (40, 5)
+
+
+
+def test_byte_limiter_sleeps_off_overdraft():
+    clock = FakeClock()
+    limiter = ByteRateLimiter(1000, clock=clock, sleep=clock.sleep)
+
+    assert limiter.consume(1000) == 0
+    assert limiter.consume(500) == 0.5
+    clock.now += 1.0
+    assert limiter.consume(1000) == 0
@@ -0,0 +1,105 @@
+from jira_migrator.migrator import Migrator
+from jira_migrator.models import MigrationRequest
+from jira_migrator.sharding import DONE, FAILED, ShardQueue
+
+from fake_jira import FakeJiraConfig, FakeJiraServer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_is_fenced_off(tmp_path):
+    clock = Clock()
+    queue = ShardQueue(str(tmp_path / "q.sqlite3"), lease_s=30, max_attempts=2, clock=clock)
+    assert queue.enqueue("run", "SRC", ["", ' AND created >= "2024/01/01 00:00"']) == 2
+    assert queue.enqueue("run", "SRC", [""]) == 0
+
+    first = queue.claim("run", "w1")
+    second = queue.claim("run", "w2")
+    assert (first.shard_id, second.shard_id) == (1, 2)
+    assert queue.claim("run", "w3") is None
+
+    clock.now += 20
+    assert queue.heartbeat(first, "w1")
+    clock.now += 20
+    # w2 stopped heartbeating 40s ago; w1 renewed at +20s and still holds its lease.
+    reclaimed = queue.claim("run", "w3")
+    assert reclaimed.shard_id == second.shard_id and reclaimed.attempts == 2
+    assert not queue.heartbeat(second, "w2")
+    assert not queue.complete(second, "w2", "{}")
+
+    assert queue.complete(first, "w1", "{}")
+    queue.fail(reclaimed, "w3", "boom")
+    shards = {shard["shard_id"]: shard for shard in queue.shards("run")}
+    assert shards[1]["status"] == DONE
+    assert shards[2]["status"] == FAILED and shards[2]["error"] == "boom"
+    assert queue.unfinished("run") == 0
+
+
+def test_shard_that_kills_every_worker_fails_after_max_attempts(tmp_path):
+    clock = Clock()
+    queue = ShardQueue(str(tmp_path / "q.sqlite3"), lease_s=30, max_attempts=2, clock=clock)
+    queue.enqueue("run", "SRC", [""])
+
+    for attempt in (1, 2):
+        assert queue.claim("run", f"w{attempt}").attempts == attempt
+        clock.now += 31
+
+    assert queue.claim("run", "w3") is None
+    [shard] = queue.shards("run")
+    assert shard["status"] == FAILED and shard["error"] == "lease expired on all 2 attempt(s)"
+    assert queue.unfinished("run") == 0
+
+
+def make_request(server, tmp_path, **overrides):
+    server.prime_rate_limiters(1000.0)
+    params = dict(
+        cloud_base_url=server.cloud_url,
+        cloud_user="u",
+        cloud_token="t",
+        dc_base_url=server.dc_url,
+        dc_user="u",
+        dc_token="t",
+        source_project_keys=["SRC"],
+        dry_run=False,
+        issue_batch_size=10,
+        max_requests_per_second=1000.0,
+        migrate_users=False,
+        validate_payloads=False,
+        db_path=str(tmp_path / "mappings.sqlite3"),
+    )
+    params.update(overrides)
+    return MigrationRequest(**params)
+
+
+def test_shards_partition_the_project(tmp_path):
+    config = FakeJiraConfig(projects={"SRC": 95}, comments_per_issue=0, created_step_s=600)
+    with FakeJiraServer(config) as server:
+        migrator = Migrator(make_request(server, tmp_path, shard_issues=20))
+        clauses = migrator.plan_shards("SRC")
+        counts = [migrator.cloud.count_issues_cloud(f"project = SRC{clause}") for clause in clauses]
+
+    assert len(clauses) == 5
+    assert sum(counts) == 95
+    assert all(count > 0 for count in counts)
+
+
+def test_workers_migrate_every_issue_exactly_once(tmp_path):
+    config = FakeJiraConfig(projects={"SRC": 40, "OTH": 12}, comments_per_issue=0, created_step_s=60)
+    with FakeJiraServer(config) as server:
+        request = make_request(
+            server, tmp_path, source_project_keys=["SRC", "OTH"], workers=2, shard_issues=10, shard_lease_s=60
+        )
+        result = Migrator(request).run()
+        summaries = [fields["summary"] for fields in server.state.dc_issues.values()]
+
+    src, oth = result.projects
+    assert src.error is None and oth.error is None
+    assert (src.issues_created, oth.issues_created) == (40, 12)
+    assert len(summaries) == len(set(summaries)) == 52
+    assert "Migrated as 4 shard(s)." in src.notes
@@ -0,0 +1,22 @@
+from jira_migrator.mapping_store import MappingStore
+from jira_migrator.skip_index import IssueKeyIndex
+
+
+def test_issue_key_index_membership():
+    index = IssueKeyIndex("SRC", ["SRC-1", "SRC-1000000", "OTHER-3"])
+
+    assert "SRC-1" in index
+    assert "SRC-1000000" in index
+    assert "OTHER-3" in index
+    assert "SRC-2" not in index
+    assert "SRC-99999999" not in index
+    assert index.add("SRC-2") is True
+    assert index.add("SRC-2") is False
+    assert len(index) == 4
+
+
+def test_store_iterates_only_project_keys(tmp_path):
+    store = MappingStore(str(tmp_path / "mappings.sqlite3"))
+    store.set_issue_maps([("SRC-1", "D-1"), ("SRC-22", "D-2"), ("SRCX-1", "D-3"), ("SR-1", "D-4")])
+
+    assert sorted(store.iter_issue_keys("SRC")) == ["SRC-1", "SRC-22"]
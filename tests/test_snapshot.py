@@ -0,0 +1,40 @@
+from jira_migrator.snapshot import ExtractionSnapshot
+
+
+def issue(key, updated, summary="s"):
+    return {"key": key, "fields": {"summary": summary, "updated": updated}}
+
+
+def read_all(snapshot):
+    return [i for page in snapshot.iter_pages(2) for i in page]
+
+
+def test_snapshot_keeps_latest_copy_of_each_issue(tmp_path):
+    snapshot = ExtractionSnapshot(tmp_path / "snap")
+    with snapshot.writer() as writer:
+        writer.append([issue("A-1", "t1"), issue("A-2", "t1"), issue("A-3", "t1")])
+        writer.mark_finished()
+    with snapshot.writer() as writer:
+        assert writer.append([issue("A-2", "t2", "new"), issue("A-3", "t1")]) == 1
+        writer.mark_finished()
+
+    issues = read_all(ExtractionSnapshot(tmp_path / "snap"))
+
+    assert snapshot.complete
+    assert [i["key"] for i in issues] == ["A-1", "A-3", "A-2"]
+    assert issues[-1]["fields"]["summary"] == "new"
+
+
+def test_snapshot_drops_torn_tail(tmp_path):
+    snapshot = ExtractionSnapshot(tmp_path / "snap")
+    with snapshot.writer() as writer:
+        writer.append([issue("A-1", "t1")])
+        writer.mark_finished()
+    with open(snapshot.data_path, "ab") as raw:
+        raw.write(b"\x1f\x8b\x08garbage")
+
+    with snapshot.writer() as writer:
+        writer.append([issue("A-2", "t1")])
+        writer.mark_finished()
+
+    assert [i["key"] for i in read_all(snapshot)] == ["A-1", "A-2"]
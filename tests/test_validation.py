@@ -0,0 +1,145 @@
+import re
+
+import requests
+
+from jira_migrator.mapping_store import MappingStore
+from jira_migrator.models import ValidationRequest
+from jira_migrator.validation import MigrationValidator
+
+_KEY_IN = re.compile(r"key in \(([^)]*)\)")
+
+
+def _search(issues, jql, start_at, max_results):
+    # -> (page, total); `key in (...)` with an unknown key is a 400, as in Jira.
+    project = re.search(r"project = (\w+)", jql).group(1)
+    selected = [issue for issue in issues.values() if issue["key"].startswith(f"{project}-")]
+    wanted = _KEY_IN.search(jql)
+    if wanted:
+        keys = [key.strip() for key in wanted.group(1).split(",")]
+        if any(key not in issues for key in keys):
+            response = requests.Response()
+            response.status_code = 400
+            raise requests.HTTPError("issue does not exist", response=response)
+        selected = [issues[key] for key in keys]
+    return selected[start_at : start_at + max_results], len(selected)
+
+
+class ValidationCloud:
+    def __init__(self, issues):
+        self.issues = {issue["key"]: issue for issue in issues}
+        self.searches = []
+
+    def search_issues_jql(self, jql, next_page_token=None, max_results=100, fields=None, **_):
+        self.searches.append(jql)
+        start_at = int(next_page_token or 0)
+        page, total = _search(self.issues, jql, start_at, max_results)
+        end = start_at + len(page)
+        return {"issues": page, "isLast": end >= total, "nextPageToken": str(end)}
+
+    def count_issues_cloud(self, jql):
+        return _search(self.issues, jql, 0, 10**9)[1]
+
+
+class ValidationDC:
+    def __init__(self, issues):
+        self.issues = {issue["key"]: issue for issue in issues}
+        self.searches = []
+
+    def search_issues_dc(self, jql, fields, start_at=0, max_results=100):
+        self.searches.append(jql)
+        page, total = _search(self.issues, jql, start_at, max_results)
+        return {"issues": page if max_results else [], "total": total}
+
+
+def make_sides(tmp_path):
+    # SRC-1..12 in Cloud; 1..11 were migrated. In DC, 5 and 7 were edited, 9 was deleted and
+    # MIGSRC-99 was created outside the migration.
+    cloud, dc = [], []
+    for n in range(1, 13):
+        fields = {
+            "summary": f"issue  {n}",
+            "labels": ["x"] if n % 2 else [],
+            "priority": {"name": "Urgent" if n == 2 else "Medium"},
+            "comment": {"comments": [], "total": 2},
+        }
+        if n == 1:
+            mention = {"type": "mention", "attrs": {"id": "a-1", "text": "@Alice"}}
+            content = [{"type": "text", "text": "Hello "}, mention]
+            fields["description"] = {"type": "doc", "content": [{"type": "paragraph", "content": content}]}
+        cloud.append({"key": f"SRC-{n}", "fields": fields})
+        if n == 12:
+            continue
+        dc_fields = {
+            "summary": "changed" if n == 5 else f"issue {n}",
+            "description": "Hello [~alice]" if n == 1 else None,
+            "labels": (["x"] if n % 2 else []) + [f"migrated-from-SRC-{n}"],
+            "priority": {"name": "Low" if n == 2 else "Medium"},
+            "comment": {"comments": [], "total": 1 if n == 7 else 2},
+        }
+        if n != 9:
+            dc.append({"key": f"MIGSRC-{n}", "fields": dc_fields})
+    dc.append({"key": "MIGSRC-99", "fields": {"summary": "stray", "labels": ["migrated-from-SRC-404"]}})
+
+    store = MappingStore(str(tmp_path / "mappings.sqlite3"))
+    store.set_project_map("SRC", "MIGSRC")
+    store.set_issue_maps((f"SRC-{n}", f"MIGSRC-{n}") for n in range(1, 12))
+    store.set_user_maps([("a-1", "alice")])
+    store.set_field_map("priority:Urgent", "Low")
+    store.close()
+    return ValidationCloud(cloud), ValidationDC(dc)
+
+
+def make_validator(tmp_path, cloud, dc, **overrides):
+    params = dict(
+        cloud_base_url="https://cloud.example",
+        cloud_user="u",
+        cloud_token="t",
+        dc_base_url="https://dc.example",
+        dc_user="u",
+        dc_token="t",
+        source_project_keys=["SRC"],
+        issue_batch_size=4,
+        db_path=str(tmp_path / "mappings.sqlite3"),
+    )
+    params.update(overrides)
+    validator = MigrationValidator(ValidationRequest(**params))
+    validator.cloud, validator.dc = cloud, dc
+    return validator
+
+
+def differences(result):
+    return {(item.kind, item.cloud_issue_key, item.dc_issue_key, tuple(item.fields)) for item in result.items}
+
+
+def test_full_validation_reports_missing_extra_and_mismatched(tmp_path):
+    cloud, dc = make_sides(tmp_path)
+
+    result = make_validator(tmp_path, cloud, dc).run().projects[0]
+
+    assert result.error is None
+    assert (result.cloud_issues, result.dc_issues, result.compared, result.matched) == (12, 11, 10, 8)
+    assert (result.missing, result.extra, result.mismatched) == (2, 1, 2)
+    assert result.mismatched_fields == {"summary": 1, "comments": 1}
+    assert differences(result) == {
+        ("missing", "SRC-9", "MIGSRC-9", ()),
+        ("missing", "SRC-12", None, ()),
+        ("extra", "SRC-404", "MIGSRC-99", ()),
+        ("mismatched", "SRC-5", "MIGSRC-5", ("summary",)),
+        ("mismatched", "SRC-7", "MIGSRC-7", ("comments",)),
+    }
+    assert set(result.timings) == {"cloud_s", "dc_s", "merge_s", "total_s"}
+
+
+def test_sampled_validation_reads_only_the_sampled_keys(tmp_path):
+    cloud, dc = make_sides(tmp_path)
+    del cloud.issues["SRC-3"]
+
+    result = make_validator(tmp_path, cloud, dc, sample_size=11, max_reported_items=2).run().projects[0]
+
+    assert result.sampled
+    assert (result.cloud_issues, result.dc_issues, result.compared, result.matched) == (11, 11, 9, 7)
+    assert (result.missing, result.extra, result.mismatched) == (1, 1, 2)
+    assert len(result.items) == 2 and result.items_truncated
+    # No full scans: issue reads name their keys, and the DC size comes from one total-only search.
+    assert all("key in (" in jql for jql in cloud.searches)
+    assert [jql for jql in dc.searches if "key in (" not in jql] == ["project = MIGSRC"]